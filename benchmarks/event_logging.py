@@ -0,0 +1,141 @@
+"""Per-event logging overhead benchmark for lambda_handler.
+
+Synthetic RunInstances events with N instances are logged the old way
+(``json.dumps`` of the whole event at INFO) and through event_log, to a
+handler that writes to a byte-counting sink like CloudWatch would ingest.
+Scenarios:
+
+- eager:          ``logger.info("Event received: %s", json.dumps(event))``
+- summary:        ``log_event(event)`` at INFO (the default)
+- summary_debug:  ``log_event(event)`` at DEBUG (summary plus capped payload)
+- eager_disabled / summary_disabled: the same calls with the level at WARNING
+
+Usage:
+    python -m benchmarks.event_logging [--instances 10 500 2000] [--iterations N] [--json]
+"""
+
+import argparse
+import io
+import json
+import logging
+import sys
+import time
+
+from src import event_log
+from src.event_log import log_event
+
+
+class CountingSink(io.TextIOBase):
+    """Text stream that discards writes and counts the bytes it was given."""
+
+    def __init__(self):
+        self.bytes = 0
+
+    def write(self, s):
+        self.bytes += len(s.encode("utf-8"))
+        return len(s)
+
+
+def run_instances_event(instances: int) -> dict:
+    """Build an EventBridge RunInstances event shaped like a real CloudTrail record."""
+    items = []
+    for n in range(instances):
+        items.append({
+            "instanceId": f"i-{n:017x}",
+            "imageId": "ami-0abcdef1234567890",
+            "instanceType": "m5.large",
+            "instanceState": {"code": 0, "name": "pending"},
+            "privateDnsName": f"ip-10-0-{n // 256 % 256}-{n % 256}.ec2.internal",
+            "privateIpAddress": f"10.0.{n // 256 % 256}.{n % 256}",
+            "subnetId": "subnet-0123456789abcdef0",
+            "vpcId": "vpc-0123456789abcdef0",
+            "placement": {"availabilityZone": "us-east-1a", "tenancy": "default"},
+            "blockDeviceMapping": {"items": [{"deviceName": "/dev/xvda", "ebs": {"volumeId": f"vol-{n:017x}"}}]},
+            "networkInterfaceSet": {"items": [{
+                "networkInterfaceId": f"eni-{n:017x}", "macAddress": "0a:1b:2c:3d:4e:5f",
+                "groupSet": {"items": [{"groupId": "sg-0123456789abcdef0", "groupName": "default"}]},
+            }]},
+        })
+    return {
+        "version": "0", "id": "bench", "detail-type": "AWS API Call via CloudTrail", "source": "aws.ec2",
+        "detail": {
+            "eventSource": "ec2.amazonaws.com", "eventName": "RunInstances", "awsRegion": "us-east-1",
+            "eventID": "00000000-0000-0000-0000-000000000000", "eventTime": "2025-01-01T00:00:00Z",
+            "userIdentity": {"type": "IAMUser", "userName": "bench",
+                             "arn": "arn:aws:iam::123456789012:user/bench"},
+            "requestParameters": {"instanceType": "m5.large", "minCount": instances, "maxCount": instances},
+            "responseElements": {"instancesSet": {"items": items}},
+        },
+    }
+
+
+def _eager(logger, event):
+    logger.info("Event received: %s", json.dumps(event))
+
+
+def _summary(logger, event):
+    log_event(event)
+
+
+SCENARIOS = {
+    "eager": (_eager, logging.INFO),
+    "summary": (_summary, logging.INFO),
+    "summary_debug": (_summary, logging.DEBUG),
+    "eager_disabled": (_eager, logging.WARNING),
+    "summary_disabled": (_summary, logging.WARNING),
+}
+
+
+def measure(scenario: str, event: dict, iterations: int) -> dict:
+    """Time one scenario and return microseconds and logged bytes per event."""
+    call, level = SCENARIOS[scenario]
+    sink = CountingSink()
+    handler = logging.StreamHandler(sink)
+    logger = logging.getLogger("benchmarks.event_logging")
+    for log in (logger, event_log.logger):
+        log.handlers[:] = [handler]
+        log.setLevel(level)
+        log.propagate = False
+
+    start = time.perf_counter()
+    for _ in range(iterations):
+        call(logger, event)
+    elapsed = time.perf_counter() - start
+    return {
+        "us_per_event": round(elapsed / iterations * 1e6, 2),
+        "bytes_per_event": sink.bytes // iterations,
+    }
+
+
+def run(instances=(10, 500, 2000), iterations: int = 200) -> dict:
+    """Measure every scenario for each fleet size."""
+    results = {}
+    for count in instances:
+        event = run_instances_event(count)
+        results[count] = {
+            "payload_bytes": len(json.dumps(event)),
+            **{name: measure(name, event, iterations) for name in SCENARIOS},
+        }
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--instances", type=int, nargs="+", default=[10, 500, 2000], help="fleet sizes")
+    parser.add_argument("--iterations", type=int, default=200, help="events logged per scenario")
+    parser.add_argument("--json", action="store_true", help="print results as JSON")
+    args = parser.parse_args(argv)
+
+    results = run(args.instances, args.iterations)
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return 0
+    for count, r in results.items():
+        print(f"RunInstances x{count} ({r['payload_bytes']} bytes)")
+        for name in SCENARIOS:
+            print(f"  {name:17s} {r[name]['us_per_event']:10.2f}us/event {r[name]['bytes_per_event']:9d} bytes/event")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,141 @@
+"""Synthetic CloudTrail event generator for benchmarks.
+
+Events are built from EXTRACTION_SPECS, so every SERVICE_HANDLERS key is
+covered and each event carries exactly the response shape its handler reads.
+``fleet_size`` sets how many elements the outermost ``[*]`` list gets (e.g.
+instances in a RunInstances response); principals are drawn from a weighted
+mix of CloudTrail identity types.
+"""
+
+import random
+import uuid
+
+from src.config import HANDLER_PATHS
+from src.resource_extractors import EXTRACTION_SPECS, parse_path, EC2_ID, BUCKET_NAME, EFS_ID, QUEUE_URL
+
+ACCOUNT_ID = "123456789012"
+REGIONS = ("us-east-1", "us-west-2", "eu-west-1")
+
+DEFAULT_PRINCIPAL_MIX = "IAMUser=4,AssumedRole=4,Root=1,FederatedUser=1"
+
+# Leaf key -> EC2 ID prefix
+EC2_PREFIXES = {
+    "instanceId": "i", "volumeId": "vol", "groupId": "sg", "imageId": "ami", "snapshotId": "snap",
+    "allocationId": "eipalloc", "networkInterfaceId": "eni", "vpcId": "vpc", "subnetId": "subnet",
+    "internetGatewayId": "igw", "natGatewayId": "nat",
+}
+
+
+def parse_principal_mix(spec: str) -> dict:
+    """Parse "IAMUser=4,AssumedRole=4,Root=1" into {type: weight}."""
+    mix = {}
+    for entry in filter(None, (part.strip() for part in spec.split(","))):
+        name, _, weight = entry.partition("=")
+        mix[name.strip()] = float(weight or 1)
+    return mix
+
+
+def make_principal(kind: str, n: int) -> dict:
+    """Build a userIdentity block of the given CloudTrail type."""
+    if kind == "IAMUser":
+        return {"type": "IAMUser", "userName": f"user{n}", "principalId": f"AIDA{n:016d}",
+                "arn": f"arn:aws:iam::{ACCOUNT_ID}:user/user{n}", "accountId": ACCOUNT_ID}
+    if kind == "AssumedRole":
+        return {"type": "AssumedRole", "principalId": f"AROA{n:016d}:session{n}",
+                "arn": f"arn:aws:sts::{ACCOUNT_ID}:assumed-role/Role{n % 7}/session{n}", "accountId": ACCOUNT_ID}
+    if kind == "Root":
+        return {"type": "Root", "principalId": ACCOUNT_ID, "arn": f"arn:aws:iam::{ACCOUNT_ID}:root",
+                "accountId": ACCOUNT_ID}
+    if kind == "FederatedUser":
+        return {"type": "FederatedUser", "userName": f"fed{n}", "principalId": f"{ACCOUNT_ID}:fed{n}",
+                "arn": f"arn:aws:sts::{ACCOUNT_ID}:federated-user/fed{n}", "accountId": ACCOUNT_ID}
+    return {"type": kind, "principalId": f"{kind}{n}", "invokedBy": "ec2.amazonaws.com"}
+
+
+def _resource_id(kind, key, leaf, n, region):
+    service = key[0].split(".", 1)[0]
+    if kind == EC2_ID:
+        return f"{EC2_PREFIXES.get(leaf, 'r')}-{n:017x}"
+    if kind == BUCKET_NAME:
+        return f"bench-bucket-{n}"
+    if kind == EFS_ID:
+        return f"fs-{n:017x}"
+    if kind == QUEUE_URL:
+        return f"https://sqs.{region}.amazonaws.com/{ACCOUNT_ID}/bench-queue-{n}"
+    resource_type = leaf[:-3].lower() if leaf.endswith("Arn") else "resource"
+    return f"arn:aws:{service}:{region}:{ACCOUNT_ID}:{resource_type}/bench-{n}"
+
+
+def _fill(node, steps, fleet_size, make_id, depth=0):
+    """Create the structure a parsed spec path expects under node, merging with what is there."""
+    key, fan_out = steps[0]
+    rest = steps[1:]
+    if not fan_out:
+        if not rest:
+            node[key] = make_id(key)
+            return
+        _fill(node.setdefault(key, {}), rest, fleet_size, make_id, depth)
+        return
+    size = fleet_size if depth == 0 else 1
+    items = node.setdefault(key, [])
+    while len(items) < size:
+        items.append({})
+    for item in items:
+        _fill(item, rest, fleet_size, make_id, depth + 1)
+
+
+def make_detail(key, fleet_size=1, principal=None, region="us-east-1", rng=None) -> dict:
+    """Build a CloudTrail detail for key with fleet_size resources in its outermost list."""
+    rng = rng or random.Random()
+    spec = EXTRACTION_SPECS[key]
+    counter = iter(range(rng.randrange(1 << 40), 1 << 48))
+    detail = {
+        "eventVersion": "1.09",
+        "eventSource": key[0],
+        "eventName": key[1],
+        "awsRegion": region,
+        "eventTime": "2025-01-01T00:00:00Z",
+        "eventID": str(uuid.UUID(int=rng.getrandbits(128), version=4)),
+        "userIdentity": principal or make_principal("IAMUser", 0),
+        "sourceIPAddress": "198.51.100.1",
+        "requestParameters": {},
+        "responseElements": {},
+    }
+    def make_id(leaf):
+        return _resource_id(spec.kind, key, leaf, next(counter), region)
+
+    for path in spec.paths:
+        _fill(detail, parse_path(path), fleet_size, make_id)
+    return detail
+
+
+def generate_events(count, fleet_sizes=(1,), principal_mix=DEFAULT_PRINCIPAL_MIX, keys=None, seed=0):
+    """Yield count EventBridge events, cycling through every handler key.
+
+    Args:
+        count: Number of events.
+        fleet_sizes: Fleet sizes for list-shaped responses; each key cycles
+            through all of them.
+        principal_mix: Weighted identity types, "Type=weight,...".
+        keys: (eventSource, eventName) keys to cover; defaults to every
+            SERVICE_HANDLERS key.
+        seed: Seed for IDs, principals and regions.
+    """
+    rng = random.Random(seed)
+    keys = list(keys or HANDLER_PATHS)
+    mix = parse_principal_mix(principal_mix)
+    kinds, weights = list(mix), list(mix.values())
+    for n in range(count):
+        key = keys[n % len(keys)]
+        principal = make_principal(rng.choices(kinds, weights)[0], rng.randrange(50))
+        fleet_size = fleet_sizes[(n // len(keys)) % len(fleet_sizes)]
+        detail = make_detail(key, fleet_size, principal, rng.choice(REGIONS), rng)
+        yield {
+            "version": "0",
+            "id": detail["eventID"],
+            "detail-type": "AWS API Call via CloudTrail",
+            "source": "aws." + key[0].split(".", 1)[0],
+            "account": ACCOUNT_ID,
+            "region": detail["awsRegion"],
+            "detail": detail,
+        }
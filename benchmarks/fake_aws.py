@@ -0,0 +1,218 @@
+"""In-process fake AWS backend for benchmarks.
+
+FakeSession stands in for the boto3 session inside client_pool, so the real
+pool, rate limiter hooks, retry engine and handlers all run unchanged; only
+the network round trip is replaced by a configurable sleep.
+
+Usage:
+    with FakeAWS(latency_ms=5, jitter_ms=2) as aws:
+        lambda_handler(event, context)
+    aws.calls  # {"ec2:CreateTags": 1}
+
+With a resources inventory, the Resource Groups Tagging API is stateful:
+GetResources pages through the region's resources (also via get_paginator)
+and TagResources updates their tags.
+"""
+
+import json
+import random
+import re
+import threading
+import time
+from types import SimpleNamespace
+
+from src import client_pool
+
+# Operations get_paginator supports: (input token, output token)
+PAGINATORS = {"get_resources": ("PaginationToken", "PaginationToken")}
+
+# Responses for operations whose callers read the result
+DEFAULT_RESPONSES = {
+    "GetBucketTagging": {"TagSet": []},
+    "TagResources": {"FailedResourcesMap": {}},
+}
+
+
+def _operation_name(method: str) -> str:
+    """create_tags -> CreateTags."""
+    return "".join(part.title() for part in method.split("_"))
+
+
+class _Events:
+    """Just enough of botocore's event system for client_pool's before/after-call hooks."""
+
+    def __init__(self):
+        self._handlers = []
+
+    def register(self, event_name, handler):
+        self._handlers.append((re.compile(event_name.replace(".", r"\.").replace("*", "[^.]+")), handler))
+
+    def emit(self, event_name, **kwargs):
+        for pattern, handler in self._handlers:
+            if pattern.fullmatch(event_name):
+                handler(**kwargs)
+
+
+class FakeClient:
+    """Accepts any API call, sleeps for the configured latency and records it."""
+
+    def __init__(self, backend, service, region):
+        self._backend = backend
+        self._service = service
+        self.meta = SimpleNamespace(events=_Events(), region_name=region or "us-east-1", service_model=None)
+
+    def __getattr__(self, method):
+        if method.startswith("_"):
+            raise AttributeError(method)
+        operation = _operation_name(method)
+
+        def call(**kwargs):
+            model, context = SimpleNamespace(name=operation), {}
+            self.meta.events.emit(f"before-call.{self._service}.{operation}", model=model, params=kwargs,
+                                  context=context)
+            self.meta.events.emit(f"before-send.{self._service}.{operation}", request=None)
+            self._backend.record(self._service, self.meta.region_name, operation, kwargs)
+            try:
+                parsed = self._backend.handle(self._service, operation, kwargs)
+                if operation == "GetResources":
+                    parsed = self._backend.resource_page(self.meta.region_name, kwargs)
+            except Exception as e:
+                parsed = getattr(e, "response", {})
+                raise
+            finally:
+                status = parsed.get("ResponseMetadata", {}).get("HTTPStatusCode", 200) if "Error" not in parsed else 400
+                self.meta.events.emit(f"needs-retry.{self._service}.{operation}",
+                                      response=(SimpleNamespace(status_code=status), parsed),
+                                      request_dict={"context": context}, attempts=1)
+                self.meta.events.emit(f"after-call.{self._service}.{operation}", model=model, parsed=parsed,
+                                      context=context)
+            return parsed
+
+        return call
+
+    def get_paginator(self, name):
+        return FakePaginator(getattr(self, name), *PAGINATORS[name])
+
+
+class FakePaginator:
+    """Calls a FakeClient method page by page, like a botocore paginator."""
+
+    def __init__(self, method, input_token, output_token):
+        self._method = method
+        self._input_token = input_token
+        self._output_token = output_token
+
+    def paginate(self, PaginationConfig=None, **kwargs):
+        token = (PaginationConfig or {}).get("StartingToken")
+        while True:
+            page = self._method(**kwargs, **({self._input_token: token} if token else {}))
+            yield page
+            token = page.get(self._output_token)
+            if not token:
+                return
+
+
+def _resource_type(arn):
+    """arn:aws:ec2:us-east-1:1:instance/i-1 -> "ec2:instance"; S3 bucket ARNs -> "s3"."""
+    parts = arn.split(":", 5)
+    if parts[2] == "s3":
+        return "s3"
+    return f"{parts[2]}:{parts[5].split('/', 1)[0].split(':', 1)[0]}"
+
+
+class FakeSession:
+    """Replacement for boto3.session.Session that builds FakeClients."""
+
+    def __init__(self, backend):
+        self._backend = backend
+
+    def client(self, service, region_name=None, config=None, **credentials):
+        return FakeClient(self._backend, service, region_name)
+
+
+class FakeAWS:
+    """Context manager that routes every pooled client to the in-process fake.
+
+    Args:
+        latency_ms: Mean simulated round-trip time per call.
+        jitter_ms: Uniform +/- jitter around latency_ms.
+        throttle_rate: Probability that a call fails with a Throttling error.
+        responses: Extra {OperationName: response} overrides.
+        seed: Seed for jitter and throttling, for repeatable runs.
+        resources: {region: {arn: {key: value}}} inventory for GetResources
+            and TagResources; updated in place.
+    """
+
+    def __init__(self, latency_ms=0.0, jitter_ms=0.0, throttle_rate=0.0, responses=None, seed=None,
+                 resources=None):
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.throttle_rate = throttle_rate
+        self.responses = {**DEFAULT_RESPONSES, **(responses or {})}
+        self.calls = {}
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self._saved = None
+        self.resources = resources
+        # When a list, every call is appended as {"api", "region", "params"}
+        self.trace = None
+
+    def handle(self, service, operation, params):
+        with self._lock:
+            name = f"{service}:{operation}"
+            self.calls[name] = self.calls.get(name, 0) + 1
+            delay = max(0.0, self.latency_ms + self._random.uniform(-self.jitter_ms, self.jitter_ms)) / 1000.0
+            throttled = self.throttle_rate and self._random.random() < self.throttle_rate
+        if delay:
+            time.sleep(delay)
+        if throttled:
+            from botocore.exceptions import ClientError
+
+            raise ClientError({"Error": {"Code": "Throttling", "Message": "Rate exceeded"}}, operation)
+        if operation == "TagResources" and self.resources is not None:
+            return self._tag_resources(params)
+        return self.responses.get(operation, {})
+
+    def record(self, service, region, operation, params):
+        """Append a call to trace, with its parameters copied as plain JSON."""
+        if self.trace is None:
+            return
+        entry = {"api": f"{service}:{operation}", "region": region,
+                 "params": json.loads(json.dumps(params, sort_keys=True, default=str))}
+        with self._lock:
+            self.trace.append(entry)
+
+    def resource_page(self, region, params):
+        """One GetResources page of the region's inventory, in ARN order."""
+        inventory = (self.resources or {}).get(region, {})
+        types = params.get("ResourceTypeFilters")
+        with self._lock:
+            arns = sorted(arn for arn in inventory
+                          if not types or any(_resource_type(arn).startswith(t) for t in types))
+            start = int(params.get("PaginationToken") or 0)
+            end = start + params.get("ResourcesPerPage", 50)
+            page = [{"ResourceARN": arn, "Tags": [{"Key": k, "Value": v} for k, v in inventory[arn].items()]}
+                    for arn in arns[start:end]]
+        return {"ResourceTagMappingList": page, "PaginationToken": str(end) if end < len(arns) else ""}
+
+    def _tag_resources(self, params):
+        failed = {}
+        with self._lock:
+            for arn in params["ResourceARNList"]:
+                tags = next((inv[arn] for inv in self.resources.values() if arn in inv), None)
+                if tags is None:
+                    failed[arn] = {"StatusCode": 404, "ErrorCode": "InvalidParameterException"}
+                else:
+                    tags.update(params["Tags"])
+        return {"FailedResourcesMap": failed}
+
+    def __enter__(self):
+        self._saved = (client_pool._session, client_pool._config)
+        client_pool.clear_clients()
+        client_pool._session, client_pool._config = FakeSession(self), None
+        return self
+
+    def __exit__(self, *exc):
+        client_pool.clear_clients()
+        client_pool._session, client_pool._config = self._saved
+        return False
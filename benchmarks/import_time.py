@@ -0,0 +1,91 @@
+"""Cold-import benchmark for lambda_function.
+
+Each sample runs in a fresh interpreter with src/ on sys.path, the same
+layout as the deployed Lambda zip. Two scenarios are measured:
+
+- lazy:  ``import lambda_function`` as a cold start sees it today.
+- eager: the old import graph, with every handler module and boto3 loaded
+  up front.
+
+Usage:
+    python -m benchmarks.import_time [--runs N] [--json] [--max-ms MS]
+
+``--max-ms`` fails the run (exit code 1) when the lazy median exceeds the
+given budget, so CI can catch import-time regressions.
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+SRC_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src")
+
+SCENARIOS = {
+    "lazy": "import lambda_function",
+    "eager": (
+        "import lambda_function, boto3\n"
+        "for key in lambda_function.SERVICE_HANDLERS:\n"
+        "    lambda_function.SERVICE_HANDLERS[key]"
+    ),
+}
+
+_TIMER = """
+import sys, time
+sys.path.insert(0, {src!r})
+start = time.perf_counter()
+{body}
+print((time.perf_counter() - start) * 1000.0)
+print(int("boto3" in sys.modules))
+"""
+
+
+def measure(body: str, runs: int) -> dict:
+    """Run an import scenario in `runs` fresh interpreters and summarize the timings in ms."""
+    samples = []
+    loads_boto3 = False
+    for _ in range(runs):
+        code = _TIMER.format(src=SRC_DIR, body=body)
+        out = subprocess.run([sys.executable, "-c", code], check=True, capture_output=True, text=True).stdout
+        elapsed, boto3_loaded = out.split()
+        samples.append(float(elapsed))
+        loads_boto3 = loads_boto3 or boto3_loaded == "1"
+    return {
+        "runs": runs,
+        "median_ms": round(statistics.median(samples), 3),
+        "min_ms": round(min(samples), 3),
+        "max_ms": round(max(samples), 3),
+        "loads_boto3": loads_boto3,
+    }
+
+
+def run(runs: int = 10) -> dict:
+    """Measure every scenario and return the results keyed by scenario name."""
+    return {name: measure(body, runs) for name, body in SCENARIOS.items()}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=10, help="fresh interpreters per scenario")
+    parser.add_argument("--json", action="store_true", help="print results as JSON")
+    parser.add_argument("--max-ms", type=float, default=None, help="fail if the lazy median exceeds this")
+    args = parser.parse_args(argv)
+
+    results = run(args.runs)
+    if args.json:
+        print(json.dumps(results, indent=2))
+    else:
+        for name, r in results.items():
+            print(f"{name:6s} median={r['median_ms']:8.2f}ms min={r['min_ms']:8.2f}ms "
+                  f"max={r['max_ms']:8.2f}ms boto3={'yes' if r['loads_boto3'] else 'no'}")
+
+    if args.max_ms is not None and results["lazy"]["median_ms"] > args.max_ms:
+        print(f"lazy import median {results['lazy']['median_ms']}ms exceeds budget {args.max_ms}ms", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
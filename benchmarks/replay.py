@@ -0,0 +1,185 @@
+"""Replay a capture of EventBridge events through lambda_handler against the fake backend.
+
+A capture is NDJSON (optionally gzipped): one EventBridge event per line,
+as the rule delivers it. Each event is handed to lambda_handler, either as
+fast as possible or at --rate events per second. The only thing replaced
+is the AWS round trip, which goes to benchmarks.fake_aws. The report
+contains:
+
+- throughput, and latency percentiles overall and per handler;
+- the HTTP-style status of every invocation;
+- the exact API calls each event produced (service, operation, region and
+  parameters), in order.
+
+Calls depend only on the capture and the code, not on timing, so the trace
+of one run can be diffed against another's. A change to a handler or
+extractor then shows up as the events whose calls changed. Latency is
+reported but never diffed.
+
+Usage:
+    python -m benchmarks.replay capture.ndjson --output run.json
+    python -m benchmarks.replay capture.ndjson.gz --rate 50 --latency-ms 5 --baseline run.json --fail-on-diff
+"""
+
+import argparse
+import difflib
+import gzip
+import json
+import logging
+import sys
+import time
+from unittest.mock import patch
+
+from benchmarks.fake_aws import FakeAWS
+from benchmarks.suite import FakeContext, _percentiles
+from src import lambda_function
+from src.idempotency import IdempotencyCache
+
+
+def read_capture(path):
+    """Yield the events of an NDJSON capture, skipping blank lines."""
+    opener = gzip.open if path.endswith(".gz") else open
+    with opener(path, "rt", encoding="utf-8") as f:
+        for line in f:
+            if line.strip():
+                yield json.loads(line)
+
+
+def write_capture(events, path):
+    """Write events as an NDJSON capture (gzipped if path ends in .gz)."""
+    opener = gzip.open if path.endswith(".gz") else open
+    with opener(path, "wt", encoding="utf-8") as f:
+        for event in events:
+            f.write(json.dumps(event) + "\n")
+
+
+def _event_key(event, seen):
+    """Stable key for diffing: the eventID, with a counter for repeats within the capture."""
+    detail = event.get("detail") if isinstance(event, dict) else None
+    event_id = (detail.get("eventID") if isinstance(detail, dict) else None) or "no-event-id"
+    seen[event_id] = seen.get(event_id, 0) + 1
+    return event_id if seen[event_id] == 1 else f"{event_id}#{seen[event_id]}"
+
+
+def replay(events, rate=0.0, latency_ms=0.0, jitter_ms=0.0, seed=0) -> dict:
+    """Run events through lambda_handler and return the report.
+
+    Args:
+        events: EventBridge events, in capture order.
+        rate: Events per second to start; 0 replays as fast as possible.
+        latency_ms, jitter_ms, seed: Passed to FakeAWS.
+    """
+    trace, latencies, per_handler, statuses = [], [], {}, {}
+    seen = {}
+    # A fresh idempotency cache, so repeats within the capture behave as in
+    # production and nothing carries over from an earlier run
+    with FakeAWS(latency_ms, jitter_ms, seed=seed) as aws, \
+            patch.object(lambda_function, "IDEMPOTENCY", IdempotencyCache()):
+        lambda_function.TAG_CACHE.clear()
+        start = time.perf_counter()
+        for n, event in enumerate(events):
+            if rate:
+                delay = start + n / rate - time.perf_counter()
+                if delay > 0:
+                    time.sleep(delay)
+            detail = event.get("detail", {}) if isinstance(event, dict) else {}
+            name = f"{str(detail.get('eventSource', '')).split('.')[0]}:{detail.get('eventName', '')}"
+            aws.trace = []
+            t0 = time.perf_counter()
+            response = lambda_function.lambda_handler(event, FakeContext())
+            elapsed_ms = (time.perf_counter() - t0) * 1000.0
+            status = str(response.get("statusCode", "")) if isinstance(response, dict) else ""
+            latencies.append(elapsed_ms)
+            per_handler.setdefault(name, []).append(elapsed_ms)
+            statuses[status] = statuses.get(status, 0) + 1
+            trace.append({"event": _event_key(event, seen), "handler": name, "status": status,
+                          "latency_ms": round(elapsed_ms, 3), "calls": aws.trace})
+        wall = time.perf_counter() - start
+        aws.trace = None
+        calls = dict(sorted(aws.calls.items()))
+
+    return {
+        "config": {"rate": rate, "latency_ms": latency_ms, "jitter_ms": jitter_ms, "seed": seed},
+        "events": len(trace),
+        "wall_s": round(wall, 3),
+        "events_per_sec": round(len(trace) / wall, 1) if wall else None,
+        "latency": _percentiles(latencies),
+        "handlers": {name: _percentiles(samples) for name, samples in sorted(per_handler.items())},
+        "statuses": dict(sorted(statuses.items())),
+        "api_calls": calls,
+        "trace": trace,
+    }
+
+
+def _call_lines(entry):
+    lines = [f"status {entry['status']}"]
+    lines.extend(json.dumps(call, sort_keys=True) for call in entry["calls"])
+    return lines
+
+
+def diff_traces(baseline, current) -> list:
+    """Compare two runs' traces event by event.
+
+    Returns:
+        [{"event", "change", "diff"}] in current-run order, then events only
+        the baseline had. change is "added", "removed" or "changed"; diff
+        holds unified-diff lines of status and calls.
+    """
+    old = {entry["event"]: entry for entry in baseline}
+    new = {entry["event"]: entry for entry in current}
+    changes = []
+    for key, entry in new.items():
+        if key not in old:
+            changes.append({"event": key, "change": "added", "diff": _call_lines(entry)})
+            continue
+        before, after = _call_lines(old[key]), _call_lines(entry)
+        if before != after:
+            diff = list(difflib.unified_diff(before, after, "baseline", "current", lineterm="", n=1))
+            changes.append({"event": key, "change": "changed", "diff": diff})
+    for key, entry in old.items():
+        if key not in new:
+            changes.append({"event": key, "change": "removed", "diff": _call_lines(entry)})
+    return changes
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("capture", help="NDJSON capture of EventBridge events (.gz accepted)")
+    parser.add_argument("--rate", type=float, default=0.0, help="events per second; 0 = as fast as possible")
+    parser.add_argument("--latency-ms", type=float, default=0.0, help="simulated AWS round-trip time")
+    parser.add_argument("--jitter-ms", type=float, default=0.0, help="uniform jitter around the latency")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="write the report, including the call trace, to this file")
+    parser.add_argument("--baseline", help="report of an earlier run to diff the call trace against")
+    parser.add_argument("--fail-on-diff", action="store_true", help="exit 1 if the call trace differs")
+    parser.add_argument("--log-level", default="WARNING", help="log level while the handlers run")
+    args = parser.parse_args(argv)
+
+    logging.getLogger().setLevel(args.log_level)
+    report = replay(list(read_capture(args.capture)), args.rate, args.latency_ms, args.jitter_ms, args.seed)
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+    latency = report["latency"]
+    print(f"{report['events']} events in {report['wall_s']}s ({report['events_per_sec']} events/s), "
+          f"p50={latency.get('p50_ms')}ms p99={latency.get('p99_ms')}ms, statuses: {report['statuses']}")
+    for api, count in report["api_calls"].items():
+        print(f"  {api:45s} {count}")
+
+    if not args.baseline:
+        return 0
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    changes = diff_traces(baseline["trace"], report["trace"])
+    print(f"\nvs. baseline: {baseline.get('events_per_sec')} -> {report['events_per_sec']} events/s, "
+          f"{len(changes)} of {report['events']} events with different API calls")
+    for change in changes:
+        print(f"  {change['change']}: {change['event']}")
+        for line in change["diff"]:
+            print(f"    {line}")
+    return 1 if args.fail_on_diff and changes else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,241 @@
+"""End-to-end throughput and latency benchmark against a fake AWS backend.
+
+Synthetic events for every SERVICE_HANDLERS key are run through the real
+entry points, with only the AWS round trip replaced by benchmarks.fake_aws:
+
+- direct: one lambda_handler call per event; reports events/sec and
+  p50/p99 latency per handler.
+- batch:  SQS batches through batch_handler; reports events/sec and
+  p50/p99 per batch.
+
+Cold-import time (from benchmarks.import_time) and peak memory (tracemalloc
+over a separate direct pass, plus process max RSS) are reported alongside.
+Results are JSON so runs can be compared; ``--baseline`` prints the change
+against an earlier result and ``--max-regression`` fails the run when any
+headline metric is worse by more than the given percentage.
+
+Usage:
+    python -m benchmarks.suite --events 500 --fleet-sizes 1 10 100 --latency-ms 5 --output results.json
+    python -m benchmarks.suite --baseline results.json --max-regression 10
+"""
+
+import argparse
+import json
+import logging
+import platform
+import resource
+import statistics
+import sys
+import time
+import tracemalloc
+
+from benchmarks import import_time
+from benchmarks.events import DEFAULT_PRINCIPAL_MIX, generate_events
+from benchmarks.event_logging import CountingSink
+from benchmarks.fake_aws import FakeAWS
+from src import lambda_function
+from src.metrics import METRICS
+
+
+class FakeContext:
+    """Lambda context with a fixed 15-minute budget per invocation."""
+
+    def __init__(self, timeout_ms=900_000):
+        self._deadline = time.monotonic() + timeout_ms / 1000.0
+
+    def get_remaining_time_in_millis(self):
+        return int((self._deadline - time.monotonic()) * 1000)
+
+
+def _percentiles(samples_ms) -> dict:
+    ordered = sorted(samples_ms)
+    if not ordered:
+        return {"count": 0}
+
+    def pick(q):
+        return round(ordered[min(len(ordered) - 1, int(q * len(ordered)))], 3)
+
+    return {
+        "count": len(ordered),
+        "mean_ms": round(statistics.fmean(ordered), 3),
+        "p50_ms": pick(0.50),
+        "p99_ms": pick(0.99),
+        "max_ms": round(ordered[-1], 3),
+    }
+
+
+def run_direct(events) -> dict:
+    """Invoke lambda_handler once per event and collect per-handler latencies."""
+    per_handler = {}
+    start = time.perf_counter()
+    for event in events:
+        detail = event["detail"]
+        t0 = time.perf_counter()
+        lambda_function.lambda_handler(event, FakeContext())
+        elapsed_ms = (time.perf_counter() - t0) * 1000.0
+        per_handler.setdefault(f"{detail['eventSource'].split('.')[0]}:{detail['eventName']}", []).append(elapsed_ms)
+    wall = time.perf_counter() - start
+    return {
+        "events": len(events),
+        "wall_s": round(wall, 3),
+        "events_per_sec": round(len(events) / wall, 1) if wall else None,
+        "handlers": {name: _percentiles(samples) for name, samples in sorted(per_handler.items())},
+    }
+
+
+def run_batch(events, batch_size) -> dict:
+    """Deliver events as SQS batches to batch_handler."""
+    batches = [events[i:i + batch_size] for i in range(0, len(events), batch_size)]
+    latencies, failed = [], 0
+    start = time.perf_counter()
+    for n, batch in enumerate(batches):
+        records = [{"messageId": f"{n}-{i}", "body": json.dumps(event)} for i, event in enumerate(batch)]
+        t0 = time.perf_counter()
+        response = lambda_function.batch_handler({"Records": records}, FakeContext())
+        latencies.append((time.perf_counter() - t0) * 1000.0)
+        failed += len(response["batchItemFailures"])
+    wall = time.perf_counter() - start
+    return {
+        "events": len(events),
+        "batch_size": batch_size,
+        "failed": failed,
+        "wall_s": round(wall, 3),
+        "events_per_sec": round(len(events) / wall, 1) if wall else None,
+        "batches": _percentiles(latencies),
+    }
+
+
+def measure_memory(events) -> dict:
+    """Peak traced Python allocations over a direct pass, and process max RSS."""
+    tracemalloc.start()
+    try:
+        for event in events:
+            lambda_function.lambda_handler(event, FakeContext())
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return {
+        "tracemalloc_peak_kb": round(peak / 1024, 1),
+        # ru_maxrss is KB on Linux, bytes on macOS
+        "max_rss_kb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss // (1024 if sys.platform == "darwin" else 1),
+    }
+
+
+def run_suite(events=500, fleet_sizes=(1, 10, 100), principals=DEFAULT_PRINCIPAL_MIX, latency_ms=5.0,
+              jitter_ms=1.0, throttle_rate=0.0, batch_size=100, import_runs=5, seed=0) -> dict:
+    """Run every scenario and return the results as a JSON-serializable dict."""
+    # Separate seeds so the idempotency cache does not skip the second pass's events
+    direct_events = list(generate_events(events, fleet_sizes, principals, seed=seed))
+    batch_events = list(generate_events(events, fleet_sizes, principals, seed=seed + 1))
+    memory_events = list(generate_events(min(events, 200), fleet_sizes, principals, seed=seed + 2))
+
+    # EMF lines are still formatted and written, just not to the terminal
+    emf_sink, saved_stream = CountingSink(), METRICS.stream
+    METRICS.stream = emf_sink
+    try:
+        with FakeAWS(latency_ms, jitter_ms, throttle_rate, seed=seed) as aws:
+            direct = run_direct(direct_events)
+            batch = run_batch(batch_events, batch_size)
+            calls = dict(sorted(aws.calls.items()))
+        emf_bytes = emf_sink.bytes
+        with FakeAWS(seed=seed):
+            memory = measure_memory(memory_events)
+    finally:
+        METRICS.stream = saved_stream
+
+    return {
+        "config": {
+            "events": events, "fleet_sizes": list(fleet_sizes), "principals": principals,
+            "latency_ms": latency_ms, "jitter_ms": jitter_ms, "throttle_rate": throttle_rate,
+            "batch_size": batch_size, "seed": seed,
+        },
+        "environment": {"python": platform.python_version(), "platform": platform.platform()},
+        "direct": direct,
+        "batch": batch,
+        "api_calls": calls,
+        "emf_bytes": emf_bytes,
+        "cold_import": import_time.measure(import_time.SCENARIOS["lazy"], import_runs),
+        "memory": memory,
+    }
+
+
+def headline_metrics(results) -> dict:
+    """Flatten the metrics compared against a baseline to {name: (value, higher_is_better)}."""
+    metrics = {
+        "direct.events_per_sec": (results["direct"]["events_per_sec"], True),
+        "batch.events_per_sec": (results["batch"]["events_per_sec"], True),
+        "batch.p99_ms": (results["batch"]["batches"].get("p99_ms"), False),
+        "cold_import.median_ms": (results["cold_import"]["median_ms"], False),
+        "memory.tracemalloc_peak_kb": (results["memory"]["tracemalloc_peak_kb"], False),
+    }
+    for name, stats in results["direct"]["handlers"].items():
+        metrics[f"direct.{name}.p99_ms"] = (stats.get("p99_ms"), False)
+    return metrics
+
+
+def compare(current, baseline) -> list:
+    """Return (metric, baseline, current, regression_pct) for metrics present in both runs.
+
+    regression_pct is positive when the current run is worse.
+    """
+    rows = []
+    old = headline_metrics(baseline)
+    for name, (value, higher_is_better) in headline_metrics(current).items():
+        if name not in old or not old[name][0] or value is None:
+            continue
+        before = old[name][0]
+        change = (value - before) / before * 100.0
+        rows.append((name, before, value, round(-change if higher_is_better else change, 1)))
+    return rows
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--events", type=int, default=500, help="events per scenario")
+    parser.add_argument("--fleet-sizes", type=int, nargs="+", default=[1, 10, 100],
+                        help="resources per list-shaped response, cycled across events")
+    parser.add_argument("--principals", default=DEFAULT_PRINCIPAL_MIX, help='identity mix, "Type=weight,..."')
+    parser.add_argument("--latency-ms", type=float, default=5.0, help="simulated AWS round-trip time")
+    parser.add_argument("--jitter-ms", type=float, default=1.0, help="uniform jitter around the latency")
+    parser.add_argument("--throttle-rate", type=float, default=0.0, help="fraction of calls that are throttled")
+    parser.add_argument("--batch-size", type=int, default=100, help="records per SQS batch")
+    parser.add_argument("--import-runs", type=int, default=5, help="fresh interpreters for cold-import timing")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="write results JSON to this file")
+    parser.add_argument("--baseline", help="results JSON of an earlier run to compare against")
+    parser.add_argument("--max-regression", type=float, default=None,
+                        help="fail if any compared metric is worse than the baseline by more than this percent")
+    parser.add_argument("--log-level", default="WARNING", help="log level while the handlers run")
+    args = parser.parse_args(argv)
+
+    logging.getLogger().setLevel(args.log_level)
+    results = run_suite(args.events, tuple(args.fleet_sizes), args.principals, args.latency_ms, args.jitter_ms,
+                        args.throttle_rate, args.batch_size, args.import_runs, args.seed)
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+    print(f"direct: {results['direct']['events_per_sec']} events/s, "
+          f"batch: {results['batch']['events_per_sec']} events/s, "
+          f"cold import: {results['cold_import']['median_ms']} ms, "
+          f"peak traced memory: {results['memory']['tracemalloc_peak_kb']} KB")
+    for name, stats in results["direct"]["handlers"].items():
+        print(f"  {name:45s} p50={stats['p50_ms']:8.3f}ms p99={stats['p99_ms']:8.3f}ms n={stats['count']}")
+
+    if not args.baseline:
+        return 0
+    with open(args.baseline) as f:
+        rows = compare(results, json.load(f))
+    worst = 0.0
+    print("\nvs. baseline (positive = worse):")
+    for name, before, after, regression in rows:
+        print(f"  {name:55s} {before:>12} -> {after:>12}  {regression:+6.1f}%")
+        worst = max(worst, regression)
+    if args.max_regression is not None and worst > args.max_regression:
+        print(f"worst regression {worst}% exceeds {args.max_regression}%", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
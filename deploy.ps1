@@ -1,9 +1,14 @@
 # Deploy the AutoTag System to all three target regions.
-# Usage: .\deploy.ps1 [-EnvironmentName "Development"] [-ProjectName "CostTracking"]
+# Usage: .\deploy.ps1 [-EnvironmentName "Development"] [-ProjectName "CostTracking"] [-HomeRegion "us-east-1"]
+#
+# With -HomeRegion, one Lambda in that region handles every region's events
+# (DeploymentMode=CentralHome) and the other regions only forward them
+# (DeploymentMode=CentralForwarder). Without it, each region runs its own Lambda.
 
 param(
     [string]$EnvironmentName = "Development",
-    [string]$ProjectName = "CostTracking"
+    [string]$ProjectName = "CostTracking",
+    [string]$HomeRegion = ""
 )
 
 $ErrorActionPreference = "Stop"
@@ -21,21 +26,36 @@ Write-Host "Packaging Lambda code..."
 if (Test-Path "autotag-lambda.zip") { Remove-Item "autotag-lambda.zip" }
 Compress-Archive -Path "src\*" -DestinationPath "autotag-lambda.zip" -Force
 
+# The home region goes first so its rule exists before anything is forwarded to it
+if ($HomeRegion) {
+    $Regions = @($HomeRegion) + @($Regions | Where-Object { $_ -ne $HomeRegion })
+}
+
 foreach ($Region in $Regions) {
     Write-Host ""
     Write-Host "=== Deploying to $Region ==="
 
-    $CodeBucket = "autotag-code-$AccountId-$Region"
+    if (-not $HomeRegion) {
+        $Mode = "Regional"
+    } elseif ($Region -eq $HomeRegion) {
+        $Mode = "CentralHome"
+    } else {
+        $Mode = "CentralForwarder"
+    }
+
+    if ($Mode -ne "CentralForwarder") {
+        $CodeBucket = "autotag-code-$AccountId-$Region"
 
-    Write-Host "Creating code bucket $CodeBucket (if needed)..."
-    aws s3 mb "s3://$CodeBucket" --region $Region 2>$null
-    # Ignore error if bucket already exists
+        Write-Host "Creating code bucket $CodeBucket (if needed)..."
+        aws s3 mb "s3://$CodeBucket" --region $Region 2>$null
+        # Ignore error if bucket already exists
 
-    Write-Host "Uploading Lambda code..."
-    aws s3 cp autotag-lambda.zip "s3://$CodeBucket/autotag-lambda.zip" --region $Region
-    if ($LASTEXITCODE -ne 0) {
-        Write-Error "Failed to upload Lambda code to $Region"
-        exit 1
+        Write-Host "Uploading Lambda code..."
+        aws s3 cp autotag-lambda.zip "s3://$CodeBucket/autotag-lambda.zip" --region $Region
+        if ($LASTEXITCODE -ne 0) {
+            Write-Error "Failed to upload Lambda code to $Region"
+            exit 1
+        }
     }
 
     Write-Host "Deploying CloudFormation stack..."
@@ -46,14 +66,16 @@ foreach ($Region in $Regions) {
         --region $Region `
         --parameter-overrides `
         "EnvironmentName=$EnvironmentName" `
-        "ProjectName=$ProjectName"
+        "ProjectName=$ProjectName" `
+        "DeploymentMode=$Mode" `
+        "HomeRegion=$(if ($HomeRegion) { $HomeRegion } else { 'us-east-1' })"
 
     if ($LASTEXITCODE -ne 0) {
         Write-Error "Failed to deploy stack in $Region"
         exit 1
     }
 
-    Write-Host "=== $Region deployment complete ==="
+    Write-Host "=== $Region deployment complete ($Mode) ==="
 }
 
 Write-Host ""
@@ -1,11 +1,16 @@
 #!/bin/bash
 # Deploy the AutoTag System to all three target regions.
-# Usage: ./deploy.sh [EnvironmentName] [ProjectName]
+# Usage: ./deploy.sh [EnvironmentName] [ProjectName] [HomeRegion]
+#
+# With HomeRegion, one Lambda in that region handles every region's events
+# (DeploymentMode=CentralHome) and the other regions only forward them
+# (DeploymentMode=CentralForwarder). Without it, each region runs its own Lambda.
 
 set -e
 
 ENVIRONMENT_NAME="${1:-Development}"
 PROJECT_NAME="${2:-CostTracking}"
+HOME_REGION="${3:-}"
 STACK_NAME="AutoTagSystem"
 REGIONS=("us-east-1" "ap-southeast-1" "ap-southeast-2")
 
@@ -14,17 +19,36 @@ ACCOUNT_ID=$(aws sts get-caller-identity --query Account --output text)
 echo "Packaging Lambda code..."
 (cd src && zip -r ../autotag-lambda.zip .)
 
+# The home region goes first so its rule exists before anything is forwarded to it
+if [ -n "${HOME_REGION}" ]; then
+  ORDERED=("${HOME_REGION}")
+  for REGION in "${REGIONS[@]}"; do
+    [ "${REGION}" != "${HOME_REGION}" ] && ORDERED+=("${REGION}")
+  done
+  REGIONS=("${ORDERED[@]}")
+fi
+
 for REGION in "${REGIONS[@]}"; do
   echo ""
   echo "=== Deploying to ${REGION} ==="
 
-  CODE_BUCKET="autotag-code-${ACCOUNT_ID}-${REGION}"
+  if [ -z "${HOME_REGION}" ]; then
+    MODE="Regional"
+  elif [ "${REGION}" == "${HOME_REGION}" ]; then
+    MODE="CentralHome"
+  else
+    MODE="CentralForwarder"
+  fi
+
+  if [ "${MODE}" != "CentralForwarder" ]; then
+    CODE_BUCKET="autotag-code-${ACCOUNT_ID}-${REGION}"
 
-  echo "Creating code bucket ${CODE_BUCKET} (if needed)..."
-  aws s3 mb "s3://${CODE_BUCKET}" --region "${REGION}" 2>/dev/null || true
+    echo "Creating code bucket ${CODE_BUCKET} (if needed)..."
+    aws s3 mb "s3://${CODE_BUCKET}" --region "${REGION}" 2>/dev/null || true
 
-  echo "Uploading Lambda code..."
-  aws s3 cp autotag-lambda.zip "s3://${CODE_BUCKET}/autotag-lambda.zip" --region "${REGION}"
+    echo "Uploading Lambda code..."
+    aws s3 cp autotag-lambda.zip "s3://${CODE_BUCKET}/autotag-lambda.zip" --region "${REGION}"
+  fi
 
   echo "Deploying CloudFormation stack..."
   aws cloudformation deploy \
@@ -34,9 +58,11 @@ for REGION in "${REGIONS[@]}"; do
     --region "${REGION}" \
     --parameter-overrides \
       EnvironmentName="${ENVIRONMENT_NAME}" \
-      ProjectName="${PROJECT_NAME}"
+      ProjectName="${PROJECT_NAME}" \
+      DeploymentMode="${MODE}" \
+      HomeRegion="${HOME_REGION:-us-east-1}"
 
-  echo "=== ${REGION} deployment complete ==="
+  echo "=== ${REGION} deployment complete (${MODE}) ==="
 done
 
 echo ""
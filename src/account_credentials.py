@@ -0,0 +1,139 @@
+"""Cached AssumeRole credentials for tagging resources in other accounts.
+
+With CROSS_ACCOUNT_ROLE_NAME set, an event whose recipientAccountId is not
+this function's own account is tagged through that role in the event's
+account. Credentials are kept per account. Once less than
+CREDENTIAL_REFRESH_SECONDS of their lifetime remains, a background thread
+renews them while callers keep using the current set; only missing or
+nearly expired credentials are fetched inline. Concurrent callers for one
+account share a single AssumeRole call.
+
+Clients are pooled per (service, region, credentials) in client_pool, so
+each account's clients are reused until its credentials rotate. At that
+point the old clients are dropped from the pool.
+"""
+
+import logging
+import os
+import threading
+import time
+try:
+    from client_pool import get_client, discard_clients
+    from retry import call_with_retry
+except ImportError:
+    from src.client_pool import get_client, discard_clients
+    from src.retry import call_with_retry
+
+logger = logging.getLogger(__name__)
+
+CROSS_ACCOUNT_ROLE_NAME = os.environ.get("CROSS_ACCOUNT_ROLE_NAME", "")
+CROSS_ACCOUNT_SESSION_SECONDS = int(os.environ.get("CROSS_ACCOUNT_SESSION_SECONDS", "3600"))
+CREDENTIAL_REFRESH_SECONDS = float(os.environ.get("CREDENTIAL_REFRESH_SECONDS", "600"))
+# Below this, cached credentials are not handed out; the caller waits for new ones
+CREDENTIAL_MIN_SECONDS = 60.0
+# This function's own account; looked up with GetCallerIdentity when unset
+HOME_ACCOUNT_ID = os.environ.get("HOME_ACCOUNT_ID", "")
+
+
+class AccountCredentials:
+    """Per-account AssumeRole credentials with background refresh.
+
+    Args:
+        role_name: Role to assume in each member account. Empty disables
+            cross-account tagging; every account then uses the default chain.
+        home_account: This function's account ID, or None to look it up.
+        duration: Requested session duration in seconds.
+        refresh_seconds: Remaining lifetime below which a refresh starts.
+    """
+
+    def __init__(self, role_name=CROSS_ACCOUNT_ROLE_NAME, home_account=HOME_ACCOUNT_ID or None,
+                 duration=CROSS_ACCOUNT_SESSION_SECONDS, refresh_seconds=CREDENTIAL_REFRESH_SECONDS):
+        self.role_name = role_name
+        self.duration = duration
+        self.refresh_seconds = refresh_seconds
+        self._home_account = home_account
+        self._lock = threading.Lock()
+        self._account_locks = {}
+        # account -> (credentials dict, expiry epoch seconds)
+        self._entries = {}
+        self._refreshing = set()
+        self.assume_calls = 0
+
+    def home_account(self):
+        if self._home_account is None:
+            identity = call_with_retry(lambda: get_client("sts").get_caller_identity())
+            self._home_account = identity["Account"]
+        return self._home_account
+
+    def credentials_for(self, account_id):
+        """Return credentials for account_id, or None to use the default chain."""
+        if not self.role_name or not account_id or account_id == self.home_account():
+            return None
+        entry = self._entries.get(account_id)
+        if entry is not None:
+            remaining = entry[1] - time.time()
+            if remaining > self.refresh_seconds:
+                return entry[0]
+            if remaining > CREDENTIAL_MIN_SECONDS:
+                self._refresh_in_background(account_id)
+                return entry[0]
+        return self._refresh(account_id, force=False)
+
+    def _account_lock(self, account_id):
+        with self._lock:
+            return self._account_locks.setdefault(account_id, threading.Lock())
+
+    def _refresh(self, account_id, force):
+        with self._account_lock(account_id):
+            old = self._entries.get(account_id)
+            # Another caller may have refreshed while this one waited for the lock
+            if old is not None and not force and old[1] - time.time() > CREDENTIAL_MIN_SECONDS:
+                return old[0]
+            role_arn = f"arn:aws:iam::{account_id}:role/{self.role_name}"
+            response = call_with_retry(lambda: get_client("sts").assume_role(
+                RoleArn=role_arn, RoleSessionName="AutoTag", DurationSeconds=self.duration,
+            ))
+            self.assume_calls += 1
+            raw = response["Credentials"]
+            credentials = {
+                "aws_access_key_id": raw["AccessKeyId"],
+                "aws_secret_access_key": raw["SecretAccessKey"],
+                "aws_session_token": raw["SessionToken"],
+            }
+            self._entries[account_id] = (credentials, raw["Expiration"].timestamp())
+            logger.info("Assumed %s, credentials expire at %s", role_arn, raw["Expiration"])
+        if old is not None:
+            discard_clients(old[0])
+        return credentials
+
+    def _refresh_in_background(self, account_id):
+        with self._lock:
+            if account_id in self._refreshing:
+                return
+            self._refreshing.add(account_id)
+
+        def run():
+            try:
+                self._refresh(account_id, force=True)
+            except Exception as e:
+                # The current credentials stay in use; the next call past
+                # CREDENTIAL_MIN_SECONDS refreshes inline and surfaces the error
+                logger.warning("Background credential refresh for %s failed: %s", account_id, str(e))
+            finally:
+                with self._lock:
+                    self._refreshing.discard(account_id)
+
+        threading.Thread(target=run, name=f"autotag-credentials-{account_id}", daemon=True).start()
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._refreshing.clear()
+
+
+ACCOUNT_CREDENTIALS = AccountCredentials()
+
+
+def get_account_client(service: str, region: str = None, account_id: str = None):
+    """Return a pooled client for service and region, acting in account_id."""
+    return get_client(service, region, ACCOUNT_CREDENTIALS.credentials_for(account_id))
@@ -0,0 +1,326 @@
+"""Backfill tags for existing resources from the CloudTrail log archive.
+
+The trail bucket holds every management event since AutoTag was deployed
+(or since whatever trail you point it at). This tool streams each gzipped
+log file, decodes its Records one at a time without loading the file into
+memory, and tags every resource-creation event that SERVICE_HANDLERS
+supports:
+
+- EC2 resources are coalesced into CreateTags calls of up to 1000 IDs.
+  Resources that have since been deleted are skipped.
+- Everything else goes through its service handler's executor, with the
+  backfill retry policy instead of the live error handling: a resource
+  that has since been deleted is skipped, and nothing is ever sent to the
+  delayed retry queue.
+
+Calls are paced by the shared rate limiter (``--rate-limits`` uses the same
+syntax as RATE_LIMITS). Each log file whose events were all tagged (or
+skipped as deleted) is recorded in a checkpoint file, so an interrupted or
+partly failed run resumes with the files that still need work.
+
+With ``--dry-run`` nothing is tagged and no checkpoint is written. Each
+event's planned TaggingOperation (API, region, account, resource IDs and
+tags) is printed as one JSON line instead, so the plan can be reviewed or
+diffed before the real run.
+
+Usage:
+    python -m src.backfill --bucket autotag-trail-logs-123456789012-us-east-1 \\
+        --prefix AWSLogs/123456789012/CloudTrail/us-east-1/2025/ --checkpoint backfill.json
+    python -m src.backfill --local-dir ./trail-logs --checkpoint backfill.json
+    python -m src.backfill --local-dir ./trail-logs --dry-run > plan.ndjson
+"""
+
+import argparse
+import gzip
+import io
+import json
+import logging
+import os
+import sys
+try:
+    from lambda_function import resolve_event
+    from operations import plan_operation
+    from coalescer import CreateTagsCoalescer, MAX_RESOURCES_PER_CALL
+    from tag_grouper import owner_tokens
+    from client_pool import get_client
+    from account_credentials import get_account_client
+    from rate_limiter import RATE_LIMITER, parse_rate_limits
+    from retry import RetryPolicy, call_with_retry, classify_error, THROTTLE, TRANSIENT, NOT_FOUND
+    from tag_serializer import serialize_ec2_tags
+    from metrics import METRICS
+except ImportError:
+    from src.lambda_function import resolve_event
+    from src.operations import plan_operation
+    from src.coalescer import CreateTagsCoalescer, MAX_RESOURCES_PER_CALL
+    from src.tag_grouper import owner_tokens
+    from src.client_pool import get_client
+    from src.account_credentials import get_account_client
+    from src.rate_limiter import RATE_LIMITER, parse_rate_limits
+    from src.retry import RetryPolicy, call_with_retry, classify_error, THROTTLE, TRANSIENT, NOT_FOUND
+    from src.tag_serializer import serialize_ec2_tags
+    from src.metrics import METRICS
+
+logger = logging.getLogger(__name__)
+
+CHUNK_SIZE = 64 * 1024
+
+# Old resources may be gone; NotFound is final here, not eventual consistency
+BACKFILL_RETRY = RetryPolicy(retryable=(THROTTLE, TRANSIENT))
+
+
+class LocalDirectorySource:
+    """Stand-in for the trail bucket: every *.json.gz below a local directory."""
+
+    def __init__(self, root):
+        self.root = root
+
+    def keys(self):
+        for dirpath, _, filenames in sorted(os.walk(self.root)):
+            for name in sorted(filenames):
+                if name.endswith(".json.gz"):
+                    yield os.path.relpath(os.path.join(dirpath, name), self.root).replace(os.sep, "/")
+
+    def open(self, key):
+        return open(os.path.join(self.root, key), "rb")
+
+
+class S3Source:
+    """CloudTrail log objects under a prefix of the trail bucket."""
+
+    def __init__(self, bucket, prefix="", region=None):
+        self.bucket = bucket
+        self.prefix = prefix
+        self.s3 = get_client("s3", region)
+
+    def keys(self):
+        paginator = self.s3.get_paginator("list_objects_v2")
+        for page in paginator.paginate(Bucket=self.bucket, Prefix=self.prefix):
+            for obj in page.get("Contents", []):
+                if obj["Key"].endswith(".json.gz"):
+                    yield obj["Key"]
+
+    def open(self, key):
+        return self.s3.get_object(Bucket=self.bucket, Key=key)["Body"]
+
+
+class Checkpoint:
+    """Set of finished log keys, persisted to a JSON file after every key."""
+
+    def __init__(self, path=None):
+        self.path = path
+        self.completed = set()
+        if path and os.path.exists(path):
+            with open(path) as f:
+                self.completed = set(json.load(f).get("completed", []))
+
+    def __contains__(self, key):
+        return key in self.completed
+
+    def mark(self, key):
+        self.completed.add(key)
+        if not self.path:
+            return
+        tmp = f"{self.path}.tmp"
+        with open(tmp, "w") as f:
+            json.dump({"completed": sorted(self.completed)}, f)
+        os.replace(tmp, self.path)
+
+
+def iter_records(stream, chunk_size=CHUNK_SIZE):
+    """Yield each object of the top-level "Records" array of a CloudTrail log file.
+
+    Args:
+        stream: A text stream positioned at the start of the JSON document.
+        chunk_size: Characters read per refill. Memory use is bounded by the
+            largest single record plus one chunk.
+    """
+    decoder = json.JSONDecoder()
+    buf, pos, eof = "", 0, False
+
+    def refill():
+        nonlocal buf, pos, eof
+        chunk = stream.read(chunk_size)
+        eof = not chunk
+        buf, pos = buf[pos:] + chunk, 0
+
+    while True:
+        start = buf.find('"Records"')
+        bracket = buf.find("[", start) if start >= 0 else -1
+        if bracket >= 0:
+            pos = bracket + 1
+            break
+        if eof:
+            return
+        refill()
+
+    while True:
+        while True:
+            while pos < len(buf) and buf[pos] in " \t\r\n,":
+                pos += 1
+            if pos < len(buf) or eof:
+                break
+            refill()
+        if pos >= len(buf) or buf[pos] == "]":
+            return
+        try:
+            record, end = decoder.raw_decode(buf, pos)
+        except json.JSONDecodeError:
+            if eof:
+                raise
+            refill()
+            continue
+        pos = end
+        yield record
+
+
+def open_log(fileobj):
+    """Wrap a gzipped binary stream as decoded text."""
+    return io.TextIOWrapper(gzip.GzipFile(fileobj=fileobj), encoding="utf-8")
+
+
+def tag_existing(region, resource_ids, tags, account=None) -> int:
+    """Tag EC2 resources that still exist. Returns how many were skipped as deleted.
+
+    A NotFound error fails the whole CreateTags call, so the chunk is split
+    in half until the missing IDs are isolated.
+    """
+    from botocore.exceptions import ClientError
+
+    try:
+        ec2 = get_account_client("ec2", region, account)
+        call_with_retry(lambda: ec2.create_tags(Resources=resource_ids, Tags=serialize_ec2_tags(tags)),
+                        BACKFILL_RETRY)
+        return 0
+    except ClientError as e:
+        if classify_error(e) != NOT_FOUND:
+            raise
+        if len(resource_ids) == 1:
+            logger.info("Skipping deleted resource %s", resource_ids[0])
+            return 1
+    mid = len(resource_ids) // 2
+    return (tag_existing(region, resource_ids[:mid], tags, account)
+            + tag_existing(region, resource_ids[mid:], tags, account))
+
+
+def tag_planned(handler, operation) -> int:
+    """Tag one non-EC2 planned operation. Returns how many of its resources were skipped as deleted.
+
+    The handler's raw executor runs without its live error handling, so a
+    NotFound is final here and is never deferred.
+    """
+    from botocore.exceptions import ClientError
+
+    try:
+        call_with_retry(lambda: handler.execute_raw(operation), BACKFILL_RETRY)
+        return 0
+    except ClientError as e:
+        if classify_error(e) != NOT_FOUND:
+            raise
+    logger.info("Skipping deleted resource %s", ", ".join(operation.resource_ids))
+    return len(operation.resource_ids)
+
+
+class Backfill:
+    """Streams log files from a source and tags the resources their events created.
+
+    Args:
+        source: LocalDirectorySource or S3Source.
+        checkpoint: Finished log files; they are skipped.
+        plan_output: When given, a text stream to write each planned
+            operation to as a JSON line, instead of tagging anything.
+
+    In stats, tagged, deleted and planned count resources, for every
+    service; events and failed count events.
+    """
+
+    def __init__(self, source, checkpoint: Checkpoint = None, plan_output=None):
+        self.source = source
+        self.checkpoint = checkpoint or Checkpoint()
+        self.plan_output = plan_output
+        self.coalescer = CreateTagsCoalescer()
+        self.stats = {"files": 0, "files_skipped": 0, "records": 0, "events": 0, "tagged": 0,
+                      "deleted": 0, "failed": 0, "planned": 0}
+
+    def flush_ec2(self):
+        for region, account, resource_ids, tags, owners in self.coalescer.chunks():
+            try:
+                deleted = tag_existing(region, resource_ids, tags, account)
+                self.stats["deleted"] += deleted
+                self.stats["tagged"] += len(resource_ids) - deleted
+            except Exception as e:
+                logger.error("CreateTags failed for %d resources in %s: %s", len(resource_ids), region, str(e))
+                self.stats["failed"] += len(owner_tokens(owners))
+        self.coalescer = CreateTagsCoalescer()
+
+    def process_record(self, record, token):
+        if not isinstance(record, dict) or record.get("errorCode"):
+            return
+        # resolve_event does not log, so replaying an archive logs no line per record
+        key, handler, tags = resolve_event(record)
+        if handler is None:
+            return
+        self.stats["events"] += 1
+        operation = plan_operation(key, record, tags)
+        if operation is None:
+            return
+        if self.plan_output is not None:
+            self.plan_output.write(json.dumps(operation.describe()) + "\n")
+            self.stats["planned"] += len(operation.resource_ids)
+        elif operation.service == "ec2":
+            self.coalescer.add(token, operation.region, operation.resource_ids, operation.tags, operation.account)
+            if len(self.coalescer) >= MAX_RESOURCES_PER_CALL:
+                self.flush_ec2()
+        else:
+            try:
+                deleted = tag_planned(handler, operation)
+                self.stats["deleted"] += deleted
+                self.stats["tagged"] += len(operation.resource_ids) - deleted
+            except Exception as e:
+                logger.error("%s failed for %s: %s", operation.api, ", ".join(operation.resource_ids), str(e))
+                self.stats["failed"] += 1
+
+    def run(self) -> dict:
+        for key in self.source.keys():
+            if key in self.checkpoint:
+                self.stats["files_skipped"] += 1
+                continue
+            logger.info("Backfilling %s", key)
+            failed_before = self.stats["failed"]
+            with self.source.open(key) as raw:
+                for n, record in enumerate(iter_records(open_log(raw))):
+                    self.stats["records"] += 1
+                    self.process_record(record, (key, n))
+            self.flush_ec2()
+            METRICS.flush()
+            if self.stats["failed"] > failed_before:
+                logger.warning("Not checkpointing %s: %d failed", key, self.stats["failed"] - failed_before)
+            elif self.plan_output is None:
+                self.checkpoint.mark(key)
+            self.stats["files"] += 1
+        return self.stats
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Backfill AutoTag tags from CloudTrail log archives.")
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument("--bucket", help="CloudTrail log bucket")
+    source.add_argument("--local-dir", help="local directory of .json.gz files standing in for the bucket")
+    parser.add_argument("--prefix", default="", help="key prefix inside the bucket")
+    parser.add_argument("--region", default=None, help="region of the bucket")
+    parser.add_argument("--checkpoint", default=None, help="JSON file recording finished log files")
+    parser.add_argument("--rate-limits", default="", help='per-API rates, e.g. "ec2:CreateTags=2,rds:*=1"')
+    parser.add_argument("--dry-run", action="store_true",
+                        help="print the planned tagging operations as JSON lines instead of tagging")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
+    RATE_LIMITER.rates.update(parse_rate_limits(args.rate_limits))
+    src = LocalDirectorySource(args.local_dir) if args.local_dir else S3Source(args.bucket, args.prefix, args.region)
+    stats = Backfill(src, Checkpoint(args.checkpoint), sys.stdout if args.dry_run else None).run()
+    # Keep stdout to the plan alone in a dry run
+    print(json.dumps(stats, indent=2), file=sys.stderr if args.dry_run else sys.stdout)
+    return 0 if not stats["failed"] else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
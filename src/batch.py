@@ -0,0 +1,67 @@
+"""Decoding of SQS, Kinesis and EventBridge Pipes record batches.
+
+Each record is turned back into the EventBridge event it carries, paired
+with the identifier Lambda expects in a ``batchItemFailures`` response.
+"""
+
+import base64
+import json
+
+
+def _decode_payload(raw):
+    """Parse a JSON payload into an EventBridge-shaped event, or None."""
+    if isinstance(raw, (str, bytes)):
+        try:
+            raw = json.loads(raw)
+        except ValueError:
+            return None
+    if not isinstance(raw, dict):
+        return None
+    if "detail" in raw:
+        return raw
+    # Bare CloudTrail records (e.g. replayed from the trail bucket) carry no envelope
+    if "eventSource" in raw and "eventName" in raw:
+        return {"detail": raw}
+    return None
+
+
+def _decode_kinesis_data(data):
+    try:
+        return _decode_payload(base64.b64decode(data))
+    except (ValueError, TypeError):
+        return None
+
+
+def _decode_record(record):
+    """Return (item_identifier, event or None) for one batch record."""
+    if not isinstance(record, dict):
+        return None, None
+    if "kinesis" in record:
+        kinesis = record["kinesis"] or {}
+        return kinesis.get("sequenceNumber"), _decode_kinesis_data(kinesis.get("data"))
+    if "body" in record:
+        return record.get("messageId"), _decode_payload(record["body"])
+    if record.get("eventSource") == "aws:kinesis" and "data" in record:
+        # Pipes flattens Kinesis records instead of nesting them under "kinesis"
+        return record.get("sequenceNumber"), _decode_kinesis_data(record["data"])
+    if "detail" in record:
+        return record.get("id"), record
+    return record.get("messageId") or record.get("id"), None
+
+
+def iter_batch_records(event):
+    """Yield (item_identifier, eventbridge_event) for every record in a batch.
+
+    Accepts the SQS and Kinesis event source mapping shapes
+    (``{"Records": [...]}``) and the bare list that EventBridge Pipes
+    delivers. The event is None when a record cannot be decoded, so the
+    caller can report it as a failure.
+    """
+    records = event.get("Records", []) if isinstance(event, dict) else event
+    for record in records or []:
+        yield _decode_record(record)
+
+
+def batch_response(failed_ids) -> dict:
+    """Build the partial-batch response that tells Lambda which records to redeliver."""
+    return {"batchItemFailures": [{"itemIdentifier": item_id} for item_id in failed_ids]}
@@ -0,0 +1,111 @@
+"""Bulk tagging of ARN-addressable resources via the Resource Groups Tagging API.
+
+TagResources accepts up to 20 ARNs per request across services, so a batch
+of RDS, DynamoDB, SNS, ... events shares one rate-limit domain and needs far
+fewer round trips than one service-specific call per resource. Resources
+the bulk path cannot tag are handed back to the caller so it can fall back
+to the per-service handlers.
+"""
+
+import logging
+try:
+    from account_credentials import get_account_client
+    from tag_serializer import serialize_tag_map
+    from tag_grouper import TagGrouper
+    from retry import call_with_retry
+    from metrics import METRICS
+    from tracing import span
+    from resource_extractors import ID_KINDS, ARN
+except ImportError:
+    from src.account_credentials import get_account_client
+    from src.tag_serializer import serialize_tag_map
+    from src.tag_grouper import TagGrouper
+    from src.retry import call_with_retry
+    from src.metrics import METRICS
+    from src.tracing import span
+    from src.resource_extractors import ID_KINDS, ARN
+
+logger = logging.getLogger(__name__)
+
+MAX_ARNS_PER_CALL = 20
+
+# Events whose extractor yields ARNs that TagResources accepts
+BULK_TAGGABLE_EVENTS = frozenset(key for key, kind in ID_KINDS.items() if kind == ARN)
+
+
+class BulkArnTagger(TagGrouper):
+    """Collects ARNs from many events and tags them with TagResources.
+
+    flush() returns (failed_tokens, fallback_tokens). Failed tokens had a
+    resource the service could not tag (5xx or an unexpected error) and
+    should be retried later. Fallback tokens had a resource the bulk path
+    was not allowed or able to tag and should go through their per-service
+    handler instead.
+
+    Usage:
+        tagger = BulkArnTagger()
+        tagger.add(token, region, [arn], tags, account_id)
+        failed_tokens, fallback_tokens = tagger.flush()
+    """
+
+    service = "tag"
+
+    def __init__(self, max_per_call: int = MAX_ARNS_PER_CALL):
+        super().__init__(max_per_call)
+
+    def send(self, region, account, arns, tags, owners):
+        """Make one TagResources call and return (failed_tokens, fallback_tokens)."""
+        failed_arns, fallback_arns = send_tag_resources(region, arns, tags, account)
+        failed = {token for arn in failed_arns for token in owners[arn]}
+        fallback = {token for arn in fallback_arns for token in owners[arn]}
+        return failed, fallback - failed
+
+
+def send_tag_resources(region, arns, tags, account=None):
+    """Make one TagResources call and classify each ARN's outcome.
+
+    Returns:
+        (failed_arns, fallback_arns). ARNs in neither set were tagged.
+    """
+    from botocore.exceptions import ClientError
+    try:
+        from error_handler import PERMISSIONS_ERROR_CODES
+    except ImportError:
+        from src.error_handler import PERMISSIONS_ERROR_CODES
+
+    try:
+        with span("bulk:TagResources", resources=len(arns)):
+            client = get_account_client("resourcegroupstaggingapi", region, account)
+            payload = serialize_tag_map(tags)
+            response = call_with_retry(lambda: client.tag_resources(ResourceARNList=arns, Tags=payload))
+    except ClientError as e:
+        error_code = e.response.get("Error", {}).get("Code", "")
+        if error_code in PERMISSIONS_ERROR_CODES:
+            logger.warning(
+                "Bulk tagging not allowed in %s (%s); falling back to per-service tagging for %d resources",
+                region, error_code, len(arns),
+            )
+            return set(), set(arns)
+        METRICS.add("TaggingErrors", 1, EventName="TagResources", ErrorCode=error_code)
+        logger.error(
+            "TagResources failed for %d resources in %s: code=%s, message=%s",
+            len(arns), region, error_code, e.response.get("Error", {}).get("Message", ""),
+        )
+        return set(arns), set()
+    except Exception as e:
+        METRICS.add("TaggingErrors", 1, EventName="TagResources", ErrorCode=type(e).__name__)
+        logger.error("Unexpected error in TagResources for %d resources in %s: %s",
+                     len(arns), region, str(e), exc_info=True)
+        return set(arns), set()
+
+    failed, fallback = set(), set()
+    for arn, info in (response.get("FailedResourcesMap") or {}).items():
+        status = info.get("StatusCode", 500)
+        logger.warning(
+            "TagResources could not tag %s: status=%s, code=%s, message=%s",
+            arn, status, info.get("ErrorCode", ""), info.get("ErrorMessage", ""),
+        )
+        (failed if status >= 500 else fallback).add(arn)
+    logger.info("Bulk tagged %d resources in %s with one TagResources call",
+                len(arns) - len(failed) - len(fallback), region)
+    return failed, fallback
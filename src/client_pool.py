@@ -0,0 +1,136 @@
+"""Container-scoped pool of boto3 clients shared by every handler.
+
+Building a client loads the service model and opens a fresh TLS connection,
+which costs more than most tagging calls. Clients are therefore created once
+per (service, region, credentials) and reused for the life of the Lambda
+container. Every call a pooled client makes passes through the shared
+rate limiter first, is counted and timed in METRICS, and adds spans to the
+invocation's timing tree (see tracing.py).
+"""
+
+import os
+import threading
+try:
+    from rate_limiter import RATE_LIMITER
+    from metrics import METRICS
+    from retry import THROTTLE_ERROR_CODES
+    from tracing import span, register_client_hooks
+except ImportError:
+    from src.rate_limiter import RATE_LIMITER
+    from src.metrics import METRICS
+    from src.retry import THROTTLE_ERROR_CODES
+    from src.tracing import span, register_client_hooks
+
+MAX_POOL_CONNECTIONS = int(os.environ.get("CLIENT_MAX_POOL_CONNECTIONS", "32"))
+CONNECT_TIMEOUT = float(os.environ.get("CLIENT_CONNECT_TIMEOUT", "5"))
+READ_TIMEOUT = float(os.environ.get("CLIENT_READ_TIMEOUT", "15"))
+
+_lock = threading.Lock()
+_clients = {}
+# key -> lock held while that key's client is built, so a cold start builds
+# different (service, region) clients in parallel and each one only once
+_build_locks = {}
+_session_lock = threading.Lock()
+_stats = {"hits": 0, "misses": 0}
+_session = None
+_config = None
+
+
+def _credentials_key(credentials):
+    """Reduce a credentials dict to the part that identifies it."""
+    if not credentials:
+        return None
+    return (credentials.get("aws_access_key_id"), credentials.get("aws_session_token"))
+
+
+def _create_client(service, region, credentials):
+    """Build a new client. Called with the key's build lock held, not _lock."""
+    global _session, _config
+    with _session_lock:
+        if _session is None:
+            import boto3
+            from botocore.config import Config
+
+            _config = Config(
+                max_pool_connections=MAX_POOL_CONNECTIONS,
+                connect_timeout=CONNECT_TIMEOUT,
+                read_timeout=READ_TIMEOUT,
+                tcp_keepalive=True,
+                # Retries are owned by retry.py, which knows the invocation deadline
+                retries={"mode": "standard", "total_max_attempts": 1},
+            )
+            _session = boto3.session.Session()
+    client = _session.client(service, region_name=region, config=_config, **(credentials or {}))
+    client.meta.events.register("before-call.*.*", RATE_LIMITER.hook(service, region or client.meta.region_name))
+    if METRICS.enabled:
+        before_call, after_call = METRICS.api_call_hooks(service, THROTTLE_ERROR_CODES)
+        client.meta.events.register("before-call.*.*", before_call)
+        client.meta.events.register("after-call.*.*", after_call)
+    register_client_hooks(client, service)
+    return client
+
+
+def get_client(service: str, region: str = None, credentials: dict = None):
+    """Return a cached client for the given service, region and credentials.
+
+    Args:
+        service: The boto3 service name, e.g. "ec2".
+        region: The AWS region, or None for the session default.
+        credentials: Optional dict of aws_access_key_id, aws_secret_access_key
+            and aws_session_token. None uses the default credential chain.
+
+    Returns:
+        A boto3 client. The same object is returned for the same key for the
+        life of the container.
+    """
+    key = (service, region or None, _credentials_key(credentials))
+    with _lock:
+        client = _clients.get(key)
+        if client is not None:
+            _stats["hits"] += 1
+            return client
+        build_lock = _build_locks.setdefault(key, threading.Lock())
+    with build_lock:
+        # Another thread may have built it while this one waited
+        with _lock:
+            client = _clients.get(key)
+            if client is not None:
+                _stats["hits"] += 1
+                return client
+            _stats["misses"] += 1
+        with span(f"client:{service}@{region or 'default'}"):
+            client = _create_client(service, region or None, credentials)
+        with _lock:
+            _clients[key] = client
+            _build_locks.pop(key, None)
+        return client
+
+
+def pool_stats() -> dict:
+    """Return a snapshot of the cache hit/miss counters and pool size."""
+    with _lock:
+        return {**_stats, "size": len(_clients)}
+
+
+def discard_clients(credentials: dict) -> int:
+    """Drop every cached client built with credentials, e.g. after they rotate.
+
+    Returns:
+        The number of clients removed.
+    """
+    cred_key = _credentials_key(credentials)
+    if cred_key is None:
+        return 0
+    with _lock:
+        stale = [key for key in _clients if key[2] == cred_key]
+        for key in stale:
+            del _clients[key]
+        return len(stale)
+
+
+def clear_clients():
+    """Drop every cached client and reset the counters."""
+    with _lock:
+        _clients.clear()
+        _stats["hits"] = 0
+        _stats["misses"] = 0
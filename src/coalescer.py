@@ -0,0 +1,96 @@
+"""Cross-event coalescing of EC2 CreateTags calls.
+
+CreateTags accepts up to 1000 resource IDs per request. When several events
+are processed together, their resource IDs are grouped by region and by
+identical tag set and sent in as few calls as possible. Each call's outcome
+is mapped back to the events whose resources it carried.
+"""
+
+import logging
+try:
+    from tag_serializer import serialize_ec2_tags
+    from account_credentials import get_account_client
+    from tag_grouper import TagGrouper, owner_tokens
+    from retry import call_with_retry, classify_error, NOT_FOUND
+    from metrics import METRICS
+    from tracing import span
+except ImportError:
+    from src.tag_serializer import serialize_ec2_tags
+    from src.account_credentials import get_account_client
+    from src.tag_grouper import TagGrouper, owner_tokens
+    from src.retry import call_with_retry, classify_error, NOT_FOUND
+    from src.metrics import METRICS
+    from src.tracing import span
+
+logger = logging.getLogger(__name__)
+
+MAX_RESOURCES_PER_CALL = 1000
+
+
+class CreateTagsCoalescer(TagGrouper):
+    """Collects EC2 resource IDs from many events and tags them in bulk.
+
+    Usage:
+        coalescer = CreateTagsCoalescer()
+        coalescer.add(token, region, ["i-1", "vol-1"], tags, account_id)
+        failed_tokens = coalescer.flush()
+    """
+
+    service = "ec2"
+
+    def __init__(self, max_per_call: int = MAX_RESOURCES_PER_CALL):
+        super().__init__(max_per_call)
+
+    def send(self, region, account, resource_ids, tags, owners):
+        """Make one CreateTags call and return (failed_tokens, fallback_tokens).
+
+        A NotFound error fails the whole call even if only one resource has
+        not propagated yet, so its tokens fall back to their per-event
+        handlers, which tag each event's resources on their own and defer
+        those still missing.
+        """
+        error = send_create_tags(region, resource_ids, tags, account)
+        if error is None:
+            return set(), set()
+        tokens = owner_tokens(owners)
+        return (set(), tokens) if error == NOT_FOUND else (tokens, set())
+
+    def flush(self) -> set:
+        """Send every queued CreateTags call and clear the queue.
+
+        Returns:
+            The set of tokens whose resources were in at least one failed call.
+        """
+        failed, not_found = super().flush()
+        return failed | not_found
+
+
+def send_create_tags(region, resource_ids, tags, account=None):
+    """Make one CreateTags call.
+
+    Returns:
+        None on success, else the failure's retry.classify_error class (after logging).
+    """
+    from botocore.exceptions import ClientError
+
+    try:
+        with span("coalesced:CreateTags", resources=len(resource_ids)):
+            ec2 = get_account_client("ec2", region, account)
+            call_with_retry(lambda: ec2.create_tags(Resources=resource_ids, Tags=serialize_ec2_tags(tags)))
+    except ClientError as e:
+        error_code = e.response.get("Error", {}).get("Code", "")
+        METRICS.add("TaggingErrors", 1, EventName="CreateTags", ErrorCode=error_code)
+        logger.error(
+            "Coalesced CreateTags failed for %d resources in %s: code=%s, message=%s",
+            len(resource_ids), region, error_code, e.response.get("Error", {}).get("Message", ""),
+        )
+        return classify_error(e)
+    except Exception as e:
+        METRICS.add("TaggingErrors", 1, EventName="CreateTags", ErrorCode=type(e).__name__)
+        logger.error(
+            "Unexpected error in coalesced CreateTags for %d resources in %s: %s",
+            len(resource_ids), region, str(e), exc_info=True,
+        )
+        return classify_error(e)
+    logger.info("Tagged %d EC2 resources in %s with one CreateTags call", len(resource_ids), region)
+    return None
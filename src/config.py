@@ -1,68 +1,83 @@
-"""Service handler configuration mapping CloudTrail events to handler functions."""
+"""Service handler configuration mapping CloudTrail events to handler functions.
 
-try:
-    from handlers.ec2 import (
-        handle_ec2_run_instances, handle_ec2_create_security_group,
-        handle_ec2_create_image, handle_ec2_create_volume,
-        handle_ec2_create_snapshot, handle_ec2_allocate_address,
-        handle_ec2_create_network_interface, handle_ec2_create_vpc,
-        handle_ec2_create_subnet, handle_ec2_create_internet_gateway,
-        handle_ec2_create_nat_gateway,
-    )
-    from handlers.s3 import handle_s3_create_bucket
-    from handlers.rds import handle_rds_create_db_instance, handle_rds_create_db_cluster
-    from handlers.other_services import (
-        handle_dynamodb_create_table, handle_lambda_create_function,
-        handle_elb_create_load_balancer, handle_elb_create_target_group,
-        handle_efs_create_file_system, handle_sns_create_topic,
-        handle_sqs_create_queue, handle_secretsmanager_create_secret,
-        handle_opensearch_create_domain, handle_ecs_create_cluster,
-        handle_stepfunctions_create_state_machine,
-    )
-except ImportError:
-    from src.handlers.ec2 import (
-        handle_ec2_run_instances, handle_ec2_create_security_group,
-        handle_ec2_create_image, handle_ec2_create_volume,
-        handle_ec2_create_snapshot, handle_ec2_allocate_address,
-        handle_ec2_create_network_interface, handle_ec2_create_vpc,
-        handle_ec2_create_subnet, handle_ec2_create_internet_gateway,
-        handle_ec2_create_nat_gateway,
-    )
-    from src.handlers.s3 import handle_s3_create_bucket
-    from src.handlers.rds import handle_rds_create_db_instance, handle_rds_create_db_cluster
-    from src.handlers.other_services import (
-        handle_dynamodb_create_table, handle_lambda_create_function,
-        handle_elb_create_load_balancer, handle_elb_create_target_group,
-        handle_efs_create_file_system, handle_sns_create_topic,
-        handle_sqs_create_queue, handle_secretsmanager_create_secret,
-        handle_opensearch_create_domain, handle_ecs_create_cluster,
-        handle_stepfunctions_create_state_machine,
-    )
+Handlers are registered by module path and imported on first use, so a cold
+start only pays for the handler module (and boto3) that the event needs.
+"""
 
-SERVICE_HANDLERS = {
-    ("ec2.amazonaws.com", "RunInstances"): handle_ec2_run_instances,
-    ("ec2.amazonaws.com", "CreateSecurityGroup"): handle_ec2_create_security_group,
-    ("ec2.amazonaws.com", "CreateImage"): handle_ec2_create_image,
-    ("ec2.amazonaws.com", "CreateVolume"): handle_ec2_create_volume,
-    ("ec2.amazonaws.com", "CreateSnapshot"): handle_ec2_create_snapshot,
-    ("ec2.amazonaws.com", "AllocateAddress"): handle_ec2_allocate_address,
-    ("ec2.amazonaws.com", "CreateNetworkInterface"): handle_ec2_create_network_interface,
-    ("ec2.amazonaws.com", "CreateVpc"): handle_ec2_create_vpc,
-    ("ec2.amazonaws.com", "CreateSubnet"): handle_ec2_create_subnet,
-    ("ec2.amazonaws.com", "CreateInternetGateway"): handle_ec2_create_internet_gateway,
-    ("ec2.amazonaws.com", "CreateNatGateway"): handle_ec2_create_nat_gateway,
-    ("s3.amazonaws.com", "CreateBucket"): handle_s3_create_bucket,
-    ("rds.amazonaws.com", "CreateDBInstance"): handle_rds_create_db_instance,
-    ("rds.amazonaws.com", "CreateDBCluster"): handle_rds_create_db_cluster,
-    ("dynamodb.amazonaws.com", "CreateTable"): handle_dynamodb_create_table,
-    ("lambda.amazonaws.com", "CreateFunction20150331"): handle_lambda_create_function,
-    ("elasticloadbalancing.amazonaws.com", "CreateLoadBalancer"): handle_elb_create_load_balancer,
-    ("elasticloadbalancing.amazonaws.com", "CreateTargetGroup"): handle_elb_create_target_group,
-    ("elasticfilesystem.amazonaws.com", "CreateFileSystem"): handle_efs_create_file_system,
-    ("sns.amazonaws.com", "CreateTopic"): handle_sns_create_topic,
-    ("sqs.amazonaws.com", "CreateQueue"): handle_sqs_create_queue,
-    ("secretsmanager.amazonaws.com", "CreateSecret"): handle_secretsmanager_create_secret,
-    ("es.amazonaws.com", "CreateDomain"): handle_opensearch_create_domain,
-    ("ecs.amazonaws.com", "CreateCluster"): handle_ecs_create_cluster,
-    ("states.amazonaws.com", "CreateStateMachine"): handle_stepfunctions_create_state_machine,
+import importlib
+from collections.abc import Mapping
+
+HANDLER_PATHS = {
+    ("ec2.amazonaws.com", "RunInstances"): "handlers.ec2:handle_ec2_run_instances",
+    ("ec2.amazonaws.com", "CreateSecurityGroup"): "handlers.ec2:handle_ec2_create_security_group",
+    ("ec2.amazonaws.com", "CreateImage"): "handlers.ec2:handle_ec2_create_image",
+    ("ec2.amazonaws.com", "CreateVolume"): "handlers.ec2:handle_ec2_create_volume",
+    ("ec2.amazonaws.com", "CreateSnapshot"): "handlers.ec2:handle_ec2_create_snapshot",
+    ("ec2.amazonaws.com", "AllocateAddress"): "handlers.ec2:handle_ec2_allocate_address",
+    ("ec2.amazonaws.com", "CreateNetworkInterface"): "handlers.ec2:handle_ec2_create_network_interface",
+    ("ec2.amazonaws.com", "CreateVpc"): "handlers.ec2:handle_ec2_create_vpc",
+    ("ec2.amazonaws.com", "CreateSubnet"): "handlers.ec2:handle_ec2_create_subnet",
+    ("ec2.amazonaws.com", "CreateInternetGateway"): "handlers.ec2:handle_ec2_create_internet_gateway",
+    ("ec2.amazonaws.com", "CreateNatGateway"): "handlers.ec2:handle_ec2_create_nat_gateway",
+    ("s3.amazonaws.com", "CreateBucket"): "handlers.s3:handle_s3_create_bucket",
+    ("rds.amazonaws.com", "CreateDBInstance"): "handlers.rds:handle_rds_create_db_instance",
+    ("rds.amazonaws.com", "CreateDBCluster"): "handlers.rds:handle_rds_create_db_cluster",
+    ("dynamodb.amazonaws.com", "CreateTable"): "handlers.other_services:handle_dynamodb_create_table",
+    ("lambda.amazonaws.com", "CreateFunction20150331"): "handlers.other_services:handle_lambda_create_function",
+    ("elasticloadbalancing.amazonaws.com", "CreateLoadBalancer"):
+        "handlers.other_services:handle_elb_create_load_balancer",
+    ("elasticloadbalancing.amazonaws.com", "CreateTargetGroup"):
+        "handlers.other_services:handle_elb_create_target_group",
+    ("elasticfilesystem.amazonaws.com", "CreateFileSystem"): "handlers.other_services:handle_efs_create_file_system",
+    ("sns.amazonaws.com", "CreateTopic"): "handlers.other_services:handle_sns_create_topic",
+    ("sqs.amazonaws.com", "CreateQueue"): "handlers.other_services:handle_sqs_create_queue",
+    ("secretsmanager.amazonaws.com", "CreateSecret"):
+        "handlers.other_services:handle_secretsmanager_create_secret",
+    ("es.amazonaws.com", "CreateDomain"): "handlers.other_services:handle_opensearch_create_domain",
+    ("ecs.amazonaws.com", "CreateCluster"): "handlers.other_services:handle_ecs_create_cluster",
+    ("states.amazonaws.com", "CreateStateMachine"):
+        "handlers.other_services:handle_stepfunctions_create_state_machine",
 }
+
+
+def _import_handler(path):
+    """Import "module:function" from the Lambda root, or from src/ when run from the repo."""
+    module_name, _, func_name = path.partition(":")
+    try:
+        module = importlib.import_module(module_name)
+    except ModuleNotFoundError as e:
+        if e.name not in ("handlers", module_name):
+            raise
+        module = importlib.import_module(f"src.{module_name}")
+    return getattr(module, func_name)
+
+
+class LazyHandlerRegistry(Mapping):
+    """Read-only mapping of (eventSource, eventName) -> handler, resolved on first lookup."""
+
+    def __init__(self, paths):
+        self._paths = dict(paths)
+        self._resolved = {}
+
+    def __getitem__(self, key):
+        handler = self._resolved.get(key)
+        if handler is None:
+            handler = _import_handler(self._paths[key])
+            self._resolved[key] = handler
+        return handler
+
+    def __iter__(self):
+        return iter(self._paths)
+
+    def __len__(self):
+        return len(self._paths)
+
+    def __contains__(self, key):
+        return key in self._paths
+
+    def path(self, key):
+        """Return the registered "module:function" path for a key."""
+        return self._paths[key]
+
+
+SERVICE_HANDLERS = LazyHandlerRegistry(HANDLER_PATHS)
@@ -0,0 +1,329 @@
+"""Long-running SQS consumer, an alternative to per-event Lambda for ECS/Fargate.
+
+A fixed number of asyncio workers each long-poll the queue and hand every
+received batch to batch_handler, the same pipeline the SQS event source
+mapping drives. It covers decoding, idempotency, EC2 coalescing, bulk
+tagging and the dispatcher. boto3 calls block, so receives, deletes and
+batch_handler itself run in threads.
+
+- Messages that were tagged are removed with DeleteMessageBatch.
+- Failed messages are left to reappear when their visibility timeout ends.
+- While a batch is still running, its messages' visibility is extended
+  every half timeout so a slow batch is not redelivered mid-flight.
+- SIGTERM (and SIGINT) stop the workers from receiving; batches already
+  received are finished and deleted before the process exits.
+
+Without a DELAY_QUEUE_URL, delayed NotFound retries (see delayed_retry)
+are sent back to the polled queue itself with a per-message delay.
+
+InMemoryQueue implements the same MessageQueue interface for tests and
+local runs.
+
+Usage:
+    python consumer.py --queue-url https://sqs.us-east-1.amazonaws.com/123456789012/autotag-events
+"""
+
+import argparse
+import asyncio
+import itertools
+import logging
+import os
+import signal
+import sys
+import threading
+import time
+from abc import ABC, abstractmethod
+from concurrent.futures import ThreadPoolExecutor
+try:
+    from client_pool import get_client, READ_TIMEOUT
+    from delayed_retry import delay_queue, set_delay_queue, clamp_delay
+    from lambda_function import batch_handler
+except ImportError:
+    from src.client_pool import get_client, READ_TIMEOUT
+    from src.delayed_retry import delay_queue, set_delay_queue, clamp_delay
+    from src.lambda_function import batch_handler
+
+logger = logging.getLogger(__name__)
+
+CONSUMER_QUEUE_URL = os.environ.get("CONSUMER_QUEUE_URL", "")
+CONSUMER_WORKERS = int(os.environ.get("CONSUMER_WORKERS", "4"))
+# Long polls must return before the pooled clients' read timeout
+MAX_WAIT_SECONDS = min(20, max(0, int(READ_TIMEOUT) - 1))
+CONSUMER_WAIT_SECONDS = min(int(os.environ.get("CONSUMER_WAIT_SECONDS", "10")), MAX_WAIT_SECONDS)
+CONSUMER_VISIBILITY_TIMEOUT = int(os.environ.get("CONSUMER_VISIBILITY_TIMEOUT", "120"))
+# Deadline given to batch_handler for one batch; retries and dispatch stop short of it
+CONSUMER_BATCH_BUDGET_SECONDS = float(os.environ.get("CONSUMER_BATCH_BUDGET_SECONDS", "300"))
+MAX_MESSAGES_PER_RECEIVE = 10
+MAX_ENTRIES_PER_BATCH_CALL = 10
+
+
+class MessageQueue(ABC):
+    """Interface for the queue a Consumer reads from.
+
+    Messages are dicts with MessageId, ReceiptHandle and Body, as SQS returns them.
+    """
+
+    @abstractmethod
+    def receive(self, max_messages: int, wait_seconds: int, visibility_timeout: int) -> list:
+        """Return up to max_messages messages, waiting up to wait_seconds for the first."""
+
+    @abstractmethod
+    def delete(self, receipt_handles: list):
+        """Remove processed messages."""
+
+    @abstractmethod
+    def change_visibility(self, receipt_handles: list, timeout: int):
+        """Keep in-flight messages hidden for another timeout seconds."""
+
+    @abstractmethod
+    def send(self, body: str, delay_seconds: float = 0):
+        """Enqueue body, receivable after delay_seconds."""
+
+
+def _batches(items, size=MAX_ENTRIES_PER_BATCH_CALL):
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+
+class SqsQueue(MessageQueue):
+    """An SQS queue, via the pooled client."""
+
+    def __init__(self, queue_url: str, region: str = None):
+        self.queue_url = queue_url
+        self.client = get_client("sqs", region)
+
+    def receive(self, max_messages, wait_seconds, visibility_timeout):
+        response = self.client.receive_message(
+            QueueUrl=self.queue_url, MaxNumberOfMessages=max_messages,
+            WaitTimeSeconds=wait_seconds, VisibilityTimeout=visibility_timeout,
+        )
+        return response.get("Messages", [])
+
+    def delete(self, receipt_handles):
+        for chunk in _batches(receipt_handles):
+            response = self.client.delete_message_batch(
+                QueueUrl=self.queue_url,
+                Entries=[{"Id": str(n), "ReceiptHandle": handle} for n, handle in enumerate(chunk)],
+            )
+            for failure in response.get("Failed", []):
+                logger.warning("Could not delete message: %s", failure.get("Message", failure.get("Code")))
+
+    def send(self, body, delay_seconds=0):
+        self.client.send_message(QueueUrl=self.queue_url, MessageBody=body, DelaySeconds=clamp_delay(delay_seconds))
+
+    def change_visibility(self, receipt_handles, timeout):
+        for chunk in _batches(receipt_handles):
+            self.client.change_message_visibility_batch(
+                QueueUrl=self.queue_url,
+                Entries=[{"Id": str(n), "ReceiptHandle": handle, "VisibilityTimeout": timeout}
+                         for n, handle in enumerate(chunk)],
+            )
+
+
+class InMemoryQueue(MessageQueue):
+    """Thread-safe in-process stand-in for SQS with visibility timeouts and delays.
+
+    Each receive issues a new receipt handle, so a delete or visibility change
+    with a handle from an earlier receive is ignored, as in SQS.
+    """
+
+    def __init__(self):
+        self._cond = threading.Condition()
+        self._ids = itertools.count()
+        # message_id -> {"body", "visible_at", "receipt", "receives"}
+        self._messages = {}
+        self.deleted = []
+
+    def __len__(self):
+        with self._cond:
+            return len(self._messages)
+
+    def send(self, body: str, delay_seconds: float = 0) -> str:
+        with self._cond:
+            message_id = f"m-{next(self._ids)}"
+            self._messages[message_id] = {"body": body, "visible_at": time.monotonic() + delay_seconds,
+                                          "receipt": None, "receives": 0}
+            self._cond.notify_all()
+            return message_id
+
+    def receive(self, max_messages, wait_seconds, visibility_timeout):
+        deadline = time.monotonic() + wait_seconds
+        with self._cond:
+            while True:
+                now = time.monotonic()
+                ready = [(mid, m) for mid, m in self._messages.items() if m["visible_at"] <= now][:max_messages]
+                if ready or now >= deadline:
+                    break
+                upcoming = [m["visible_at"] for m in self._messages.values() if m["visible_at"] > now]
+                self._cond.wait(min([deadline] + upcoming) - now)
+            received = []
+            for message_id, message in ready:
+                message["receives"] += 1
+                message["receipt"] = f"{message_id}#{message['receives']}"
+                message["visible_at"] = now + visibility_timeout
+                received.append({"MessageId": message_id, "ReceiptHandle": message["receipt"],
+                                 "Body": message["body"]})
+            return received
+
+    def _find(self, receipt_handle):
+        message_id = receipt_handle.split("#", 1)[0]
+        message = self._messages.get(message_id)
+        return (message_id, message) if message and message["receipt"] == receipt_handle else (None, None)
+
+    def delete(self, receipt_handles):
+        with self._cond:
+            for handle in receipt_handles:
+                message_id, message = self._find(handle)
+                if message is not None:
+                    del self._messages[message_id]
+                    self.deleted.append(message_id)
+
+    def change_visibility(self, receipt_handles, timeout):
+        with self._cond:
+            for handle in receipt_handles:
+                _, message = self._find(handle)
+                if message is not None:
+                    message["visible_at"] = time.monotonic() + timeout
+            self._cond.notify_all()
+
+
+class BatchContext:
+    """Lambda-style context giving batch_handler a fixed time budget."""
+
+    def __init__(self, budget_seconds: float):
+        self._deadline = time.monotonic() + budget_seconds
+
+    def get_remaining_time_in_millis(self):
+        return int((self._deadline - time.monotonic()) * 1000)
+
+
+class Consumer:
+    """Polls a MessageQueue with asyncio workers and tags every received batch.
+
+    Args:
+        queue: A MessageQueue.
+        workers: Concurrent receive/process loops.
+        wait_seconds: Long-poll wait per receive.
+        visibility_timeout: Seconds received messages stay hidden; extended
+            every half timeout while their batch is still running.
+        batch_budget: Deadline, in seconds, for one batch_handler call.
+        handler: The batch pipeline; batch_handler unless a test replaces it.
+    """
+
+    def __init__(self, queue, workers=CONSUMER_WORKERS, wait_seconds=CONSUMER_WAIT_SECONDS,
+                 visibility_timeout=CONSUMER_VISIBILITY_TIMEOUT, batch_budget=CONSUMER_BATCH_BUDGET_SECONDS,
+                 handler=batch_handler):
+        self.queue = queue
+        self.workers = workers
+        self.wait_seconds = wait_seconds
+        self.visibility_timeout = visibility_timeout
+        self.batch_budget = batch_budget
+        self.handler = handler
+        self.stats = {"received": 0, "deleted": 0, "failed": 0, "extended": 0}
+        self._stopping = None
+
+    def stop(self):
+        """Stop receiving; batches already received still finish."""
+        if self._stopping is not None:
+            self._stopping.set()
+
+    async def run(self, install_signal_handlers=True):
+        """Run the workers until stop() or SIGTERM, then return the stats."""
+        loop = asyncio.get_running_loop()
+        self._stopping = asyncio.Event()
+        # Each worker needs a thread for its receive/handler plus one for a visibility extension
+        loop.set_default_executor(ThreadPoolExecutor(max_workers=self.workers * 2,
+                                                     thread_name_prefix="autotag-consumer"))
+        if install_signal_handlers:
+            for signum in (signal.SIGTERM, signal.SIGINT):
+                loop.add_signal_handler(signum, self._on_signal, signum)
+        if delay_queue() is None:
+            set_delay_queue(self.queue)
+        logger.info("Consumer started with %d workers", self.workers)
+        try:
+            await asyncio.gather(*(self._worker(n) for n in range(self.workers)))
+        finally:
+            if install_signal_handlers:
+                for signum in (signal.SIGTERM, signal.SIGINT):
+                    loop.remove_signal_handler(signum)
+        logger.info("Consumer stopped: %s", self.stats)
+        return self.stats
+
+    def _on_signal(self, signum):
+        logger.info("Received %s, finishing in-flight batches", signal.Signals(signum).name)
+        self.stop()
+
+    async def _worker(self, n):
+        while not self._stopping.is_set():
+            try:
+                messages = await asyncio.to_thread(self.queue.receive, MAX_MESSAGES_PER_RECEIVE,
+                                                   self.wait_seconds, self.visibility_timeout)
+            except Exception as e:
+                logger.error("Worker %d could not receive messages: %s", n, str(e))
+                await self._pause(1.0)
+                continue
+            if messages:
+                await self.process(messages)
+
+    async def _pause(self, seconds):
+        try:
+            await asyncio.wait_for(self._stopping.wait(), seconds)
+        except asyncio.TimeoutError:
+            pass
+
+    async def process(self, messages):
+        """Tag one received batch, deleting the messages that succeeded."""
+        self.stats["received"] += len(messages)
+        records = [{"messageId": m["MessageId"], "body": m["Body"]} for m in messages]
+        heartbeat = asyncio.create_task(self._extend_visibility([m["ReceiptHandle"] for m in messages]))
+        try:
+            response = await asyncio.to_thread(self.handler, {"Records": records}, BatchContext(self.batch_budget))
+            failed = {item["itemIdentifier"] for item in response.get("batchItemFailures", [])}
+        except Exception as e:
+            logger.error("Batch of %d messages failed: %s", len(messages), str(e), exc_info=True)
+            failed = {m["MessageId"] for m in messages}
+        finally:
+            heartbeat.cancel()
+
+        done = [m["ReceiptHandle"] for m in messages if m["MessageId"] not in failed]
+        self.stats["failed"] += len(messages) - len(done)
+        if done:
+            try:
+                await asyncio.to_thread(self.queue.delete, done)
+                self.stats["deleted"] += len(done)
+            except Exception as e:
+                # The messages reappear and are skipped by the idempotency cache
+                logger.error("Could not delete %d processed messages: %s", len(done), str(e))
+
+    async def _extend_visibility(self, receipt_handles):
+        interval = self.visibility_timeout / 2.0
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                await asyncio.to_thread(self.queue.change_visibility, receipt_handles, self.visibility_timeout)
+                self.stats["extended"] += 1
+            except Exception as e:
+                logger.warning("Could not extend visibility of %d messages: %s", len(receipt_handles), str(e))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--queue-url", default=CONSUMER_QUEUE_URL, help="SQS queue URL")
+    parser.add_argument("--region", default=None, help="queue region (defaults to the session region)")
+    parser.add_argument("--workers", type=int, default=CONSUMER_WORKERS)
+    parser.add_argument("--wait-seconds", type=int, default=CONSUMER_WAIT_SECONDS)
+    parser.add_argument("--visibility-timeout", type=int, default=CONSUMER_VISIBILITY_TIMEOUT)
+    args = parser.parse_args(argv)
+    if not args.queue_url:
+        parser.error("--queue-url or CONSUMER_QUEUE_URL is required")
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(name)s %(message)s")
+    consumer = Consumer(SqsQueue(args.queue_url, args.region), workers=args.workers,
+                        wait_seconds=min(args.wait_seconds, MAX_WAIT_SECONDS),
+                        visibility_timeout=args.visibility_timeout)
+    asyncio.run(consumer.run())
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,26 @@
+"""Per-invocation deadline shared by the retry engine and the dispatcher.
+
+The deadline lives in a context variable so concurrent invocations (e.g. the
+long-running consumer) and worker threads that copy the context each see
+their own.
+"""
+
+import contextvars
+import time
+
+_deadline = contextvars.ContextVar("autotag_deadline", default=None)
+
+
+def set_deadline(context):
+    """Record the Lambda deadline from context.get_remaining_time_in_millis().
+
+    A context without that method (tests, local tools) clears the deadline.
+    """
+    remaining_ms = getattr(context, "get_remaining_time_in_millis", None)
+    _deadline.set(time.monotonic() + remaining_ms() / 1000.0 if remaining_ms else None)
+
+
+def remaining_seconds():
+    """Seconds left before the deadline, or None when no deadline is set."""
+    deadline = _deadline.get()
+    return None if deadline is None else deadline - time.monotonic()
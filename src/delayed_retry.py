@@ -0,0 +1,272 @@
+"""Delayed retries for tagging calls that raced a resource's propagation.
+
+Tagging right after creation can fail with InvalidInstanceID.NotFound and
+similar errors until the new resource is visible to the tagging API. Such
+an event is not retried in place with sleeps. Instead it is deferred: its
+detail gets a retry attempt number and is scheduled again after the next
+delay in DELAYED_RETRY_SCHEDULE.
+
+- Short delays go onto a timer wheel owned by the current invocation.
+  drain() runs them once the invocation's own work is done, so every
+  deferred event waits out its delay at the same time rather than one
+  sleep per handler thread.
+- A delay longer than DELAYED_RETRY_INLINE_SECONDS, or one that would end
+  too close to the invocation deadline, is handed off to the durable delay
+  queue: an SQS message with DelaySeconds that comes back as a new event.
+
+Any object with send(body, delay_seconds) can be the delay queue. That
+includes consumer.InMemoryQueue, which stands in for SQS locally. Without a
+delay queue, only the inline path is available.
+"""
+
+import contextvars
+import json
+import logging
+import os
+import threading
+import time
+from abc import ABC, abstractmethod
+try:
+    from client_pool import get_client
+    from deadline import remaining_seconds
+    from metrics import METRICS
+except ImportError:
+    from src.client_pool import get_client
+    from src.deadline import remaining_seconds
+    from src.metrics import METRICS
+
+logger = logging.getLogger(__name__)
+
+DELAY_QUEUE_URL = os.environ.get("DELAY_QUEUE_URL", "")
+# Seconds to wait before retry 1, 2, ...; an event is given up after the last one
+DELAYED_RETRY_SCHEDULE = tuple(
+    float(s) for s in os.environ.get("DELAYED_RETRY_SCHEDULE", "1,2,4,15,60,300,900").split(",") if s.strip()
+)
+DELAYED_RETRY_INLINE_SECONDS = float(os.environ.get("DELAYED_RETRY_INLINE_SECONDS", "5"))
+# Inline retries must start at least this long before the invocation deadline
+DELAYED_RETRY_DEADLINE_MARGIN = 2.0
+# SQS caps DelaySeconds at 15 minutes
+MAX_QUEUE_DELAY_SECONDS = 900
+# Attempt number carried in a deferred event's detail
+RETRY_ATTEMPT_KEY = "autotagRetryAttempt"
+
+
+def retry_attempt(detail) -> int:
+    """Return how many times the event in detail has already been deferred."""
+    return detail.get(RETRY_ATTEMPT_KEY, 0) if isinstance(detail, dict) else 0
+
+
+class TimerWheel:
+    """Hashed timer wheel holding items until their due time.
+
+    Due times are rounded up to whole ticks and each item is stored in the
+    slot for its tick, so schedule() costs O(1). pop_due() only visits the
+    slots whose ticks have passed since the previous call. Items more than
+    one revolution ahead share a slot with nearer ones and are kept there
+    until their own tick comes round.
+
+    Args:
+        tick: Slot width in seconds.
+        slots: Number of slots in one revolution.
+        clock: Monotonic time source.
+    """
+
+    def __init__(self, tick=0.05, slots=256, clock=time.monotonic):
+        self.tick = tick
+        self._clock = clock
+        self._slots = [[] for _ in range(slots)]
+        self._lock = threading.Lock()
+        self._cursor = self._tick_of(clock())
+        self._count = 0
+
+    def __len__(self):
+        return self._count
+
+    def now(self) -> float:
+        return self._clock()
+
+    def _tick_of(self, t):
+        return int(t / self.tick)
+
+    def schedule(self, delay: float, item):
+        """Hold item for delay seconds. Returns its due time on the wheel's clock."""
+        due = -int(-(self._clock() + max(0.0, delay)) // self.tick)
+        with self._lock:
+            due = max(due, self._cursor)
+            self._slots[due % len(self._slots)].append((due, item))
+            self._count += 1
+        return due * self.tick
+
+    def pop_due(self) -> list:
+        """Remove and return the items whose due time has passed, earliest first."""
+        now = self._tick_of(self._clock())
+        due = []
+        with self._lock:
+            if now < self._cursor:
+                return due
+            for t in range(self._cursor, self._cursor + min(now - self._cursor + 1, len(self._slots))):
+                slot = self._slots[t % len(self._slots)]
+                if slot:
+                    due.extend(entry for entry in slot if entry[0] <= now)
+                    slot[:] = [entry for entry in slot if entry[0] > now]
+            self._cursor = now + 1
+            self._count -= len(due)
+        due.sort(key=lambda entry: entry[0])
+        return [item for _, item in due]
+
+    def next_due(self):
+        """Return the earliest due time, or None when the wheel is empty."""
+        with self._lock:
+            ticks = [entry[0] for slot in self._slots for entry in slot]
+        return min(ticks) * self.tick if ticks else None
+
+    def pop_all(self) -> list:
+        """Remove and return every item, earliest first."""
+        with self._lock:
+            entries = sorted((entry for slot in self._slots for entry in slot), key=lambda entry: entry[0])
+            for slot in self._slots:
+                slot.clear()
+            self._count = 0
+        return [item for _, item in entries]
+
+
+class DelayQueue(ABC):
+    """Interface for the durable queue that holds long delays."""
+
+    @abstractmethod
+    def send(self, body: str, delay_seconds: float = 0):
+        """Make body available for receiving after delay_seconds."""
+
+
+def clamp_delay(delay_seconds) -> int:
+    """Round a delay to the whole seconds SQS DelaySeconds accepts, within 0-900."""
+    return int(min(MAX_QUEUE_DELAY_SECONDS, max(0, round(delay_seconds))))
+
+
+class SqsDelayQueue(DelayQueue):
+    """An SQS queue, with delays as per-message DelaySeconds.
+
+    The client is created on the first send, keeping boto3 off the cold path.
+    """
+
+    def __init__(self, queue_url, region=None):
+        self.queue_url = queue_url
+        # https://sqs.<region>.amazonaws.com/<account>/<name>
+        self.region = region or (queue_url.split(".")[1] if queue_url.count(".") > 2 else None)
+
+    def send(self, body, delay_seconds=0):
+        get_client("sqs", self.region).send_message(
+            QueueUrl=self.queue_url, MessageBody=body,
+            DelaySeconds=clamp_delay(delay_seconds),
+        )
+
+
+DELAY_QUEUE = SqsDelayQueue(DELAY_QUEUE_URL) if DELAY_QUEUE_URL else None
+
+_delay_queue = contextvars.ContextVar("autotag_delay_queue", default=None)
+_current = contextvars.ContextVar("autotag_delayed_retries", default=None)
+
+
+def set_delay_queue(queue):
+    """Use queue instead of DELAY_QUEUE in this context (e.g. a consumer's own queue)."""
+    _delay_queue.set(queue)
+
+
+def delay_queue():
+    """Return the delay queue for the current context, or None."""
+    queue = _delay_queue.get()
+    return DELAY_QUEUE if queue is None else queue
+
+
+class DelayedRetries:
+    """Deferred events of one invocation.
+
+    Args:
+        queue: Durable delay queue for long delays, or None.
+        schedule: Delay in seconds before each retry.
+        inline_seconds: Longest delay kept on the in-invocation timer wheel.
+        wheel: Timer wheel to use; a fresh one by default.
+    """
+
+    def __init__(self, queue=None, schedule=DELAYED_RETRY_SCHEDULE, inline_seconds=DELAYED_RETRY_INLINE_SECONDS,
+                 wheel=None):
+        self.queue = queue
+        self.schedule = schedule
+        self.inline_seconds = inline_seconds
+        self.wheel = TimerWheel() if wheel is None else wheel
+        self._wake = threading.Event()
+
+    def defer(self, detail) -> bool:
+        """Schedule the event in detail for another attempt.
+
+        Returns:
+            False when its retries are used up, or its next delay fits neither
+            the wheel nor a delay queue. The caller then reports the failure.
+        """
+        attempt = retry_attempt(detail)
+        if attempt >= len(self.schedule):
+            return False
+        delay = self.schedule[attempt]
+        retry = dict(detail, **{RETRY_ATTEMPT_KEY: attempt + 1})
+        if delay <= self.inline_seconds and self._fits_deadline(delay):
+            self.wheel.schedule(delay, retry)
+            METRICS.add("DeferredRetries", 1, Destination="inline")
+            return True
+        return self._hand_off(retry, delay)
+
+    def _fits_deadline(self, delay):
+        remaining = remaining_seconds()
+        return remaining is None or remaining - delay > DELAYED_RETRY_DEADLINE_MARGIN
+
+    def _hand_off(self, retry, delay):
+        if self.queue is None:
+            return False
+        try:
+            self.queue.send(json.dumps({"detail": retry}), delay)
+        except Exception as e:
+            logger.error("Could not queue delayed retry of %s: %s", retry.get("eventName", ""), str(e))
+            return False
+        METRICS.add("DeferredRetries", 1, Destination="queue")
+        logger.info("Queued retry %d of %s for %.0fs", retry[RETRY_ATTEMPT_KEY], retry.get("eventName", ""), delay)
+        return True
+
+    def drain(self, run):
+        """Run run(detail) for each inline retry as it comes due.
+
+        run may defer the event again, which puts it back on this wheel or
+        hands it off. Retries that cannot start before the deadline are
+        handed off as they are; without a queue they are logged as lost.
+        """
+        while len(self.wheel):
+            for detail in self.wheel.pop_due():
+                run(detail)
+            next_due = self.wheel.next_due()
+            if next_due is None:
+                return
+            wait = max(0.0, next_due - self.wheel.now())
+            if not self._fits_deadline(wait):
+                for detail in self.wheel.pop_all():
+                    if not self._hand_off(detail, 0):
+                        METRICS.add("DeferredRetriesDropped", 1)
+                        logger.error("Dropping delayed retry of %s: no time left and no delay queue",
+                                     detail.get("eventName", ""))
+                return
+            self._wake.wait(wait)
+
+
+def defer(detail) -> bool:
+    """Defer the event in detail on the current invocation's retries.
+
+    Outside an invocation (no begin()), only the delay queue is used.
+    """
+    retries = _current.get()
+    if retries is None:
+        retries = DelayedRetries(delay_queue(), inline_seconds=-1)
+    return retries.defer(detail)
+
+
+def begin(**kwargs) -> DelayedRetries:
+    """Start collecting deferred events for the current invocation."""
+    retries = DelayedRetries(delay_queue(), **kwargs)
+    _current.set(retries)
+    return retries
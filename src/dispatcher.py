@@ -0,0 +1,180 @@
+"""Bounded thread-pool dispatcher for independent tagging operations.
+
+Each boto3 call spends most of its time waiting on the network, so
+independent operations (different events, CreateTags chunks, TagResources
+chunks) run concurrently. Concurrency is capped overall, per service and per
+region, and no new operation starts once the Lambda deadline is near.
+
+When one function serves events forwarded from many regions, tasks are
+started round-robin across regions, and each region can have its own cap.
+That way a burst in one region cannot queue ahead of every other region's
+work or tie up every worker thread waiting on its own region's semaphore.
+"""
+
+import contextvars
+import logging
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, NamedTuple
+
+logger = logging.getLogger(__name__)
+
+MAX_WORKERS = int(os.environ.get("DISPATCH_MAX_WORKERS", "16"))
+PER_SERVICE_LIMIT = int(os.environ.get("DISPATCH_PER_SERVICE_LIMIT", "8"))
+PER_REGION_LIMIT = int(os.environ.get("DISPATCH_PER_REGION_LIMIT", "8"))
+DEADLINE_MARGIN_MS = int(os.environ.get("DISPATCH_DEADLINE_MARGIN_MS", "5000"))
+# e.g. "us-east-1=12,ap-southeast-2=4"; regions not listed use PER_REGION_LIMIT
+REGION_LIMITS = os.environ.get("DISPATCH_REGION_LIMITS", "")
+
+
+def parse_region_limits(spec: str) -> dict:
+    """Parse a DISPATCH_REGION_LIMITS string into {region: limit}."""
+    limits = {}
+    for entry in (spec or "").split(","):
+        entry = entry.strip()
+        if not entry:
+            continue
+        region, _, limit = entry.partition("=")
+        limits[region.strip()] = int(limit)
+    return limits
+
+
+def interleave_by_region(tasks) -> list:
+    """Return task indices ordered round-robin across regions, keeping each region's order."""
+    queues = {}
+    for index, task in enumerate(tasks):
+        queues.setdefault(task.region, []).append(index)
+    order, queues = [], list(queues.values())
+    for position in range(max(map(len, queues), default=0)):
+        order.extend(queue[position] for queue in queues if position < len(queue))
+    return order
+
+
+class Task(NamedTuple):
+    """One independent tagging operation.
+
+    tokens identifies the events the operation acts for, so a caller can
+    fail them if the task is skipped or crashes.
+    """
+    service: str
+    region: str
+    fn: Callable
+    tokens: frozenset = frozenset()
+
+
+class Dispatcher:
+    """Runs Tasks on a bounded thread pool with per-service and per-region caps.
+
+    region_limits overrides per_region_limit for individual regions.
+    """
+
+    def __init__(
+        self,
+        max_workers: int = MAX_WORKERS,
+        per_service_limit: int = PER_SERVICE_LIMIT,
+        per_region_limit: int = PER_REGION_LIMIT,
+        deadline_margin_ms: int = DEADLINE_MARGIN_MS,
+        region_limits: dict = None,
+    ):
+        self.max_workers = max_workers
+        self.per_service_limit = per_service_limit
+        self.per_region_limit = per_region_limit
+        self.deadline_margin_ms = deadline_margin_ms
+        self.region_limits = parse_region_limits(REGION_LIMITS) if region_limits is None else dict(region_limits)
+        self._lock = threading.Lock()
+        self._semaphores = {}
+
+    def _semaphore(self, kind, name, limit):
+        with self._lock:
+            sem = self._semaphores.get((kind, name))
+            if sem is None:
+                sem = self._semaphores[(kind, name)] = threading.BoundedSemaphore(limit)
+            return sem
+
+    def run(self, tasks, context=None):
+        """Run every task and return (results, stats).
+
+        Args:
+            tasks: Iterable of Task.
+            context: The Lambda context. When given, tasks that have not
+                started once less than deadline_margin_ms remains are skipped,
+                including tasks that were still waiting for a service or
+                region slot.
+
+        Returns:
+            results: One entry per task, in order: the task's return value, or
+                None if it was skipped or raised.
+            stats: wall_ms, busy_ms, parallelism (busy / wall), peak_concurrency,
+                completed, skipped and errors.
+        """
+        tasks = list(tasks)
+        stats = {"tasks": len(tasks), "completed": 0, "skipped": 0, "errors": 0,
+                 "busy_ms": 0.0, "peak_concurrency": 0}
+        running = [0]
+        remaining_ms = getattr(context, "get_remaining_time_in_millis", None)
+
+        def near_deadline():
+            if remaining_ms is None or remaining_ms() >= self.deadline_margin_ms:
+                return False
+            with self._lock:
+                stats["skipped"] += 1
+            return True
+
+        def execute(task):
+            if near_deadline():
+                return None
+            # Region first: a task waiting on a busy region holds none of its
+            # service's slots, so the service's work in other regions still starts
+            with self._semaphore("region", task.region,
+                                 self.region_limits.get(task.region, self.per_region_limit)), \
+                    self._semaphore("service", task.service, self.per_service_limit):
+                # Waiting for the caps may have used up the margin
+                if near_deadline():
+                    return None
+                with self._lock:
+                    running[0] += 1
+                    stats["peak_concurrency"] = max(stats["peak_concurrency"], running[0])
+                started = time.perf_counter()
+                try:
+                    result = task.fn()
+                    outcome = "completed"
+                except Exception as e:
+                    logger.error("Unexpected error in %s task (%s): %s", task.service, task.region, str(e),
+                                 exc_info=True)
+                    result, outcome = None, "errors"
+                elapsed = (time.perf_counter() - started) * 1000.0
+                with self._lock:
+                    running[0] -= 1
+                    stats[outcome] += 1
+                    stats["busy_ms"] += elapsed
+            return result
+
+        started = time.perf_counter()
+        if len(tasks) <= 1 or self.max_workers <= 1:
+            results = [execute(task) for task in tasks]
+        else:
+            # Each worker runs in a copy of the caller's context so per-invocation
+            # state (e.g. the retry deadline) follows the task into its thread
+            order = interleave_by_region(tasks)
+            contexts = [contextvars.copy_context() for _ in order]
+            with ThreadPoolExecutor(max_workers=min(self.max_workers, len(tasks))) as pool:
+                started_order = pool.map(lambda ctx, i: ctx.run(execute, tasks[i]), contexts, order)
+                results = [None] * len(tasks)
+                for index, result in zip(order, started_order):
+                    results[index] = result
+        stats["wall_ms"] = round((time.perf_counter() - started) * 1000.0, 3)
+        stats["busy_ms"] = round(stats["busy_ms"], 3)
+        stats["parallelism"] = round(stats["busy_ms"] / stats["wall_ms"], 2) if stats["wall_ms"] else 0.0
+
+        if tasks:
+            logger.info(
+                "Dispatched %d tasks in %.1fms: parallelism=%.2f, peak=%d, skipped=%d, errors=%d",
+                len(tasks), stats["wall_ms"], stats["parallelism"], stats["peak_concurrency"],
+                stats["skipped"], stats["errors"],
+            )
+        if stats["skipped"]:
+            logger.warning("Skipped %d tasks: less than %dms left before the Lambda deadline",
+                           stats["skipped"], self.deadline_margin_ms)
+        return results, stats
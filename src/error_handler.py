@@ -2,44 +2,103 @@
 
 import logging
 import functools
+import time
 from botocore.exceptions import ClientError
+try:
+    from retry import call_with_retry, classify_error, NOT_FOUND
+    from delayed_retry import defer, retry_attempt
+    from metrics import METRICS, MILLISECONDS
+    from tracing import span
+except ImportError:
+    from src.retry import call_with_retry, classify_error, NOT_FOUND
+    from src.delayed_retry import defer, retry_attempt
+    from src.metrics import METRICS, MILLISECONDS
+    from src.tracing import span
 
 logger = logging.getLogger(__name__)
 
 PERMISSIONS_ERROR_CODES = {"AccessDeniedException", "UnauthorizedAccess", "AccessDenied"}
 
 
-def handle_tagging_errors(event_name):
-    """Decorator that wraps a service handler with standard error handling.
+def run_handled(event_name, detail, fn) -> bool:
+    """Run fn() under the shared retry engine and standard error handling.
+
+    Throttling and 5xx errors are retried with jittered backoff within the
+    invocation deadline before anything below applies.
 
     Catches:
-    - Missing resource IDs (already handled by each handler returning early)
+    - Eventual-consistency NotFound -> the event in detail is deferred for a
+      delayed retry (see delayed_retry) and counts as handled; once its
+      retries are used up, or when there is no detail to defer, it is
+      reported like any other error
     - Permissions errors -> logs specific insufficient-permissions message
     - General ClientError -> logs error code, message, resource ID, event name
     - Unexpected exceptions -> logs and returns without raising
+
+    Returns:
+        True when fn completed, False when an error was caught. The latency
+        (retries included) and any caught error code are recorded in
+        METRICS, and the call is a handler:<event_name> span in the timing tree.
+    """
+    start = time.perf_counter()
+    try:
+        with span(f"handler:{event_name}"):
+            call_with_retry(fn)
+        return True
+    except ClientError as e:
+        error_code = e.response.get("Error", {}).get("Code", "")
+        if classify_error(e) == NOT_FOUND and detail is not None and defer(detail):
+            logger.info("Deferred %s after %s (attempt %d)", event_name, error_code,
+                        retry_attempt(detail) + 1)
+            return True
+        METRICS.add("TaggingErrors", 1, EventName=event_name, ErrorCode=error_code or "Unknown")
+        error_msg = e.response.get("Error", {}).get("Message", "")
+        if error_code in PERMISSIONS_ERROR_CODES:
+            logger.error(
+                "Insufficient permissions to tag resource for event %s: %s - %s",
+                event_name, error_code, error_msg,
+            )
+        else:
+            logger.error(
+                "Error tagging resource for event %s: code=%s, message=%s",
+                event_name, error_code, error_msg,
+            )
+    except Exception as e:
+        METRICS.add("TaggingErrors", 1, EventName=event_name, ErrorCode=type(e).__name__)
+        logger.error(
+            "Unexpected error in handler for event %s: %s",
+            event_name, str(e), exc_info=True,
+        )
+    finally:
+        METRICS.add("HandlerLatency", (time.perf_counter() - start) * 1000.0, MILLISECONDS,
+                    EventName=event_name)
+    return False
+
+
+def handle_tagging_errors(event_name):
+    """Decorator that runs a handler(detail, tags) under run_handled.
+
+    The wrapped handler returns True when it completed (including the
+    early return for missing resource IDs) and False when an error was
+    caught, so batch callers can report the event as failed.
     """
     def decorator(func):
         @functools.wraps(func)
         def wrapper(detail, tags):
-            try:
-                return func(detail, tags)
-            except ClientError as e:
-                error_code = e.response.get("Error", {}).get("Code", "")
-                error_msg = e.response.get("Error", {}).get("Message", "")
-                if error_code in PERMISSIONS_ERROR_CODES:
-                    logger.error(
-                        "Insufficient permissions to tag resource for event %s: %s - %s",
-                        event_name, error_code, error_msg,
-                    )
-                else:
-                    logger.error(
-                        "Error tagging resource for event %s: code=%s, message=%s",
-                        event_name, error_code, error_msg,
-                    )
-            except Exception as e:
-                logger.error(
-                    "Unexpected error in handler for event %s: %s",
-                    event_name, str(e), exc_info=True,
-                )
+            return run_handled(event_name, detail, lambda: func(detail, tags))
+        return wrapper
+    return decorator
+
+
+def handle_operation_errors(event_name):
+    """Decorator that runs an executor(operation) under run_handled.
+
+    The wrapped executor takes (operation, detail=None); detail is the
+    event the operation was planned from, needed to defer a NotFound.
+    """
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(operation, detail=None):
+            return run_handled(event_name, detail, lambda: func(operation))
         return wrapper
     return decorator
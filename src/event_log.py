@@ -0,0 +1,94 @@
+"""Compact, lazily formatted event logging for the hot path.
+
+Every event gets a one-line summary (source, name, eventID, principal,
+resource count). The full payload is only logged at DEBUG, for a sampled
+fraction of events, or when the event fails, and is cut off at a byte cap.
+Both are formatted by the logging module itself, so nothing is serialized
+when the record is not emitted.
+"""
+
+import json
+import logging
+import os
+import random
+try:
+    from resource_extractors import EXTRACTORS
+except ImportError:
+    from src.resource_extractors import EXTRACTORS
+
+logger = logging.getLogger(__name__)
+
+EVENT_LOG_MAX_BYTES = int(os.environ.get("EVENT_LOG_MAX_BYTES", "4096"))
+EVENT_LOG_SAMPLE_RATE = float(os.environ.get("EVENT_LOG_SAMPLE_RATE", "0"))
+
+
+def summarize_event(event) -> dict:
+    """Return the fields worth logging for every event."""
+    detail = event.get("detail") if isinstance(event, dict) else None
+    if not isinstance(detail, dict):
+        return {"detail": None}
+    identity = detail.get("userIdentity") or {}
+    key = (detail.get("eventSource", ""), detail.get("eventName", ""))
+    extractor = EXTRACTORS.get(key)
+    resources = None
+    if extractor is not None:
+        try:
+            ids = extractor(detail)
+            resources = len(ids) if isinstance(ids, list) else int(bool(ids))
+        except Exception:
+            pass
+    return {
+        "source": key[0],
+        "name": key[1],
+        "eventID": detail.get("eventID"),
+        "principal": identity.get("arn") or identity.get("principalId"),
+        "resources": resources,
+    }
+
+
+class EventSummary:
+    """Formats summarize_event(event) only when the log record is emitted."""
+
+    __slots__ = ("event",)
+
+    def __init__(self, event):
+        self.event = event
+
+    def __str__(self):
+        return json.dumps(summarize_event(self.event))
+
+
+class CappedPayload:
+    """Formats an object as JSON truncated to max_bytes, only when emitted."""
+
+    __slots__ = ("obj", "max_bytes")
+
+    def __init__(self, obj, max_bytes: int = None):
+        self.obj = obj
+        self.max_bytes = EVENT_LOG_MAX_BYTES if max_bytes is None else max_bytes
+
+    def __str__(self):
+        # Encode incrementally and stop at the cap instead of serializing a
+        # payload of several MB only to throw most of it away
+        parts, size = [], 0
+        for chunk in json.JSONEncoder(default=str).iterencode(self.obj):
+            parts.append(chunk)
+            size += len(chunk.encode("utf-8"))
+            if size > self.max_bytes:
+                head = "".join(parts).encode("utf-8")[:self.max_bytes].decode("utf-8", errors="ignore")
+                return f"{head}...[truncated at {self.max_bytes} bytes]"
+        return "".join(parts)
+
+
+def log_event(event, label: str = "Event received"):
+    """Log an event's summary, plus its capped payload at DEBUG or when sampled."""
+    logger.info("%s: %s", label, EventSummary(event))
+    if logger.isEnabledFor(logging.DEBUG):
+        logger.debug("%s payload: %s", label, CappedPayload(event))
+    elif EVENT_LOG_SAMPLE_RATE and random.random() < EVENT_LOG_SAMPLE_RATE:
+        logger.info("%s payload (sampled): %s", label, CappedPayload(event))
+
+
+def log_event_failure(event, reason: str):
+    """Log the capped payload of an event that could not be tagged."""
+    logger.error("Event failed (%s): %s", reason, CappedPayload(event))
@@ -0,0 +1,66 @@
+"""Handler factory shared by the service handler modules.
+
+A handler plans its event into a TaggingOperation (see operations), whose
+resource IDs come from the compiled extractor, and then executes it. The
+responseElements paths therefore live only in EXTRACTION_SPECS, and the
+client and API only in TAG_APIS.
+"""
+
+import logging
+try:
+    from error_handler import handle_operation_errors
+    from account_credentials import get_account_client
+    from operations import plan_operation
+    from metrics import METRICS
+except ImportError:
+    from src.error_handler import handle_operation_errors
+    from src.account_credentials import get_account_client
+    from src.operations import plan_operation
+    from src.metrics import METRICS
+
+logger = logging.getLogger(__name__)
+
+
+def spec_handler(name, key, label, tag_call, batched=False):
+    """Build a tagging handler for one (eventSource, eventName).
+
+    Args:
+        name: Function name of the handler, as registered in HANDLER_PATHS.
+        key: (eventSource, eventName); TAG_APIS names its client and
+            EXTRACTORS supplies its resource IDs.
+        label: Resource description for log messages, e.g. "load balancer".
+        tag_call: tag_call(client, resource, tags). resource is one ID, or the
+            whole list when batched is True.
+        batched: Pass every extracted ID to a single tag_call.
+
+    The handler's executor stage is exposed as handler.execute(operation,
+    detail=None), with the standard retry and error handling; callers that
+    already planned an operation run it through that directly.
+    handler.execute_raw(operation) is the same stage without that handling,
+    for callers with their own retry policy; it raises on failure.
+    """
+    event_name = key[1]
+
+    def execute_raw(operation):
+        client = get_account_client(operation.service, operation.region, operation.account)
+        if batched:
+            tag_call(client, list(operation.resource_ids), operation.tags)
+        else:
+            for resource_id in operation.resource_ids:
+                tag_call(client, resource_id, operation.tags)
+        METRICS.add("ResourcesTagged", len(operation.resource_ids), EventName=event_name)
+        logger.info("Tagged %s: %s", label, ", ".join(operation.resource_ids))
+
+    execute = handle_operation_errors(event_name)(execute_raw)
+
+    def handler(detail, tags):
+        operation = plan_operation(key, detail, tags)
+        if operation is None:
+            logger.warning("No resource IDs found in %s event", event_name)
+            return True
+        return execute(operation, detail)
+
+    handler.__name__ = handler.__qualname__ = name
+    handler.execute = execute
+    handler.execute_raw = execute_raw
+    return handler
@@ -1,36 +1,22 @@
 """RDS service handlers for auto-tagging."""
 
-import logging
-import boto3
 try:
     from tag_serializer import serialize_arn_tags
-    from error_handler import handle_tagging_errors
+    from handlers.common import spec_handler
 except ImportError:
     from src.tag_serializer import serialize_arn_tags
-    from src.error_handler import handle_tagging_errors
+    from src.handlers.common import spec_handler
 
-logger = logging.getLogger(__name__)
 
+def _add_tags_to_resource(rds, arn, tags):
+    rds.add_tags_to_resource(ResourceName=arn, Tags=serialize_arn_tags(tags))
 
-@handle_tagging_errors("CreateDBInstance")
-def handle_rds_create_db_instance(detail, tags):
-    db_arn = detail.get("responseElements", {}).get("dBInstanceArn")
-    if not db_arn:
-        logger.warning("No dBInstanceArn found in CreateDBInstance event")
-        return
-    region = detail.get("awsRegion")
-    rds = boto3.client("rds", region_name=region) if region else boto3.client("rds")
-    rds.add_tags_to_resource(ResourceName=db_arn, Tags=serialize_arn_tags(tags))
-    logger.info("Tagged RDS instance: %s", db_arn)
 
-
-@handle_tagging_errors("CreateDBCluster")
-def handle_rds_create_db_cluster(detail, tags):
-    cluster_arn = detail.get("responseElements", {}).get("dBClusterArn")
-    if not cluster_arn:
-        logger.warning("No dBClusterArn found in CreateDBCluster event")
-        return
-    region = detail.get("awsRegion")
-    rds = boto3.client("rds", region_name=region) if region else boto3.client("rds")
-    rds.add_tags_to_resource(ResourceName=cluster_arn, Tags=serialize_arn_tags(tags))
-    logger.info("Tagged RDS cluster: %s", cluster_arn)
+handle_rds_create_db_instance = spec_handler(
+    "handle_rds_create_db_instance",
+    ("rds.amazonaws.com", "CreateDBInstance"), "RDS instance", _add_tags_to_resource,
+)
+handle_rds_create_db_cluster = spec_handler(
+    "handle_rds_create_db_cluster",
+    ("rds.amazonaws.com", "CreateDBCluster"), "RDS cluster", _add_tags_to_resource,
+)
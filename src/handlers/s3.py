@@ -1,38 +1,72 @@
 """S3 service handler for auto-tagging."""
 
 import logging
-import boto3
 from botocore.exceptions import ClientError
 try:
     from tag_serializer import serialize_s3_tags, deserialize_s3_tags
-    from error_handler import handle_tagging_errors
+    from tag_diff import diff_tags, merge_tags, S3_MAX_TAGS
+    from error_handler import handle_operation_errors
+    from account_credentials import get_account_client
+    from retry import error_code
+    from operations import plan_operation
+    from metrics import METRICS
 except ImportError:
     from src.tag_serializer import serialize_s3_tags, deserialize_s3_tags
-    from src.error_handler import handle_tagging_errors
+    from src.tag_diff import diff_tags, merge_tags, S3_MAX_TAGS
+    from src.error_handler import handle_operation_errors
+    from src.account_credentials import get_account_client
+    from src.retry import error_code
+    from src.operations import plan_operation
+    from src.metrics import METRICS
 
 logger = logging.getLogger(__name__)
 
+CREATE_BUCKET = ("s3.amazonaws.com", "CreateBucket")
 
-@handle_tagging_errors("CreateBucket")
-def handle_s3_create_bucket(detail, tags):
-    """Tag a new S3 bucket, merging with any existing tags."""
-    bucket_name = detail.get("requestParameters", {}).get("bucketName")
-    if not bucket_name:
-        logger.warning("No bucketName found in CreateBucket event")
-        return
 
-    s3 = boto3.client("s3")
+def tag_s3_operation(operation):
+    """Tag the planned bucket, merging with any existing tags.
+
+    PutBucketTagging is skipped when the bucket already carries every tag
+    with the same value. NoSuchTagSet means the bucket has no tags; any
+    other GetBucketTagging error is raised.
+    """
+    bucket_name, tags = operation.resource_ids[0], operation.tags
+    s3 = get_account_client("s3", account_id=operation.account)
 
     existing_tags = {}
     try:
         response = s3.get_bucket_tagging(Bucket=bucket_name)
         existing_tags = deserialize_s3_tags(response.get("TagSet", []))
-    except ClientError:
-        pass  # No existing tags
+    except ClientError as e:
+        if error_code(e) != "NoSuchTagSet":
+            raise
 
-    merged = {**existing_tags, **tags}
+    changes = diff_tags(existing_tags, tags)
+    if not changes:
+        logger.info("S3 bucket already tagged, skipping PutBucketTagging: %s", bucket_name)
+        return
+
+    merged = merge_tags(existing_tags, changes, limit=S3_MAX_TAGS)
     s3.put_bucket_tagging(
         Bucket=bucket_name,
         Tagging={"TagSet": serialize_s3_tags(merged)},
     )
-    logger.info("Tagged S3 bucket: %s", bucket_name)
+    METRICS.add("ResourcesTagged", 1, EventName="CreateBucket")
+    logger.info("Tagged S3 bucket: %s (%d tags added or updated)", bucket_name, len(changes))
+
+
+execute_s3_operation = handle_operation_errors("CreateBucket")(tag_s3_operation)
+
+
+def handle_s3_create_bucket(detail, tags):
+    """Tag a new S3 bucket (see tag_s3_operation)."""
+    operation = plan_operation(CREATE_BUCKET, detail, tags)
+    if operation is None:
+        logger.warning("No bucketName found in CreateBucket event")
+        return True
+    return execute_s3_operation(operation, detail)
+
+
+handle_s3_create_bucket.execute = execute_s3_operation
+handle_s3_create_bucket.execute_raw = tag_s3_operation
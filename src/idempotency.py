@@ -0,0 +1,137 @@
+"""Idempotency cache keyed by CloudTrail eventID.
+
+EventBridge delivers at least once and replay tooling re-sends events, so
+the same eventID can arrive many times. An event is recorded only after it
+was tagged successfully; later copies then cost a cache lookup instead of a
+round of tagging calls.
+
+Lookups go to an in-container LRU first and then, if configured, to a
+persistent store shared across containers. Stores implement
+IdempotencyStore; SqliteStore is a local file-backed implementation.
+"""
+
+import os
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+
+IDEMPOTENCY_ENABLED = os.environ.get("IDEMPOTENCY_ENABLED", "true").lower() == "true"
+IDEMPOTENCY_TTL_SECONDS = float(os.environ.get("IDEMPOTENCY_TTL_SECONDS", "3600"))
+IDEMPOTENCY_CACHE_SIZE = int(os.environ.get("IDEMPOTENCY_CACHE_SIZE", "10000"))
+IDEMPOTENCY_STORE_PATH = os.environ.get("IDEMPOTENCY_STORE_PATH", "")
+
+
+class IdempotencyStore(ABC):
+    """Interface for stores of processed event IDs."""
+
+    @abstractmethod
+    def contains(self, key: str) -> bool:
+        """Return True if key was recorded and has not expired."""
+
+    @abstractmethod
+    def add(self, key: str, ttl: float):
+        """Record key as processed for ttl seconds."""
+
+
+class LocalLRUStore(IdempotencyStore):
+    """Bounded in-memory store with per-entry expiry, evicting least recently used keys."""
+
+    def __init__(self, maxsize: int = IDEMPOTENCY_CACHE_SIZE):
+        self.maxsize = maxsize
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def contains(self, key):
+        with self._lock:
+            expires_at = self._entries.get(key)
+            if expires_at is None:
+                return False
+            if expires_at <= time.monotonic():
+                del self._entries[key]
+                return False
+            self._entries.move_to_end(key)
+            return True
+
+    def add(self, key, ttl):
+        with self._lock:
+            self._entries[key] = time.monotonic() + ttl
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+
+class SqliteStore(IdempotencyStore):
+    """File-backed store, a local stand-in for a shared table (e.g. DynamoDB with TTL)."""
+
+    def __init__(self, path: str):
+        # Imported here so the default LRU-only setup does not load sqlite3 at cold start
+        import sqlite3
+
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS processed_events (event_id TEXT PRIMARY KEY, expires_at REAL NOT NULL)"
+        )
+
+    def contains(self, key):
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT 1 FROM processed_events WHERE event_id = ? AND expires_at > ?", (key, time.time()),
+            ).fetchone()
+        return row is not None
+
+    def add(self, key, ttl):
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO processed_events (event_id, expires_at) VALUES (?, ?)",
+                (key, time.time() + ttl),
+            )
+
+    def purge_expired(self) -> int:
+        """Delete expired rows and return how many were removed."""
+        with self._lock:
+            return self._conn.execute("DELETE FROM processed_events WHERE expires_at <= ?", (time.time(),)).rowcount
+
+
+class IdempotencyCache:
+    """Two-level lookup: in-container LRU, then an optional persistent store."""
+
+    def __init__(self, local: IdempotencyStore = None, persistent: IdempotencyStore = None,
+                 ttl: float = IDEMPOTENCY_TTL_SECONDS):
+        self.local = local if local is not None else LocalLRUStore()
+        self.persistent = persistent
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+
+    @classmethod
+    def from_env(cls):
+        persistent = SqliteStore(IDEMPOTENCY_STORE_PATH) if IDEMPOTENCY_STORE_PATH else None
+        return cls(persistent=persistent)
+
+    def seen(self, event_id) -> bool:
+        """Return True if event_id was already processed successfully."""
+        if not event_id:
+            return False
+        if self.local.contains(event_id):
+            self.hits += 1
+            return True
+        if self.persistent is not None and self.persistent.contains(event_id):
+            self.local.add(event_id, self.ttl)
+            self.hits += 1
+            return True
+        self.misses += 1
+        return False
+
+    def mark(self, event_id):
+        """Record event_id as processed in every level."""
+        if not event_id:
+            return
+        self.local.add(event_id, self.ttl)
+        if self.persistent is not None:
+            self.persistent.add(event_id, self.ttl)
@@ -36,3 +36,24 @@ def extract_owner(user_identity: dict) -> str:
         return user_identity.get("userName", "Unknown")
 
     return "Unknown"
+
+
+def identity_from_arn(arn: str) -> dict:
+    """Rebuild a minimal userIdentity dict from a principal ARN.
+
+    This is the inverse of the CreatedBy tag, so extract_owner(identity_from_arn(arn))
+    gives the Owner that AutoTag derived for that principal.
+    """
+    if not arn or not isinstance(arn, str):
+        return {}
+    resource = arn.split(":", 5)[-1]
+    if resource == "root":
+        return {"type": "Root", "arn": arn}
+    kind, _, path = resource.partition("/")
+    if kind == "user":
+        return {"type": "IAMUser", "arn": arn, "userName": path.rsplit("/", 1)[-1]}
+    if kind == "assumed-role":
+        return {"type": "AssumedRole", "arn": arn}
+    if kind == "federated-user":
+        return {"type": "FederatedUser", "arn": arn, "userName": path}
+    return {"arn": arn}
@@ -5,57 +5,309 @@ import os
 import logging
 
 try:
-    from identity import extract_owner
-    from tag_builder import build_tags
+    from tag_cache import TAG_CACHE
+    from tag_rules import TagRules
     from tag_printer import print_tags
     from config import SERVICE_HANDLERS
+    from batch import iter_batch_records, batch_response
+    from coalescer import CreateTagsCoalescer
+    from bulk_tagger import BulkArnTagger, BULK_TAGGABLE_EVENTS
+    from dispatcher import Dispatcher, Task
+    from rate_limiter import RATE_LIMITER
+    from deadline import set_deadline
+    from delayed_retry import begin as begin_delayed_retries, retry_attempt
+    from idempotency import IdempotencyCache, IDEMPOTENCY_ENABLED
+    from operations import plan_operation
+    from event_log import log_event, log_event_failure
+    from metrics import METRICS, flush_metrics
+    from tracing import trace_invocation
 except ImportError:
-    from src.identity import extract_owner
-    from src.tag_builder import build_tags
+    from src.tag_cache import TAG_CACHE
+    from src.tag_rules import TagRules
     from src.tag_printer import print_tags
     from src.config import SERVICE_HANDLERS
+    from src.batch import iter_batch_records, batch_response
+    from src.coalescer import CreateTagsCoalescer
+    from src.bulk_tagger import BulkArnTagger, BULK_TAGGABLE_EVENTS
+    from src.dispatcher import Dispatcher, Task
+    from src.rate_limiter import RATE_LIMITER
+    from src.deadline import set_deadline
+    from src.delayed_retry import begin as begin_delayed_retries, retry_attempt
+    from src.idempotency import IdempotencyCache, IDEMPOTENCY_ENABLED
+    from src.operations import plan_operation
+    from src.event_log import log_event, log_event_failure
+    from src.metrics import METRICS, flush_metrics
+    from src.tracing import trace_invocation
 
 logger = logging.getLogger()
 logger.setLevel(logging.INFO)
 
 ENVIRONMENT = os.environ.get("ENVIRONMENT", "Development")
 PROJECT = os.environ.get("PROJECT", "CostTracking")
+BULK_TAGGING_ENABLED = os.environ.get("BULK_TAGGING_ENABLED", "false").lower() == "true"
+# Log each planned operation instead of executing it; nothing is marked processed
+DRY_RUN = os.environ.get("DRY_RUN", "false").lower() == "true"
 
+DISPATCHER = Dispatcher()
+IDEMPOTENCY = IdempotencyCache.from_env() if IDEMPOTENCY_ENABLED else None
+TAG_RULES = TagRules.from_env()
 
-def lambda_handler(event, context):
-    """Entry point for the AutoTag Lambda function."""
-    logger.info("Event received: %s", json.dumps(event))
 
-    try:
-        detail = event.get("detail", {})
-        event_source = detail.get("eventSource", "")
-        event_name = detail.get("eventName", "")
+def _event_id(event):
+    """Return the idempotency key: the eventID, suffixed for a delayed retry."""
+    detail = event.get("detail") if isinstance(event, dict) else None
+    if not isinstance(detail, dict):
+        return None
+    event_id, attempt = detail.get("eventID"), retry_attempt(detail)
+    # The original copy was recorded as handled when it was deferred
+    return f"{event_id}#retry{attempt}" if event_id and attempt else event_id
+
+
+def _is_duplicate(event_id) -> bool:
+    """Return True if event_id was already tagged successfully."""
+    if IDEMPOTENCY is None or not IDEMPOTENCY.seen(event_id):
+        return False
+    logger.info("Skipping duplicate event %s", event_id)
+    return True
+
+
+def _mark_processed(event_id):
+    if IDEMPOTENCY is not None:
+        IDEMPOTENCY.mark(event_id)
+
+
+def resolve_event(detail):
+    """Resolve the handler and tag set for one CloudTrail event detail, without logging.
+
+    Returns:
+        (key, handler, tags). handler is None when the event is not supported.
+    """
+    key = (detail.get("eventSource", ""), detail.get("eventName", ""))
+    tags = TAG_CACHE.tags_for(detail.get("userIdentity", {}), detail.get("eventTime", ""), ENVIRONMENT, PROJECT,
+                              TAG_RULES.evaluate(detail))
+    return key, SERVICE_HANDLERS.get(key), tags
+
+
+def prepare_event(event):
+    """Resolve the handler, detail and tag set for one EventBridge event.
 
-        logger.info("Processing event: %s / %s", event_source, event_name)
+    Returns:
+        (key, handler, detail, tags). handler is None when the event is not supported.
+    """
+    detail = event.get("detail", {})
+    key, handler, tags = resolve_event(detail)
+    logger.info("Processing event: %s / %s", *key)
+    logger.info("Tags to apply: %s", print_tags(tags))
+    if handler is None:
+        logger.warning("No handler for event: %s / %s", *key)
+    return key, handler, detail, tags
 
-        user_identity = detail.get("userIdentity", {})
-        owner = extract_owner(user_identity)
-        arn = user_identity.get("arn", "Unknown") if user_identity else "Unknown"
-        event_time = detail.get("eventTime", "")
 
-        tags = build_tags(owner, arn, event_time, ENVIRONMENT, PROJECT)
-        logger.info("Tags to apply: %s", print_tags(tags))
+def _log_plan(operation):
+    logger.info("Dry run, planned operation: %s", json.dumps(operation.describe()))
 
-        handler = SERVICE_HANDLERS.get((event_source, event_name))
+
+def _run_delayed_retry(detail):
+    """Run one inline delayed retry; a repeated NotFound defers it again."""
+    _, handler, detail, tags = prepare_event({"detail": detail})
+    if handler is not None and not handler(detail, tags):
+        log_event_failure({"detail": detail}, "delayed retry failed")
+
+
+@flush_metrics
+@trace_invocation("lambda_handler")
+def lambda_handler(event, context):
+    """Entry point for the AutoTag Lambda function.
+
+    Delayed retries queued in Direct mode come back as SQS batches, and
+    EventBridge Pipes delivers a bare list of records; both are handed to
+    batch_handler.
+    """
+    if isinstance(event, list) or (isinstance(event, dict) and "Records" in event):
+        return batch_handler(event, context)
+    log_event(event)
+    set_deadline(context)
+    delayed_retries = begin_delayed_retries()
+
+    try:
+        event_id = _event_id(event)
+        if _is_duplicate(event_id):
+            return {"statusCode": 200, "body": "Duplicate event"}
+
+        key, handler, detail, tags = prepare_event(event)
         if handler is None:
-            logger.warning("No handler for event: %s / %s", event_source, event_name)
             return {"statusCode": 200, "body": "No handler for event"}
 
-        handler(detail, tags)
+        if DRY_RUN:
+            operation = plan_operation(key, detail, tags, event_id)
+            if operation is not None:
+                _log_plan(operation)
+            return {"statusCode": 200, "body": "Dry run"}
+
+        if handler(detail, tags):
+            _mark_processed(event_id)
+        else:
+            log_event_failure(event, "tagging failed")
+        delayed_retries.drain(_run_delayed_retry)
         return {"statusCode": 200, "body": "Event processed"}
 
     except Exception as e:
         logger.error("Unexpected error processing event: %s", str(e), exc_info=True)
+        log_event_failure(event, type(e).__name__)
+        detail = event.get("detail") if isinstance(event, dict) else None
         return {
             "statusCode": 500,
             "body": json.dumps({
                 "error": type(e).__name__,
                 "message": str(e),
-                "eventName": event.get("detail", {}).get("eventName", ""),
+                "eventName": detail.get("eventName", "") if isinstance(detail, dict) else "",
             }),
         }
+
+
+def _handler_task(item_id, handler, detail, operation):
+    """Wrap a per-event handler as a dispatcher Task returning (failed, fallback).
+
+    The planned operation goes straight to the handler's executor; handlers
+    without one are called with (detail, tags). The task is capped under
+    the operation's client, e.g. "elbv2" or "opensearch".
+    """
+    execute = getattr(handler, "execute", None)
+
+    def run():
+        ok = execute(operation, detail) if execute is not None else handler(detail, operation.tags)
+        return (set() if ok else {item_id}), set()
+    return Task(operation.service, operation.region, run, frozenset([item_id]))
+
+
+def _dispatch(tasks, context):
+    """Run tasks on the dispatcher and union their (failed, fallback) token sets.
+
+    Tasks that were skipped near the deadline or crashed fail all their tokens.
+    """
+    failed, fallback = set(), set()
+    results, _ = DISPATCHER.run(tasks, context)
+    for task, result in zip(tasks, results):
+        if result is None:
+            failed |= task.tokens
+        else:
+            failed |= result[0]
+            fallback |= result[1]
+    return failed, fallback - failed
+
+
+@flush_metrics
+@trace_invocation("batch_handler")
+def batch_handler(event, context):
+    """Entry point for SQS, Kinesis and EventBridge Pipes record batches.
+
+    Every record is processed in this invocation. Records whose handler
+    reports a failure, or that cannot be decoded, are returned in
+    ``batchItemFailures`` so only they are redelivered. Unsupported events
+    count as processed.
+
+    Each event is first planned into a TaggingOperation (see operations),
+    which decides how it is tagged. EC2 events are not sent through their
+    per-event handlers; their resource
+    IDs are coalesced into as few CreateTags calls as possible. A call that
+    fails with NotFound falls back to the per-event handlers of its events. With
+    BULK_TAGGING_ENABLED, ARN-addressable resources are tagged through the
+    Resource Groups Tagging API instead, falling back to the per-service
+    handler for any resource the bulk path may not tag.
+
+    All resulting operations run concurrently on the dispatcher; records
+    whose operations could not start before the deadline are redelivered.
+
+    Events whose eventID was already tagged successfully, by an earlier
+    invocation or earlier in this batch, are skipped without any AWS call.
+
+    Events whose resource was not found yet are deferred (see
+    delayed_retry) and do not fail their record. Short delays are retried
+    after the batch, before this invocation returns.
+
+    With DRY_RUN, each planned operation is logged and nothing is executed
+    or marked processed.
+    """
+    set_deadline(context)
+    delayed_retries = begin_delayed_retries()
+    failed = set()
+    coalescer = CreateTagsCoalescer()
+    bulk = BulkArnTagger()
+    tasks = []
+    deferred = {}
+    # item_id -> (eventName, resource count) for events tagged outside a handler
+    bulk_counts = {}
+    event_ids = {}
+    batch_event_ids = set()
+    records = list(iter_batch_records(event))
+    logger.info("Batch received: %d records", len(records))
+
+    for item_id, record_event in records:
+        if record_event is None:
+            logger.error("Could not decode batch record %s", item_id)
+            failed.add(item_id)
+            continue
+        try:
+            event_id = _event_id(record_event)
+            if _is_duplicate(event_id):
+                continue
+            if event_id and event_id in batch_event_ids:
+                logger.info("Skipping duplicate event %s within batch", event_id)
+                continue
+            if event_id:
+                batch_event_ids.add(event_id)
+                event_ids[item_id] = event_id
+            key, handler, detail, tags = prepare_event(record_event)
+            if handler is None:
+                continue
+            operation = plan_operation(key, detail, tags, event_id)
+            if operation is None:
+                logger.warning("No resource IDs found in %s event", key[1])
+                continue
+            if DRY_RUN:
+                _log_plan(operation)
+                event_ids.pop(item_id, None)
+                continue
+            if operation.service == "ec2":
+                coalescer.add(item_id, operation.region, operation.resource_ids, operation.tags, operation.account)
+                bulk_counts[item_id] = (key[1], len(operation.resource_ids))
+                deferred[item_id] = (handler, detail, operation)
+            elif BULK_TAGGING_ENABLED and key in BULK_TAGGABLE_EVENTS:
+                bulk.add(item_id, operation.region, operation.resource_ids, operation.tags, operation.account)
+                bulk_counts[item_id] = (key[1], len(operation.resource_ids))
+                deferred[item_id] = (handler, detail, operation)
+            else:
+                tasks.append(_handler_task(item_id, handler, detail, operation))
+        except Exception as e:
+            logger.error("Unexpected error processing batch record %s: %s", item_id, str(e), exc_info=True)
+            failed.add(item_id)
+
+    tasks.extend(coalescer.tasks())
+    tasks.extend(bulk.tasks())
+    dispatch_failed, fallback = _dispatch(tasks, context)
+    failed |= dispatch_failed
+    if fallback:
+        fallback_failed, _ = _dispatch([_handler_task(i, *deferred[i]) for i in fallback], context)
+        failed |= fallback_failed
+    delayed_retries.drain(_run_delayed_retry)
+
+    for item_id, (event_name, count) in bulk_counts.items():
+        if item_id not in failed and item_id not in fallback:
+            METRICS.add("ResourcesTagged", count, EventName=event_name)
+
+    for item_id, event_id in event_ids.items():
+        if item_id not in failed:
+            _mark_processed(event_id)
+
+    limited = {name: stats for name, stats in RATE_LIMITER.stats().items() if stats["waited"]}
+    if limited:
+        logger.info("Rate limiter buckets that queued calls (since container start): %s", json.dumps(limited))
+
+    failed_ids = []
+    for item_id, record_event in records:
+        if item_id in failed:
+            failed_ids.append(item_id)
+            log_event_failure(record_event, f"batch record {item_id}")
+    if failed_ids:
+        logger.warning("Batch finished with %d/%d failed records", len(failed_ids), len(records))
+    return batch_response(failed_ids)
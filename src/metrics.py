@@ -0,0 +1,142 @@
+"""CloudWatch Embedded Metric Format (EMF) metrics for tagging operations.
+
+Metrics are buffered in memory and written to stdout as EMF JSON lines once
+per invocation; CloudWatch Logs turns them into metrics with no extra API
+calls. Values for the same metric and dimensions are combined: counts are
+summed, other units are kept as value arrays so CloudWatch can compute
+percentiles.
+
+Metrics emitted:
+    HandlerLatency (ms), TaggingErrors, ResourcesTagged  by EventName (+ ErrorCode)
+    ApiCalls, ApiLatency (ms), Throttles                 by Service, Operation
+    Retries                                              by ErrorKind
+"""
+
+import functools
+import json
+import os
+import sys
+import threading
+import time
+
+METRICS_ENABLED = os.environ.get("METRICS_ENABLED", "true").lower() == "true"
+METRICS_NAMESPACE = os.environ.get("METRICS_NAMESPACE", "AutoTag")
+
+COUNT = "Count"
+MILLISECONDS = "Milliseconds"
+
+# EMF limit on values per metric in one document
+MAX_VALUES_PER_METRIC = 100
+
+
+class MetricsBuffer:
+    """Thread-safe metric buffer that flushes as EMF documents.
+
+    Args:
+        namespace: CloudWatch namespace.
+        enabled: When False, add() and flush() do nothing.
+        stream: Where EMF lines are written; defaults to sys.stdout at flush time.
+    """
+
+    def __init__(self, namespace=METRICS_NAMESPACE, enabled=True, stream=None):
+        self.namespace = namespace
+        self.enabled = enabled
+        self.stream = stream
+        self._lock = threading.Lock()
+        # dimension items -> {metric name: (unit, [values])}
+        self._buffer = {}
+
+    @classmethod
+    def from_env(cls):
+        return cls(METRICS_NAMESPACE, METRICS_ENABLED)
+
+    def add(self, name, value, unit=COUNT, **dimensions):
+        """Record one value of a metric under the given dimensions."""
+        if not self.enabled:
+            return
+        key = tuple(sorted(dimensions.items()))
+        with self._lock:
+            metrics = self._buffer.setdefault(key, {})
+            entry = metrics.get(name)
+            if entry is None:
+                metrics[name] = entry = (unit, [])
+            entry[1].append(value)
+
+    def documents(self, timestamp_ms=None) -> list:
+        """Drain the buffer into EMF documents."""
+        with self._lock:
+            buffer, self._buffer = self._buffer, {}
+        timestamp_ms = int(time.time() * 1000) if timestamp_ms is None else timestamp_ms
+        docs = []
+        for key, metrics in buffer.items():
+            values = {}
+            for name, (unit, samples) in metrics.items():
+                if unit == COUNT:
+                    values[name] = (unit, [[sum(samples)]])
+                else:
+                    values[name] = (unit, [samples[i:i + MAX_VALUES_PER_METRIC]
+                                           for i in range(0, len(samples), MAX_VALUES_PER_METRIC)])
+            pages = max(len(chunks) for _, chunks in values.values())
+            for page in range(pages):
+                doc = dict(key)
+                definitions = []
+                for name, (unit, chunks) in values.items():
+                    if page >= len(chunks):
+                        continue
+                    chunk = chunks[page]
+                    doc[name] = chunk[0] if len(chunk) == 1 else chunk
+                    definitions.append({"Name": name, "Unit": unit})
+                doc["_aws"] = {
+                    "Timestamp": timestamp_ms,
+                    "CloudWatchMetrics": [{
+                        "Namespace": self.namespace,
+                        "Dimensions": [[k for k, _ in key]],
+                        "Metrics": definitions,
+                    }],
+                }
+                docs.append(doc)
+        return docs
+
+    def flush(self) -> int:
+        """Write buffered metrics as EMF lines and return how many were written."""
+        if not self.enabled:
+            return 0
+        docs = self.documents()
+        if docs:
+            stream = self.stream or sys.stdout
+            stream.write("".join(json.dumps(doc) + "\n" for doc in docs))
+            stream.flush()
+        return len(docs)
+
+    def api_call_hooks(self, service, throttle_codes):
+        """Return (before_call, after_call) botocore handlers that time each API call."""
+        def before_call(model, context=None, **kwargs):
+            if context is not None:
+                context["autotag_call_start"] = time.perf_counter()
+
+        def after_call(model, parsed=None, context=None, **kwargs):
+            start = context.get("autotag_call_start") if context is not None else None
+            operation = model.name
+            self.add("ApiCalls", 1, Service=service, Operation=operation)
+            if start is not None:
+                self.add("ApiLatency", (time.perf_counter() - start) * 1000.0, MILLISECONDS,
+                         Service=service, Operation=operation)
+            code = (parsed or {}).get("Error", {}).get("Code")
+            if code in throttle_codes:
+                self.add("Throttles", 1, Service=service, Operation=operation)
+
+        return before_call, after_call
+
+
+METRICS = MetricsBuffer.from_env()
+
+
+def flush_metrics(func):
+    """Decorator for Lambda entry points: flush METRICS when the invocation ends."""
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        try:
+            return func(*args, **kwargs)
+        finally:
+            METRICS.flush()
+    return wrapper
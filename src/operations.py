@@ -0,0 +1,98 @@
+"""Planned tagging operations: what an event will tag, decided before any AWS call.
+
+Handling an event has two stages. The planner turns the event's detail and
+tag set into a TaggingOperation: which boto3 client and tagging API it
+needs, the region and account, the resource IDs from the event's
+extractor, and a reference to the shared tag set. The executor, which is
+the service handler, then makes the calls. Batch and backfill callers
+route and group the small immutable operations rather than re-reading
+nested event dicts. A dry run prints the plan and stops there.
+"""
+
+from collections.abc import Mapping
+from typing import NamedTuple, Optional
+try:
+    from resource_extractors import EXTRACTORS
+except ImportError:
+    from src.resource_extractors import EXTRACTORS
+
+# (eventSource, eventName) -> (boto3 client name, tagging API the handler calls)
+TAG_APIS = {
+    ("ec2.amazonaws.com", "RunInstances"): ("ec2", "CreateTags"),
+    ("ec2.amazonaws.com", "CreateSecurityGroup"): ("ec2", "CreateTags"),
+    ("ec2.amazonaws.com", "CreateImage"): ("ec2", "CreateTags"),
+    ("ec2.amazonaws.com", "CreateVolume"): ("ec2", "CreateTags"),
+    ("ec2.amazonaws.com", "CreateSnapshot"): ("ec2", "CreateTags"),
+    ("ec2.amazonaws.com", "AllocateAddress"): ("ec2", "CreateTags"),
+    ("ec2.amazonaws.com", "CreateNetworkInterface"): ("ec2", "CreateTags"),
+    ("ec2.amazonaws.com", "CreateVpc"): ("ec2", "CreateTags"),
+    ("ec2.amazonaws.com", "CreateSubnet"): ("ec2", "CreateTags"),
+    ("ec2.amazonaws.com", "CreateInternetGateway"): ("ec2", "CreateTags"),
+    ("ec2.amazonaws.com", "CreateNatGateway"): ("ec2", "CreateTags"),
+    ("s3.amazonaws.com", "CreateBucket"): ("s3", "PutBucketTagging"),
+    ("rds.amazonaws.com", "CreateDBInstance"): ("rds", "AddTagsToResource"),
+    ("rds.amazonaws.com", "CreateDBCluster"): ("rds", "AddTagsToResource"),
+    ("dynamodb.amazonaws.com", "CreateTable"): ("dynamodb", "TagResource"),
+    ("lambda.amazonaws.com", "CreateFunction20150331"): ("lambda", "TagResource"),
+    ("elasticloadbalancing.amazonaws.com", "CreateLoadBalancer"): ("elbv2", "AddTags"),
+    ("elasticloadbalancing.amazonaws.com", "CreateTargetGroup"): ("elbv2", "AddTags"),
+    ("elasticfilesystem.amazonaws.com", "CreateFileSystem"): ("efs", "TagResource"),
+    ("sns.amazonaws.com", "CreateTopic"): ("sns", "TagResource"),
+    ("sqs.amazonaws.com", "CreateQueue"): ("sqs", "TagQueue"),
+    ("secretsmanager.amazonaws.com", "CreateSecret"): ("secretsmanager", "TagResource"),
+    ("es.amazonaws.com", "CreateDomain"): ("opensearch", "AddTags"),
+    ("ecs.amazonaws.com", "CreateCluster"): ("ecs", "TagResource"),
+    ("states.amazonaws.com", "CreateStateMachine"): ("stepfunctions", "TagResource"),
+}
+
+
+class TaggingOperation(NamedTuple):
+    """One event's tagging work.
+
+    A NamedTuple keeps each operation a compact immutable tuple with no
+    per-instance dict. tags is the event's TagSet, shared with every
+    operation from the same principal and second, never a copy.
+    """
+    service: str
+    api: str
+    region: Optional[str]
+    account: Optional[str]
+    resource_ids: tuple
+    tags: Mapping
+    event_id: Optional[str]
+    key: tuple
+
+    def describe(self) -> dict:
+        """JSON-safe description, as printed by a dry run."""
+        return {
+            "eventID": self.event_id,
+            "event": f"{self.key[0]}:{self.key[1]}",
+            "api": f"{self.service}:{self.api}",
+            "region": self.region,
+            "account": self.account,
+            "resources": list(self.resource_ids),
+            "tags": dict(self.tags),
+        }
+
+
+def plan_operation(key, detail, tags, event_id=None) -> Optional[TaggingOperation]:
+    """Plan the tagging of the resources one event created.
+
+    Args:
+        key: (eventSource, eventName); must be in TAG_APIS.
+        detail: The CloudTrail event detail.
+        tags: The event's tag set.
+        event_id: Identifies the event in the plan; defaults to detail's eventID.
+
+    Returns:
+        The operation, or None when the event names no resource.
+    """
+    resource_ids = EXTRACTORS[key](detail)
+    if not resource_ids:
+        return None
+    service, api = TAG_APIS[key]
+    return TaggingOperation(
+        service, api, detail.get("awsRegion") or None, detail.get("recipientAccountId") or None,
+        tuple(resource_ids), tags, event_id if event_id is not None else detail.get("eventID"), key,
+    )
+
@@ -0,0 +1,164 @@
+"""Client-side token-bucket rate limiting for AWS API calls.
+
+One bucket per (service, region, API). A burst of events drains the bucket
+and then waits for refill, instead of sending every call at once and
+reacting to RequestLimitExceeded afterwards.
+
+Rates are configured with the RATE_LIMITS environment variable, a comma
+separated list of ``service:Operation=rate[/burst]`` entries, e.g.
+``ec2:CreateTags=10/50,tag:TagResources=5``. ``service:*`` sets the
+default for every operation of a service. Configured entries, specific or
+``service:*``, take precedence over the built-in DEFAULT_RATES.
+"""
+
+import logging
+import os
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+# (requests per second, burst) per (service, operation). Defaults follow the
+# documented AWS limits: EC2 mutating-action bucket (200, 5/s refill),
+# Resource Groups Tagging API TagResources (5/s), CloudTrail LookupEvents (2/s).
+DEFAULT_RATES = {
+    ("ec2", "CreateTags"): (5.0, 200),
+    ("ec2", "*"): (5.0, 200),
+    ("resourcegroupstaggingapi", "TagResources"): (5.0, 5),
+    ("resourcegroupstaggingapi", "GetResources"): (10.0, 10),
+    ("rds", "AddTagsToResource"): (10.0, 20),
+    ("elbv2", "AddTags"): (10.0, 20),
+    ("s3", "GetBucketTagging"): (50.0, 100),
+    ("s3", "PutBucketTagging"): (50.0, 100),
+    ("cloudtrail", "LookupEvents"): (2.0, 2),
+}
+FALLBACK_RATE = (10.0, 20)
+
+
+def parse_rate_limits(spec: str) -> dict:
+    """Parse a RATE_LIMITS string into {(service, operation): (rate, burst)}.
+
+    "tag" is accepted as an alias for "resourcegroupstaggingapi". A missing
+    burst defaults to max(1, rate).
+    """
+    rates = {}
+    for entry in (spec or "").split(","):
+        entry = entry.strip()
+        if not entry:
+            continue
+        name, _, value = entry.partition("=")
+        service, _, operation = name.partition(":")
+        rate, _, burst = value.partition("/")
+        if service == "tag":
+            service = "resourcegroupstaggingapi"
+        rate = float(rate)
+        rates[(service, operation or "*")] = (rate, float(burst) if burst else max(1.0, rate))
+    return rates
+
+
+class TokenBucket:
+    """Thread-safe token bucket. acquire() blocks until a token is available."""
+
+    def __init__(self, rate: float, burst: float):
+        self.rate = rate
+        self.burst = burst
+        self._tokens = burst
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+        self.acquired = 0
+        self.waited = 0
+        self.wait_total = 0.0
+        self.wait_max = 0.0
+        self.queue_depth = 0
+        self.max_queue_depth = 0
+
+    def acquire(self) -> float:
+        """Take one token, waiting for refill if needed. Returns seconds waited."""
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            # Reserve the token up front; a negative balance is the queue ahead of us
+            self._tokens -= 1
+            self.acquired += 1
+            wait = -self._tokens / self.rate if self._tokens < 0 else 0.0
+            if wait:
+                self.waited += 1
+                self.wait_total += wait
+                self.wait_max = max(self.wait_max, wait)
+                self.queue_depth += 1
+                self.max_queue_depth = max(self.max_queue_depth, self.queue_depth)
+        if wait:
+            time.sleep(wait)
+            with self._lock:
+                self.queue_depth -= 1
+        return wait
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "rate": self.rate,
+                "burst": self.burst,
+                "acquired": self.acquired,
+                "waited": self.waited,
+                "wait_ms_total": round(self.wait_total * 1000.0, 3),
+                "wait_ms_max": round(self.wait_max * 1000.0, 3),
+                "queue_depth": self.queue_depth,
+                "max_queue_depth": self.max_queue_depth,
+            }
+
+
+class RateLimiter:
+    """Registry of token buckets keyed by (service, region, operation).
+
+    rates holds the configured entries; DEFAULT_RATES applies only where no
+    configured entry, specific or wildcard, covers an operation.
+    """
+
+    def __init__(self, rates: dict = None):
+        self.rates = dict(rates or {})
+        self._buckets = {}
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_env(cls):
+        return cls(parse_rate_limits(os.environ.get("RATE_LIMITS", "")))
+
+    def _rate_for(self, service, operation):
+        for table in (self.rates, DEFAULT_RATES):
+            rate = table.get((service, operation)) or table.get((service, "*"))
+            if rate:
+                return rate
+        return FALLBACK_RATE
+
+    def bucket(self, service, region, operation) -> TokenBucket:
+        key = (service, region, operation)
+        bucket = self._buckets.get(key)
+        if bucket is None:
+            with self._lock:
+                bucket = self._buckets.get(key)
+                if bucket is None:
+                    bucket = self._buckets[key] = TokenBucket(*self._rate_for(service, operation))
+        return bucket
+
+    def acquire(self, service, region, operation) -> float:
+        """Block until a call to operation is allowed. Returns seconds waited."""
+        wait = self.bucket(service, region, operation).acquire()
+        if wait > 1.0:
+            logger.warning("Rate limiter held %s:%s in %s for %.2fs", service, operation, region, wait)
+        return wait
+
+    def hook(self, service, region):
+        """Return a botocore before-call handler that rate-limits a client's calls."""
+        def before_call(model, **kwargs):
+            self.acquire(service, region, model.name)
+        return before_call
+
+    def stats(self) -> dict:
+        """Per-bucket counters keyed by "service:Operation@region"."""
+        with self._lock:
+            buckets = dict(self._buckets)
+        return {f"{s}:{op}@{r}": b.stats() for (s, r, op), b in buckets.items()}
+
+
+RATE_LIMITER = RateLimiter.from_env()
@@ -0,0 +1,261 @@
+"""Scheduled repair of AutoTag tags that were deleted after creation.
+
+The event-driven path tags a resource once. If someone later removes its
+Owner, CreatedBy or CreationDate tag, nothing notices. The reconciler pages
+through the Resource Groups Tagging API's GetResources in every configured
+region, several regions at a time, and works out which of the standard keys
+each resource is missing. It then writes only those keys. Writes go through
+BulkArnTagger, which groups resources needing the same tags into
+TagResources calls of up to 20 ARNs.
+
+Expected values come from the tags that are still there: the Owner for a
+CreatedBy ARN is derived the same way the event path derives it. With
+CloudTrail lookup enabled, a resource without CreatedBy or CreationDate is
+resolved from its creation event, if that is still within CloudTrail's
+90-day event history. Keys that are present are never changed, even if
+their value was edited.
+
+Resources are streamed page by page and pending writes are flushed every
+RECONCILE_MAX_PENDING resources, so memory use does not grow with the
+number of resources in the account.
+
+Usage:
+    python reconciler.py --regions us-east-1,eu-west-1 --cloudtrail-lookup
+"""
+
+import argparse
+import contextvars
+import json
+import logging
+import os
+import sys
+from concurrent.futures import ThreadPoolExecutor
+try:
+    from account_credentials import get_account_client
+    from bulk_tagger import BulkArnTagger
+    from config import SERVICE_HANDLERS
+    from deadline import set_deadline, remaining_seconds
+    from identity import extract_owner, identity_from_arn
+    from metrics import METRICS, flush_metrics
+    from retry import call_with_retry
+except ImportError:
+    from src.account_credentials import get_account_client
+    from src.bulk_tagger import BulkArnTagger
+    from src.config import SERVICE_HANDLERS
+    from src.deadline import set_deadline, remaining_seconds
+    from src.identity import extract_owner, identity_from_arn
+    from src.metrics import METRICS, flush_metrics
+    from src.retry import call_with_retry
+
+logger = logging.getLogger(__name__)
+
+RECONCILE_REGIONS = os.environ.get("RECONCILE_REGIONS", "")
+RECONCILE_WORKERS = int(os.environ.get("RECONCILE_WORKERS", "4"))
+RECONCILE_PAGE_SIZE = int(os.environ.get("RECONCILE_PAGE_SIZE", "100"))
+RECONCILE_MAX_PENDING = int(os.environ.get("RECONCILE_MAX_PENDING", "500"))
+RECONCILE_CLOUDTRAIL_LOOKUP = os.environ.get("RECONCILE_CLOUDTRAIL_LOOKUP", "false").lower() == "true"
+# Stop starting new pages when less time than this remains
+RECONCILE_DEADLINE_MARGIN = 30.0
+
+STANDARD_KEYS = ("Owner", "CreatedBy", "CreationDate")
+
+# GetResources type filters for every resource SERVICE_HANDLERS tags
+RESOURCE_TYPES = (
+    "ec2:instance", "ec2:volume", "ec2:snapshot", "ec2:image", "ec2:security-group", "ec2:elastic-ip",
+    "ec2:network-interface", "ec2:vpc", "ec2:subnet", "ec2:internet-gateway", "ec2:natgateway",
+    "s3", "rds:db", "rds:cluster", "dynamodb:table", "lambda:function",
+    "elasticloadbalancing:loadbalancer", "elasticloadbalancing:targetgroup",
+    "elasticfilesystem:file-system", "sns", "sqs", "secretsmanager:secret", "es:domain",
+    "ecs:cluster", "states:stateMachine",
+)
+CREATE_EVENTS = frozenset(SERVICE_HANDLERS)
+
+
+def iter_resources(client, resource_types=RESOURCE_TYPES, page_size=RECONCILE_PAGE_SIZE):
+    """Yield (arn, {key: value}) for every resource GetResources returns, one page at a time.
+
+    A failed page ends a botocore page iterator, so each page is fetched by
+    a pagination started at the previous page's token. A retry of that page
+    then resumes where the scan stopped.
+
+    Raises:
+        TimeoutError: When the invocation deadline is too close for another page.
+    """
+    paginator = client.get_paginator("get_resources")
+    kwargs = {"ResourcesPerPage": page_size, "ResourceTypeFilters": list(resource_types)}
+    token = None
+    while True:
+        remaining = remaining_seconds()
+        if remaining is not None and remaining < RECONCILE_DEADLINE_MARGIN:
+            raise TimeoutError(f"{remaining:.0f}s left before the deadline")
+        config = {"StartingToken": token} if token else {}
+        page = call_with_retry(lambda: next(iter(paginator.paginate(PaginationConfig=config, **kwargs))))
+        for mapping in page.get("ResourceTagMappingList", []):
+            yield mapping["ResourceARN"], {t["Key"]: t["Value"] for t in mapping.get("Tags", [])}
+        token = page.get("PaginationToken")
+        if not token:
+            return
+
+
+class CloudTrailLookup:
+    """Finds a resource's creation event in the CloudTrail event history."""
+
+    def __init__(self, max_pages=3):
+        self.max_pages = max_pages
+
+    def creation_detail(self, region, arn, account=None):
+        """Return the CloudTrail detail of the event that created arn, or None."""
+        client = get_account_client("cloudtrail", region, account)
+        short = arn.rsplit("/", 1)[-1].rsplit(":", 1)[-1]
+        for name in dict.fromkeys((short, arn)):
+            found, token = None, None
+            for _ in range(self.max_pages):
+                kwargs = {"LookupAttributes": [{"AttributeKey": "ResourceName", "AttributeValue": name}]}
+                if token:
+                    kwargs["NextToken"] = token
+                response = call_with_retry(lambda: client.lookup_events(**kwargs))
+                for event in response.get("Events", []):
+                    # Newest first, so the last match is the creation
+                    if (event.get("EventSource"), event.get("EventName")) in CREATE_EVENTS:
+                        found = event
+                token = response.get("NextToken")
+                if not token:
+                    break
+            if found is not None:
+                return json.loads(found["CloudTrailEvent"])
+        return None
+
+
+def expected_tags(current: dict, lookup=None, region=None, arn=None, account=None) -> dict:
+    """Return the standard tag values a resource with tags current should have.
+
+    Only the keys that can be resolved are returned.
+    """
+    expected = {}
+    created_by = current.get("CreatedBy")
+    if created_by:
+        expected["Owner"] = extract_owner(identity_from_arn(created_by))
+    if lookup is not None and (not created_by or "CreationDate" not in current):
+        detail = lookup.creation_detail(region, arn, account)
+        if detail:
+            identity = detail.get("userIdentity") or {}
+            expected = {
+                "Owner": extract_owner(identity),
+                "CreatedBy": identity.get("arn", "Unknown"),
+                "CreationDate": detail.get("eventTime", ""),
+            }
+    return expected
+
+
+def missing_tags(current: dict, expected: dict) -> dict:
+    """Return the standard keys absent from current that expected can fill."""
+    return {key: expected[key] for key in STANDARD_KEYS if key not in current and key in expected}
+
+
+class Reconciler:
+    """Restores missing standard tags across regions.
+
+    Args:
+        regions: Regions to scan.
+        account: Member account to scan through CROSS_ACCOUNT_ROLE_NAME, or
+            None for this function's own account.
+        lookup: CloudTrailLookup for resources whose remaining tags are not
+            enough, or None.
+        workers: Regions scanned at the same time.
+        max_pending: Resources buffered for tagging before a flush.
+        page_size: Resources per GetResources page.
+    """
+
+    def __init__(self, regions, account=None, lookup=None, workers=RECONCILE_WORKERS,
+                 max_pending=RECONCILE_MAX_PENDING, page_size=RECONCILE_PAGE_SIZE):
+        self.regions = list(regions)
+        self.account = account
+        self.lookup = lookup
+        self.workers = workers
+        self.max_pending = max_pending
+        self.page_size = page_size
+
+    def run(self) -> dict:
+        """Reconcile every region and return {region: stats}."""
+        with ThreadPoolExecutor(max_workers=max(1, min(self.workers, len(self.regions))),
+                                thread_name_prefix="autotag-reconcile") as pool:
+            futures = {region: pool.submit(contextvars.copy_context().run, self.reconcile_region, region)
+                       for region in self.regions}
+        return {region: future.result() for region, future in futures.items()}
+
+    def reconcile_region(self, region) -> dict:
+        stats = {"scanned": 0, "drifted": 0, "tagged": 0, "failed": 0, "unresolved": 0, "complete": True}
+        tagger = BulkArnTagger()
+        client = get_account_client("resourcegroupstaggingapi", region, self.account)
+        try:
+            for arn, current in iter_resources(client, page_size=self.page_size):
+                stats["scanned"] += 1
+                if all(key in current for key in STANDARD_KEYS):
+                    continue
+                stats["drifted"] += 1
+                missing = missing_tags(current, expected_tags(current, self.lookup, region, arn, self.account))
+                if not missing:
+                    stats["unresolved"] += 1
+                    continue
+                tagger.add(arn, region, [arn], missing, self.account)
+                if len(tagger) >= self.max_pending:
+                    self._flush(tagger, stats)
+        except TimeoutError as e:
+            logger.warning("Stopping reconciliation of %s early: %s", region, str(e))
+            stats["complete"] = False
+        except Exception as e:
+            logger.error("Reconciliation of %s failed: %s", region, str(e), exc_info=True)
+            stats["complete"] = False
+        self._flush(tagger, stats)
+        METRICS.add("TagsReconciled", stats["tagged"], Region=region)
+        logger.info("Reconciled %s: %s", region, json.dumps(stats))
+        return stats
+
+    def _flush(self, tagger, stats):
+        pending = len(tagger)
+        if not pending:
+            return
+        failed, fallback = tagger.flush()
+        # Tokens are ARNs; anything the bulk API could not tag counts as failed here
+        stats["failed"] += len(failed | fallback)
+        stats["tagged"] += pending - len(failed | fallback)
+
+
+def _regions(value, default):
+    regions = [r.strip() for r in (value or "").split(",") if r.strip()]
+    return regions or [default]
+
+
+@flush_metrics
+def handler(event, context):
+    """Entry point for the scheduled reconciler Lambda.
+
+    event may override "regions" (a list) and "account".
+    """
+    set_deadline(context)
+    event = event if isinstance(event, dict) else {}
+    regions = event.get("regions") or _regions(RECONCILE_REGIONS, os.environ.get("AWS_REGION", "us-east-1"))
+    lookup = CloudTrailLookup() if RECONCILE_CLOUDTRAIL_LOOKUP else None
+    return Reconciler(regions, account=event.get("account"), lookup=lookup).run()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Restore missing AutoTag tags across regions.")
+    parser.add_argument("--regions", default=RECONCILE_REGIONS, help="comma-separated regions")
+    parser.add_argument("--account", default=None, help="member account to scan through the cross-account role")
+    parser.add_argument("--cloudtrail-lookup", action="store_true", default=RECONCILE_CLOUDTRAIL_LOOKUP,
+                        help="resolve resources without CreatedBy from their CloudTrail creation event")
+    parser.add_argument("--workers", type=int, default=RECONCILE_WORKERS, help="regions scanned concurrently")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
+    regions = _regions(args.regions, os.environ.get("AWS_REGION", "us-east-1"))
+    lookup = CloudTrailLookup() if args.cloudtrail_lookup else None
+    stats = Reconciler(regions, account=args.account, lookup=lookup, workers=args.workers).run()
+    METRICS.flush()
+    print(json.dumps(stats, indent=2))
+    return 0 if all(s["complete"] and not s["failed"] for s in stats.values()) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,171 +1,130 @@
-"""Pure resource ID extraction functions for each supported event.
+"""Declarative resource ID extraction for each supported event.
 
-These functions extract resource identifiers from CloudTrail event details
-without making any AWS API calls, making them testable in isolation.
-"""
-
-
-def _safe_get(d, *keys):
-    """Safely traverse nested dicts, returning None if any key is missing or value is None."""
-    current = d
-    for key in keys:
-        if not isinstance(current, dict):
-            return None
-        current = current.get(key)
-        if current is None:
-            return None
-    return current
-
-
-def extract_ec2_run_instances_ids(detail):
-    """Extract instance IDs and volume IDs from RunInstances."""
-    items = _safe_get(detail, "responseElements", "instancesSet", "items")
-    if not isinstance(items, list):
-        return []
-    ids = []
-    for item in items:
-        if not isinstance(item, dict):
-            continue
-        iid = item.get("instanceId")
-        if iid:
-            ids.append(iid)
-        bd_items = _safe_get(item, "blockDeviceMapping", "items")
-        if isinstance(bd_items, list):
-            for bd in bd_items:
-                if isinstance(bd, dict):
-                    vid = _safe_get(bd, "ebs", "volumeId")
-                    if vid:
-                        ids.append(vid)
-    return ids
-
-
-def extract_ec2_create_security_group_id(detail):
-    return _safe_get(detail, "responseElements", "groupId")
-
-
-def extract_ec2_create_image_id(detail):
-    return _safe_get(detail, "responseElements", "imageId")
-
-
-def extract_ec2_create_volume_id(detail):
-    return _safe_get(detail, "responseElements", "volumeId")
-
-
-def extract_ec2_create_snapshot_id(detail):
-    return _safe_get(detail, "responseElements", "snapshotId")
-
-
-def extract_ec2_allocate_address_id(detail):
-    return _safe_get(detail, "responseElements", "allocationId")
-
-
-def extract_ec2_create_network_interface_id(detail):
-    return _safe_get(detail, "responseElements", "networkInterface", "networkInterfaceId")
-
-
-def extract_ec2_create_vpc_id(detail):
-    return _safe_get(detail, "responseElements", "vpc", "vpcId")
-
-
-def extract_ec2_create_subnet_id(detail):
-    return _safe_get(detail, "responseElements", "subnet", "subnetId")
-
-
-def extract_ec2_create_internet_gateway_id(detail):
-    return _safe_get(detail, "responseElements", "internetGateway", "internetGatewayId")
-
-
-def extract_ec2_create_nat_gateway_id(detail):
-    return _safe_get(detail, "responseElements", "natGateway", "natGatewayId")
-
-
-def extract_s3_create_bucket_name(detail):
-    return _safe_get(detail, "requestParameters", "bucketName")
-
-
-def extract_rds_create_db_instance_arn(detail):
-    return _safe_get(detail, "responseElements", "dBInstanceArn")
-
-
-def extract_rds_create_db_cluster_arn(detail):
-    return _safe_get(detail, "responseElements", "dBClusterArn")
-
-
-def extract_dynamodb_create_table_arn(detail):
-    return _safe_get(detail, "responseElements", "tableDescription", "tableArn")
-
-
-def extract_lambda_create_function_arn(detail):
-    return _safe_get(detail, "responseElements", "functionArn")
-
-
-def extract_elb_create_load_balancer_arn(detail):
-    lbs = _safe_get(detail, "responseElements", "loadBalancers")
-    if not isinstance(lbs, list) or not lbs:
-        return None
-    return lbs[0].get("loadBalancerArn") if isinstance(lbs[0], dict) else None
-
-
-def extract_elb_create_target_group_arn(detail):
-    tgs = _safe_get(detail, "responseElements", "targetGroups")
-    if not isinstance(tgs, list) or not tgs:
-        return None
-    return tgs[0].get("targetGroupArn") if isinstance(tgs[0], dict) else None
-
-
-def extract_efs_create_file_system_id(detail):
-    return _safe_get(detail, "responseElements", "fileSystemId")
-
-
-def extract_sns_create_topic_arn(detail):
-    return _safe_get(detail, "responseElements", "topicArn")
-
-
-def extract_sqs_create_queue_url(detail):
-    return _safe_get(detail, "responseElements", "queueUrl")
-
-
-def extract_secretsmanager_create_secret_arn(detail):
-    return _safe_get(detail, "responseElements", "aRN")
-
-
-def extract_opensearch_create_domain_arn(detail):
-    return _safe_get(detail, "responseElements", "domainStatus", "aRN")
-
-
-def extract_ecs_create_cluster_arn(detail):
-    return _safe_get(detail, "responseElements", "cluster", "clusterArn")
+Every (eventSource, eventName) has an ExtractionSpec: one or more paths into
+the CloudTrail detail, and the kind of identifier they lead to. A path is a
+dotted key list where ``name[*]`` fans out over every element of a list, so
+``responseElements.loadBalancers[*].loadBalancerArn`` yields the ARN of each
+load balancer in the response.
 
+At import time each spec is compiled into a specialized function with the
+keys inlined, so extracting IDs never walks a generic path per event. The
+compiled extractors make no AWS API calls and always return a list of IDs.
+"""
 
-def extract_stepfunctions_create_state_machine_arn(detail):
-    return _safe_get(detail, "responseElements", "stateMachineArn")
+from typing import NamedTuple
+
+# Identifier kinds
+EC2_ID = "ec2-id"
+ARN = "arn"
+BUCKET_NAME = "bucket-name"
+EFS_ID = "efs-id"
+QUEUE_URL = "queue-url"
+
+
+class ExtractionSpec(NamedTuple):
+    paths: tuple
+    kind: str
+
+
+EXTRACTION_SPECS = {
+    ("ec2.amazonaws.com", "RunInstances"): ExtractionSpec((
+        "responseElements.instancesSet.items[*].instanceId",
+        "responseElements.instancesSet.items[*].blockDeviceMapping.items[*].ebs.volumeId",
+    ), EC2_ID),
+    ("ec2.amazonaws.com", "CreateSecurityGroup"): ExtractionSpec(("responseElements.groupId",), EC2_ID),
+    ("ec2.amazonaws.com", "CreateImage"): ExtractionSpec(("responseElements.imageId",), EC2_ID),
+    ("ec2.amazonaws.com", "CreateVolume"): ExtractionSpec(("responseElements.volumeId",), EC2_ID),
+    ("ec2.amazonaws.com", "CreateSnapshot"): ExtractionSpec(("responseElements.snapshotId",), EC2_ID),
+    ("ec2.amazonaws.com", "AllocateAddress"): ExtractionSpec(("responseElements.allocationId",), EC2_ID),
+    ("ec2.amazonaws.com", "CreateNetworkInterface"):
+        ExtractionSpec(("responseElements.networkInterface.networkInterfaceId",), EC2_ID),
+    ("ec2.amazonaws.com", "CreateVpc"): ExtractionSpec(("responseElements.vpc.vpcId",), EC2_ID),
+    ("ec2.amazonaws.com", "CreateSubnet"): ExtractionSpec(("responseElements.subnet.subnetId",), EC2_ID),
+    ("ec2.amazonaws.com", "CreateInternetGateway"):
+        ExtractionSpec(("responseElements.internetGateway.internetGatewayId",), EC2_ID),
+    ("ec2.amazonaws.com", "CreateNatGateway"):
+        ExtractionSpec(("responseElements.natGateway.natGatewayId",), EC2_ID),
+    ("s3.amazonaws.com", "CreateBucket"): ExtractionSpec(("requestParameters.bucketName",), BUCKET_NAME),
+    ("rds.amazonaws.com", "CreateDBInstance"): ExtractionSpec(("responseElements.dBInstanceArn",), ARN),
+    ("rds.amazonaws.com", "CreateDBCluster"): ExtractionSpec(("responseElements.dBClusterArn",), ARN),
+    ("dynamodb.amazonaws.com", "CreateTable"):
+        ExtractionSpec(("responseElements.tableDescription.tableArn",), ARN),
+    ("lambda.amazonaws.com", "CreateFunction20150331"): ExtractionSpec(("responseElements.functionArn",), ARN),
+    ("elasticloadbalancing.amazonaws.com", "CreateLoadBalancer"):
+        ExtractionSpec(("responseElements.loadBalancers[*].loadBalancerArn",), ARN),
+    ("elasticloadbalancing.amazonaws.com", "CreateTargetGroup"):
+        ExtractionSpec(("responseElements.targetGroups[*].targetGroupArn",), ARN),
+    ("elasticfilesystem.amazonaws.com", "CreateFileSystem"):
+        ExtractionSpec(("responseElements.fileSystemId",), EFS_ID),
+    ("sns.amazonaws.com", "CreateTopic"): ExtractionSpec(("responseElements.topicArn",), ARN),
+    ("sqs.amazonaws.com", "CreateQueue"): ExtractionSpec(("responseElements.queueUrl",), QUEUE_URL),
+    ("secretsmanager.amazonaws.com", "CreateSecret"): ExtractionSpec(("responseElements.aRN",), ARN),
+    ("es.amazonaws.com", "CreateDomain"): ExtractionSpec(("responseElements.domainStatus.aRN",), ARN),
+    ("ecs.amazonaws.com", "CreateCluster"): ExtractionSpec(("responseElements.cluster.clusterArn",), ARN),
+    ("states.amazonaws.com", "CreateStateMachine"): ExtractionSpec(("responseElements.stateMachineArn",), ARN),
+}
 
 
-# Map of (eventSource, eventName) -> extractor function
-EXTRACTORS = {
-    ("ec2.amazonaws.com", "RunInstances"): extract_ec2_run_instances_ids,
-    ("ec2.amazonaws.com", "CreateSecurityGroup"): extract_ec2_create_security_group_id,
-    ("ec2.amazonaws.com", "CreateImage"): extract_ec2_create_image_id,
-    ("ec2.amazonaws.com", "CreateVolume"): extract_ec2_create_volume_id,
-    ("ec2.amazonaws.com", "CreateSnapshot"): extract_ec2_create_snapshot_id,
-    ("ec2.amazonaws.com", "AllocateAddress"): extract_ec2_allocate_address_id,
-    ("ec2.amazonaws.com", "CreateNetworkInterface"): extract_ec2_create_network_interface_id,
-    ("ec2.amazonaws.com", "CreateVpc"): extract_ec2_create_vpc_id,
-    ("ec2.amazonaws.com", "CreateSubnet"): extract_ec2_create_subnet_id,
-    ("ec2.amazonaws.com", "CreateInternetGateway"): extract_ec2_create_internet_gateway_id,
-    ("ec2.amazonaws.com", "CreateNatGateway"): extract_ec2_create_nat_gateway_id,
-    ("s3.amazonaws.com", "CreateBucket"): extract_s3_create_bucket_name,
-    ("rds.amazonaws.com", "CreateDBInstance"): extract_rds_create_db_instance_arn,
-    ("rds.amazonaws.com", "CreateDBCluster"): extract_rds_create_db_cluster_arn,
-    ("dynamodb.amazonaws.com", "CreateTable"): extract_dynamodb_create_table_arn,
-    ("lambda.amazonaws.com", "CreateFunction20150331"): extract_lambda_create_function_arn,
-    ("elasticloadbalancing.amazonaws.com", "CreateLoadBalancer"): extract_elb_create_load_balancer_arn,
-    ("elasticloadbalancing.amazonaws.com", "CreateTargetGroup"): extract_elb_create_target_group_arn,
-    ("elasticfilesystem.amazonaws.com", "CreateFileSystem"): extract_efs_create_file_system_id,
-    ("sns.amazonaws.com", "CreateTopic"): extract_sns_create_topic_arn,
-    ("sqs.amazonaws.com", "CreateQueue"): extract_sqs_create_queue_url,
-    ("secretsmanager.amazonaws.com", "CreateSecret"): extract_secretsmanager_create_secret_arn,
-    ("es.amazonaws.com", "CreateDomain"): extract_opensearch_create_domain_arn,
-    ("ecs.amazonaws.com", "CreateCluster"): extract_ecs_create_cluster_arn,
-    ("states.amazonaws.com", "CreateStateMachine"): extract_stepfunctions_create_state_machine_arn,
-}
+def parse_path(path: str) -> list:
+    """Split a spec path into (key, fan_out) steps.
+
+    Raises:
+        ValueError: If a segment is empty.
+    """
+    steps = []
+    for segment in path.split("."):
+        fan_out = segment.endswith("[*]")
+        key = segment[:-3] if fan_out else segment
+        if not key:
+            raise ValueError(f"Empty segment in extraction path: {path!r}")
+        steps.append((key, fan_out))
+    return steps
+
+
+def _path_source(steps, exit_stmt, indent=1, var=0) -> list:
+    """Emit statements that follow steps from variable v{var} and append each leaf to out."""
+    pad = "    " * indent
+    skip = exit_stmt if indent == 1 else "continue"
+    cur = f"v{var}"
+    lines = []
+    for n, (key, fan_out) in enumerate(steps):
+        lines.append(f"{pad}if not isinstance({cur}, dict): {skip}")
+        lines.append(f"{pad}{cur} = {cur}.get({key!r})")
+        if fan_out:
+            nxt = f"v{var + 1}"
+            lines.append(f"{pad}if not isinstance({cur}, list): {skip}")
+            lines.append(f"{pad}for {nxt} in {cur}:")
+            return lines + _path_source(steps[n + 1:], exit_stmt, indent + 1, var + 1)
+    lines.append(f"{pad}if {cur}: out.append({cur})")
+    return lines
+
+
+def compile_spec(spec: ExtractionSpec, name: str = "extract"):
+    """Compile an ExtractionSpec into a function detail -> list of IDs."""
+    if len(spec.paths) == 1:
+        body = _path_source(parse_path(spec.paths[0]), "return out")
+        source = [f"def {name}(v0):", "    out = []", *body, "    return out"]
+    else:
+        # One helper per path, so a missing key only ends that path
+        source = []
+        for n, path in enumerate(spec.paths):
+            source.append(f"def _path{n}(v0, out):")
+            source.extend(_path_source(parse_path(path), "return"))
+        source += [f"def {name}(v0):", "    out = []"]
+        source += [f"    _path{n}(v0, out)" for n in range(len(spec.paths))]
+        source.append("    return out")
+    namespace = {}
+    exec(compile("\n".join(source), f"<extractor {name}>", "exec"), namespace)
+    return namespace[name]
+
+
+def _function_name(key) -> str:
+    service = key[0].split(".", 1)[0].replace("-", "_")
+    return f"extract_{service}_{key[1]}"
+
+
+# Map of (eventSource, eventName) -> compiled extractor function
+EXTRACTORS = {key: compile_spec(spec, _function_name(key)) for key, spec in EXTRACTION_SPECS.items()}
+
+# Map of (eventSource, eventName) -> identifier kind
+ID_KINDS = {key: spec.kind for key, spec in EXTRACTION_SPECS.items()}
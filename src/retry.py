@@ -1,47 +1,164 @@
-"""Retry logic with exponential backoff for throttled AWS API calls."""
+"""Deadline-aware retries with jittered backoff for AWS API calls.
+
+Errors are classified as throttling, transient (5xx, connection problems),
+eventual-consistency NotFound, or fatal. Throttling and transient errors are
+retried here; NotFound is left to the caller, since waiting for propagation
+is better done by deferring the event (see delayed_retry) than by sleeping.
+Backoff uses full or decorrelated jitter so concurrent containers do not
+retry in lockstep, and the total sleep is capped by the time left before the
+invocation deadline.
+"""
 
-import time
 import logging
-from botocore.exceptions import ClientError
+import random
+import time
+try:
+    from deadline import remaining_seconds
+    from metrics import METRICS
+except ImportError:
+    from src.deadline import remaining_seconds
+    from src.metrics import METRICS
 
 logger = logging.getLogger(__name__)
 
-THROTTLE_ERROR_CODES = {"Throttling", "ThrottlingException", "RequestLimitExceeded"}
+THROTTLE_ERROR_CODES = {
+    "Throttling", "ThrottlingException", "RequestLimitExceeded", "TooManyRequestsException",
+    "ThrottledException", "RequestThrottled", "RequestThrottledException", "SlowDown",
+}
+TRANSIENT_ERROR_CODES = {
+    "InternalError", "InternalFailure", "InternalServiceError", "InternalServiceException",
+    "ServiceUnavailable", "ServiceUnavailableException", "RequestTimeout", "RequestTimeoutException",
+}
+# Tagging right after creation can race the resource's propagation
+NOT_FOUND_ERROR_CODES = {
+    "NatGatewayNotFound", "DBInstanceNotFound", "DBInstanceNotFoundFault", "DBClusterNotFoundFault",
+    "ResourceNotFoundException", "ResourceNotFoundFault", "NoSuchBucket", "FileSystemNotFound",
+    "LoadBalancerNotFound", "TargetGroupNotFound", "NotFoundException", "ClusterNotFoundException",
+    "StateMachineDoesNotExist", "AWS.SimpleQueueService.NonExistentQueue",
+}
+
+THROTTLE = "throttle"
+TRANSIENT = "transient"
+NOT_FOUND = "not_found"
+FATAL = "fatal"
+
+
+def error_code(error) -> str:
+    """Return the AWS error code of a botocore ClientError, or "" for anything else."""
+    response = getattr(error, "response", None)
+    if not isinstance(response, dict):
+        return ""
+    return response.get("Error", {}).get("Code", "")
+
+
+def classify_error(error) -> str:
+    """Classify an exception as THROTTLE, TRANSIENT, NOT_FOUND or FATAL."""
+    code = error_code(error)
+    if code:
+        if code in THROTTLE_ERROR_CODES:
+            return THROTTLE
+        if code in TRANSIENT_ERROR_CODES:
+            return TRANSIENT
+        if code.endswith(".NotFound") or code in NOT_FOUND_ERROR_CODES:
+            return NOT_FOUND
+        status = error.response.get("ResponseMetadata", {}).get("HTTPStatusCode", 0)
+        return TRANSIENT if status >= 500 else FATAL
+
+    # botocore is already imported if one of its exceptions is being classified
+    from botocore.exceptions import ConnectionError as BotoConnectionError, HTTPClientError
+
+    if isinstance(error, (BotoConnectionError, HTTPClientError)):
+        return TRANSIENT
+    return FATAL
+
+
+class RetryPolicy:
+    """Retry schedule with jittered exponential backoff and a deadline budget.
+
+    Args:
+        max_attempts: Total attempts including the first call.
+        base_delay: Initial backoff in seconds.
+        max_delay: Cap for a single backoff in seconds.
+        jitter: "full" (uniform in [0, base * 2^n]) or "decorrelated"
+            (uniform in [base, 3 * previous]).
+        deadline_margin: Seconds to keep in reserve before the invocation
+            deadline; a retry whose sleep would eat into it is not attempted.
+        retryable: Error classes to retry; anything else is raised at once.
+    """
+
+    def __init__(self, max_attempts=4, base_delay=0.2, max_delay=5.0, jitter="full", deadline_margin=1.0,
+                 retryable=(THROTTLE, TRANSIENT)):
+        if jitter not in ("full", "decorrelated"):
+            raise ValueError(f"Unknown jitter mode: {jitter}")
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.jitter = jitter
+        self.deadline_margin = deadline_margin
+        self.retryable = frozenset(retryable)
+
+    def backoff(self, attempt: int, previous: float) -> float:
+        """Seconds to sleep before retry number `attempt` (0-based)."""
+        if self.jitter == "decorrelated":
+            return min(self.max_delay, random.uniform(self.base_delay, max(self.base_delay, previous * 3)))
+        return random.uniform(0, min(self.max_delay, self.base_delay * (2 ** attempt)))
+
+    def call(self, func):
+        """Call func(), retrying retryable errors until attempts or deadline run out.
+
+        Raises:
+            The last error when it is not retryable, attempts are exhausted, or
+            the next sleep would not fit before the deadline.
+        """
+        delay = self.base_delay
+        for attempt in range(self.max_attempts):
+            try:
+                return func()
+            except Exception as e:
+                kind = classify_error(e)
+                if kind not in self.retryable:
+                    raise
+                if attempt + 1 >= self.max_attempts:
+                    logger.error("All %d attempts exhausted (%s): %s", self.max_attempts, kind, error_code(e))
+                    raise
+                delay = self.backoff(attempt, delay)
+                remaining = remaining_seconds()
+                if remaining is not None and remaining - delay < self.deadline_margin:
+                    logger.error(
+                        "Not retrying %s after attempt %d: %.2fs left before the deadline",
+                        error_code(e) or type(e).__name__, attempt + 1, remaining,
+                    )
+                    raise
+                logger.warning(
+                    "Retryable %s error (attempt %d/%d), retrying in %.2fs: %s",
+                    kind, attempt + 1, self.max_attempts, delay, error_code(e) or type(e).__name__,
+                )
+                METRICS.add("Retries", 1, ErrorKind=kind)
+                time.sleep(delay)
+
+
+DEFAULT_POLICY = RetryPolicy()
+
+
+def call_with_retry(func, policy: RetryPolicy = None):
+    """Call func() under the given retry policy (DEFAULT_POLICY if None)."""
+    return (policy or DEFAULT_POLICY).call(func)
 
 
 def retry_with_backoff(func, max_retries=3, base_delay=1.0):
-    """Call func(), retrying on throttling errors with exponential backoff.
+    """Call func(), retrying retryable errors with full-jitter exponential backoff.
+
+    Kept for existing callers; new code should use call_with_retry.
 
     Args:
         func: A callable that makes an AWS API call.
         max_retries: Maximum number of retry attempts (default 3).
-        base_delay: Base delay in seconds (doubles each retry: 1s, 2s, 4s).
+        base_delay: Base delay in seconds; retry n sleeps up to base_delay * 2^n.
 
     Returns:
         The return value of func() on success.
 
     Raises:
-        ClientError: If a non-throttling error occurs, or all retries are exhausted.
+        ClientError: If a non-retryable error occurs, or all retries are exhausted.
     """
-    last_error = None
-    for attempt in range(max_retries + 1):
-        try:
-            return func()
-        except ClientError as e:
-            error_code = e.response.get("Error", {}).get("Code", "")
-            if error_code not in THROTTLE_ERROR_CODES:
-                raise
-            last_error = e
-            if attempt < max_retries:
-                delay = base_delay * (2 ** attempt)
-                logger.warning(
-                    "Throttled (attempt %d/%d), retrying in %.1fs: %s",
-                    attempt + 1, max_retries, delay, error_code,
-                )
-                time.sleep(delay)
-            else:
-                logger.error(
-                    "All %d retries exhausted for throttling error: %s",
-                    max_retries, error_code,
-                )
-    raise last_error
+    return RetryPolicy(max_attempts=max_retries + 1, base_delay=base_delay, max_delay=base_delay * 8).call(func)
@@ -1,5 +1,10 @@
 """Build the standard tag set applied to every auto-tagged resource."""
 
+try:
+    from tag_rules import RESERVED_KEYS
+except ImportError:
+    from src.tag_rules import RESERVED_KEYS
+
 
 def build_tags(
     owner: str,
@@ -7,6 +12,7 @@ def build_tags(
     event_time: str,
     environment: str,
     project: str,
+    extra=(),
 ) -> dict:
     """Build the standard tag payload.
 
@@ -14,14 +20,24 @@ def build_tags(
         owner: The extracted owner name (from extract_owner).
         arn: The full ARN from the userIdentity field.
         event_time: The event time in ISO 8601 format.
-        environment: Environment name (unused, kept for interface compatibility).
-        project: Project name (unused, kept for interface compatibility).
+        environment: Value of the Environment tag.
+        project: Value of the Project tag.
+        extra: (key, value) pairs from tag rules (see tag_rules). They may
+            override Environment and Project; reserved keys are ignored.
 
     Returns:
-        A dict with the three standard tag keys.
+        A dict with the six standard tag keys, any extra tags, and
+        CreationDate last.
     """
-    return {
+    tags = {
         "Owner": owner,
         "CreatedBy": arn,
-        "CreationDate": event_time,
+        "Environment": environment,
+        "Project": project,
+        "AutoTagged": "true",
     }
+    for key, value in extra:
+        if key not in RESERVED_KEYS:
+            tags[key] = value
+    tags["CreationDate"] = event_time
+    return tags
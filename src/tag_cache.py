@@ -0,0 +1,144 @@
+"""Memoized tag sets per principal, with pre-serialized wire payloads.
+
+Events in a burst mostly come from a handful of principals (CI roles,
+operators), so the owner, the static tags and their wire formats are built
+once per principal and kept in a bounded LRU. CreationDate is the only
+per-event tag; stamp() layers it over the cached principal part, and the
+stamped set reuses the principal's payloads instead of rebuilding them.
+
+Payload lists and maps are shared between every caller of the same tag set
+and must not be mutated.
+"""
+
+import os
+import threading
+from collections import OrderedDict
+from collections.abc import Mapping
+try:
+    from identity import extract_owner
+    from tag_builder import build_tags
+except ImportError:
+    from src.identity import extract_owner
+    from src.tag_builder import build_tags
+
+TAG_CACHE_SIZE = int(os.environ.get("TAG_CACHE_SIZE", "256"))
+
+DATE_KEY = "CreationDate"
+
+
+class PrincipalTags:
+    """The event-independent part of a tag set, with its payloads prebuilt."""
+
+    __slots__ = ("tags", "entries", "_last")
+
+    def __init__(self, tags: dict):
+        self.tags = {k: v for k, v in tags.items() if k != DATE_KEY}
+        self.entries = [{"Key": k, "Value": v} for k, v in self.tags.items()]
+        self._last = None
+
+    def stamp(self, event_time: str) -> "TagSet":
+        """Return the full tag set for an event at event_time.
+
+        Consecutive events from one principal usually share a timestamp
+        second, so the last stamped set is reused when it matches.
+        """
+        last = self._last
+        if last is not None and last.date == event_time:
+            return last
+        stamped = TagSet(self, event_time)
+        self._last = stamped
+        return stamped
+
+
+class TagSet(Mapping):
+    """Immutable tag mapping: a PrincipalTags plus CreationDate.
+
+    Reads and iteration behave like the dict build_tags returns. wire_list
+    and wire_map are built on first use and then shared.
+    """
+
+    __slots__ = ("base", "date", "_list", "_map")
+
+    def __init__(self, base: PrincipalTags, date: str):
+        self.base = base
+        self.date = date
+        self._list = None
+        self._map = None
+
+    def __getitem__(self, key):
+        if key == DATE_KEY:
+            return self.date
+        return self.base.tags[key]
+
+    def __iter__(self):
+        yield from self.base.tags
+        yield DATE_KEY
+
+    def __len__(self):
+        return len(self.base.tags) + 1
+
+    def __repr__(self):
+        return f"TagSet({dict(self)!r})"
+
+    @property
+    def wire_list(self) -> list:
+        """[{"Key": k, "Value": v}, ...] as EC2, S3 and most ARN-based APIs take it."""
+        if self._list is None:
+            self._list = self.base.entries + [{"Key": DATE_KEY, "Value": self.date}]
+        return self._list
+
+    @property
+    def wire_map(self) -> dict:
+        """{k: v} as Lambda, SQS and the Resource Groups Tagging API take it."""
+        if self._map is None:
+            self._map = {**self.base.tags, DATE_KEY: self.date}
+        return self._map
+
+
+class TagSetCache:
+    """Bounded LRU of PrincipalTags keyed on the principal, the static tag config and rule tags."""
+
+    def __init__(self, maxsize: int = TAG_CACHE_SIZE):
+        self.maxsize = maxsize
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+    def tags_for(self, user_identity, event_time: str, environment: str, project: str, extra=()) -> TagSet:
+        """Return the tag set for an event from user_identity at event_time.
+
+        extra holds the event's rule tags (TagRules.evaluate); they are part
+        of the key, so principals whose events match different rules get
+        separate entries.
+        """
+        identity = user_identity if isinstance(user_identity, dict) else {}
+        key = (identity.get("arn"), identity.get("type"), identity.get("userName"), environment, project, extra)
+        with self._lock:
+            base = self._entries.get(key)
+            if base is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return base.stamp(event_time)
+            self.misses += 1
+
+        owner = extract_owner(user_identity)
+        arn = identity.get("arn", "Unknown") if identity else "Unknown"
+        base = PrincipalTags(build_tags(owner, arn, event_time, environment, project, extra))
+        with self._lock:
+            self._entries[key] = base
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+        return base.stamp(event_time)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.hits = 0
+            self.misses = 0
+
+
+TAG_CACHE = TagSetCache()
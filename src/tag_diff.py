@@ -0,0 +1,32 @@
+"""Tag-diff engine for read-modify-write tagging APIs.
+
+S3 PutBucketTagging replaces the bucket's whole TagSet, so the handler
+reads the current set, works out which of our tags are missing or differ,
+and only writes when there is something to change.
+"""
+
+S3_MAX_TAGS = 50
+
+
+class TagLimitExceeded(ValueError):
+    """Raised when applying a change would push a resource past its tag limit."""
+
+
+def diff_tags(existing: dict, desired: dict) -> dict:
+    """Return the desired tags whose key is missing from existing or has a different value."""
+    return {k: v for k, v in desired.items() if existing.get(k) != v}
+
+
+def merge_tags(existing: dict, changes: dict, limit: int = None) -> dict:
+    """Apply changes on top of existing, enforcing an optional tag-count limit.
+
+    Raises:
+        TagLimitExceeded: If the merged set would have more than limit tags.
+    """
+    merged = {**existing, **changes}
+    if limit is not None and len(merged) > limit:
+        raise TagLimitExceeded(
+            f"Merged tag set has {len(merged)} tags, over the limit of {limit} "
+            f"({len(existing)} existing, {len(changes)} to add or update)"
+        )
+    return merged
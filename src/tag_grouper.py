@@ -0,0 +1,99 @@
+"""Grouping of many events' resources into as few tagging calls as possible.
+
+Tagging APIs that accept several resources per request (EC2 CreateTags,
+TagResources) can carry resources from different events, as long as they
+share a region, an account and a tag set. TagGrouper collects resources
+under those keys, splits each group into chunks no larger than the API's
+limit and remembers which events each resource came from. Subclasses make
+the API call for one chunk and map its outcome back to those events.
+"""
+
+from abc import ABC, abstractmethod
+try:
+    from dispatcher import Task
+except ImportError:
+    from src.dispatcher import Task
+
+
+def owner_tokens(owners) -> set:
+    """Return every token in an owners mapping of {resource: [tokens]}."""
+    return {token for tokens in owners.values() for token in tokens}
+
+
+class TagGrouper(ABC):
+    """Collects resources from many events, grouped by region, account and tag set.
+
+    Subclasses set service, the dispatcher cap the calls run under, and
+    implement send(region, account, resources, tags, owners), which makes
+    one call and returns (failed_tokens, fallback_tokens).
+    """
+
+    service = None
+
+    def __init__(self, max_per_call: int):
+        self.max_per_call = max_per_call
+        # (region, account, tag items) -> {resource: [tokens]}, insertion-ordered
+        self._groups = {}
+        self._tags = {}
+        # id(tag set) -> (tag set, sorted items); events share TagSet objects, so
+        # each distinct set is sorted once per batch
+        self._tag_keys = {}
+
+    def __len__(self):
+        return sum(len(owners) for owners in self._groups.values())
+
+    def _tag_key(self, tags):
+        cached = self._tag_keys.get(id(tags))
+        if cached is None or cached[0] is not tags:
+            cached = self._tag_keys[id(tags)] = (tags, tuple(sorted(tags.items())))
+        return cached[1]
+
+    def add(self, token, region, resources, tags: dict, account=None):
+        """Queue resources from one event, identified by token, for tagging.
+
+        account is the event's recipientAccountId; None means this function's own.
+        """
+        group_key = (region or None, account or None, self._tag_key(tags))
+        owners = self._groups.setdefault(group_key, {})
+        self._tags.setdefault(group_key, tags)
+        for resource in resources:
+            owners.setdefault(resource, []).append(token)
+
+    def chunks(self):
+        """Yield (region, account, resources, tags, owners) for each call to make.
+
+        owners maps each resource in the chunk to the tokens of its events.
+        """
+        for group_key, owners in self._groups.items():
+            resources = list(owners)
+            for start in range(0, len(resources), self.max_per_call):
+                chunk = resources[start:start + self.max_per_call]
+                yield group_key[0], group_key[1], chunk, self._tags[group_key], {r: owners[r] for r in chunk}
+
+    @abstractmethod
+    def send(self, region, account, resources, tags, owners):
+        """Make one call for a chunk and return (failed_tokens, fallback_tokens)."""
+
+    def tasks(self):
+        """Yield one dispatcher Task per call; each returns (failed_tokens, fallback_tokens)."""
+        for region, account, resources, tags, owners in self.chunks():
+            def run(region=region, account=account, resources=resources, tags=tags, owners=owners):
+                return self.send(region, account, resources, tags, owners)
+            yield Task(self.service, region, run, frozenset(owner_tokens(owners)))
+
+    def flush(self):
+        """Send every queued call and clear the queue.
+
+        Returns:
+            (failed_tokens, fallback_tokens). A token in both sets is only
+            reported as failed.
+        """
+        failed, fallback = set(), set()
+        for task in self.tasks():
+            chunk_failed, chunk_fallback = task.fn()
+            failed |= chunk_failed
+            fallback |= chunk_fallback
+        self._groups.clear()
+        self._tags.clear()
+        self._tag_keys.clear()
+        return failed, fallback - failed
@@ -0,0 +1,200 @@
+"""Extra tags computed per event from a compiled set of rules.
+
+A rule sets tags on every event that meets all of its conditions. Example:
+
+    {"account": "123456789012", "name": "billing-*", "tags": {"CostCenter": "CC-1001"}}
+
+Conditions (all optional; a rule with none applies to every event):
+
+- account: the event's recipientAccountId
+- region: the event's awsRegion
+- eventSource, eventName: the CloudTrail event fields
+- principal: the caller's ARN (userIdentity.arn)
+- name: the resource name from the request (bucket, function, table, Name tag, ...)
+
+A condition is one value or a list of alternatives. principal and name
+values ending in "*" match by prefix; every other value matches exactly.
+
+Rules are compiled once into indexes: a hash map per field from value to
+rules, and a prefix trie per pattern field. Evaluating an event looks up
+each of its fields and counts, per rule, how many conditions were met; a
+rule matches when the count equals its number of conditions. The cost thus
+grows with the rules that share at least one value with the event, not
+with the size of the rule set. Matching rules apply in file order, so a
+later rule overrides an earlier one's value for the same key.
+"""
+
+import json
+import logging
+import os
+
+logger = logging.getLogger(__name__)
+
+TAG_RULES = os.environ.get("TAG_RULES", "")
+# Relative paths are resolved against this directory, which is the Lambda package root
+TAG_RULES_FILE = os.environ.get("TAG_RULES_FILE", "tag_rules.json")
+
+EXACT_FIELDS = ("account", "region", "eventSource", "eventName")
+PATTERN_FIELDS = ("principal", "name")
+# Set from the event itself; rules may override Environment and Project only
+RESERVED_KEYS = frozenset({"Owner", "CreatedBy", "CreationDate", "AutoTagged"})
+
+# requestParameters keys that hold the new resource's name
+NAME_KEYS = (
+    "bucketName", "functionName", "tableName", "queueName", "name", "dBInstanceIdentifier",
+    "dBClusterIdentifier", "domainName", "clusterName", "groupName", "creationToken",
+)
+
+
+def resource_name(detail) -> str:
+    """Return the name the event gave its resource, or "" if it has none.
+
+    EC2 resources are named by a Name tag in the request's tag specifications.
+    """
+    params = detail.get("requestParameters") if isinstance(detail, dict) else None
+    if not isinstance(params, dict):
+        return ""
+    for key in NAME_KEYS:
+        value = params.get(key)
+        if isinstance(value, str) and value:
+            return value
+    specs = (params.get("tagSpecificationSet") or {}).get("items") or []
+    for spec in specs if isinstance(specs, list) else []:
+        for tag in (spec.get("tags") or []) if isinstance(spec, dict) else []:
+            if isinstance(tag, dict) and tag.get("key") == "Name":
+                return tag.get("value") or ""
+    return ""
+
+
+class PrefixTrie:
+    """Character trie mapping prefixes to rule indices.
+
+    Each node is [children, rules]. matches() walks the value once and
+    collects the rules stored at every node on the path.
+    """
+
+    def __init__(self):
+        self._root = [{}, []]
+
+    def add(self, prefix: str, rule: int):
+        node = self._root
+        for char in prefix:
+            node = node[0].setdefault(char, [{}, []])
+        node[1].append(rule)
+
+    def matches(self, value: str) -> list:
+        """Return the rules whose prefix is a prefix of value."""
+        node = self._root
+        found = list(node[1])
+        for char in value:
+            node = node[0].get(char)
+            if node is None:
+                break
+            found.extend(node[1])
+        return found
+
+
+def _event_fields(detail):
+    identity = detail.get("userIdentity")
+    return {
+        "account": detail.get("recipientAccountId") or "",
+        "region": detail.get("awsRegion") or "",
+        "eventSource": detail.get("eventSource") or "",
+        "eventName": detail.get("eventName") or "",
+        "principal": (identity.get("arn") if isinstance(identity, dict) else None) or "",
+        "name": resource_name(detail),
+    }
+
+
+class TagRules:
+    """A compiled rule set.
+
+    Args:
+        rules: Rule dicts as described in the module docstring.
+
+    Raises:
+        ValueError: If a rule has an unknown field, a reserved tag key, or a
+            "*" anywhere but at the end of a principal or name pattern.
+    """
+
+    def __init__(self, rules=()):
+        self._tags = []
+        self._required = []
+        self._always = []
+        self._exact = {field: {} for field in EXACT_FIELDS + PATTERN_FIELDS}
+        self._tries = {field: PrefixTrie() for field in PATTERN_FIELDS}
+        for rule in rules:
+            self._compile(rule)
+
+    def __len__(self):
+        return len(self._tags)
+
+    def _compile(self, rule):
+        index = len(self._tags)
+        tags = rule.get("tags") or {}
+        if not isinstance(tags, dict) or not tags:
+            raise ValueError(f"Tag rule {index} has no tags")
+        reserved = RESERVED_KEYS.intersection(tags)
+        if reserved:
+            raise ValueError(f"Tag rule {index} sets reserved keys: {sorted(reserved)}")
+        unknown = set(rule) - {"tags"} - set(self._exact)
+        if unknown:
+            raise ValueError(f"Tag rule {index} has unknown fields: {sorted(unknown)}")
+
+        conditions = 0
+        for field in self._exact:
+            if field not in rule:
+                continue
+            values = rule[field] if isinstance(rule[field], list) else [rule[field]]
+            conditions += 1
+            for value in values:
+                value = str(value)
+                if field in self._tries and value.endswith("*") and "*" not in value[:-1]:
+                    self._tries[field].add(value[:-1], index)
+                elif "*" in value:
+                    raise ValueError(f"Tag rule {index}: unsupported pattern {value!r} for {field}")
+                else:
+                    self._exact[field].setdefault(value, []).append(index)
+        self._tags.append({str(k): str(v) for k, v in tags.items()})
+        self._required.append(conditions)
+        if not conditions:
+            self._always.append(index)
+
+    def matching_rules(self, detail) -> list:
+        """Return the indices of the rules that match detail, in file order."""
+        counts = {}
+        for field, value in _event_fields(detail).items():
+            hits = set(self._exact[field].get(value, ()))
+            trie = self._tries.get(field)
+            if trie is not None:
+                hits.update(trie.matches(value))
+            for rule in hits:
+                counts[rule] = counts.get(rule, 0) + 1
+        matched = [rule for rule, count in counts.items() if count == self._required[rule]]
+        return sorted(matched + self._always)
+
+    def evaluate(self, detail) -> tuple:
+        """Return the extra tags for detail as a tuple of (key, value) pairs."""
+        if not self._tags:
+            return ()
+        merged = {}
+        for rule in self.matching_rules(detail):
+            merged.update(self._tags[rule])
+        return tuple(merged.items())
+
+    @classmethod
+    def from_env(cls):
+        """Compile TAG_RULES_FILE (if it exists) followed by the inline TAG_RULES."""
+        rules = []
+        path = TAG_RULES_FILE
+        if path and not os.path.isabs(path):
+            path = os.path.join(os.path.dirname(os.path.abspath(__file__)), path)
+        if path and os.path.exists(path):
+            with open(path) as f:
+                rules.extend(json.load(f))
+        if TAG_RULES.strip():
+            rules.extend(json.loads(TAG_RULES))
+        compiled = cls(rules)
+        if rules:
+            logger.info("Compiled %d tag rules", len(compiled))
+        return compiled
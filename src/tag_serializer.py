@@ -1,12 +1,25 @@
 """Tag serialization/deserialization for AWS service-specific tagging APIs.
 
 All services use the same wire format [{"Key": k, "Value": v}, ...] but are
-kept as separate function pairs for clarity and future divergence.
+kept as separate function pairs for clarity and future divergence. A few
+services (Lambda, SQS, the Resource Groups Tagging API) take a plain
+{k: v} map instead.
+
+A TagSet from tag_cache already carries both payloads, so the serializers
+return them as-is rather than building new ones; the results are shared
+and must not be mutated.
 """
 
+try:
+    from tag_cache import TagSet
+except ImportError:
+    from src.tag_cache import TagSet
+
 
 def serialize_ec2_tags(tags: dict) -> list:
     """Convert internal tag dict to EC2 CreateTags format."""
+    if isinstance(tags, TagSet):
+        return tags.wire_list
     return [{"Key": k, "Value": v} for k, v in tags.items()]
 
 
@@ -17,6 +30,8 @@ def deserialize_ec2_tags(tag_list: list) -> dict:
 
 def serialize_s3_tags(tags: dict) -> list:
     """Convert internal tag dict to S3 PutBucketTagging TagSet format."""
+    if isinstance(tags, TagSet):
+        return tags.wire_list
     return [{"Key": k, "Value": v} for k, v in tags.items()]
 
 
@@ -31,9 +46,18 @@ def serialize_arn_tags(tags: dict) -> list:
     Used by RDS, DynamoDB, Lambda, ELB, EFS, SNS, SQS,
     Secrets Manager, OpenSearch, ECS, Step Functions.
     """
+    if isinstance(tags, TagSet):
+        return tags.wire_list
     return [{"Key": k, "Value": v} for k, v in tags.items()]
 
 
 def deserialize_arn_tags(tag_list: list) -> dict:
     """Convert ARN-based service tag list back to internal dict."""
     return {item["Key"]: item["Value"] for item in tag_list}
+
+
+def serialize_tag_map(tags: dict) -> dict:
+    """Convert internal tag dict to the {key: value} map used by Lambda, SQS and TagResources."""
+    if isinstance(tags, TagSet):
+        return tags.wire_map
+    return dict(tags)
@@ -0,0 +1,183 @@
+"""Per-invocation timing trees built from botocore's event hooks.
+
+Each invocation gets a root span. Handlers, client construction and every
+API call made by a pooled client add child spans, giving a tree such as::
+
+    invocation
+      handler:RunInstances
+        client:ec2@us-east-1
+        ec2:CreateTags            (attempt 1, Throttling)
+          http
+        ec2:CreateTags            (attempt 2)
+          http
+
+The gap between an API span's start and its http child is request
+preparation: serialization, signing and, on first use, credential
+resolution. The tree is logged as one JSON line when the invocation ends.
+
+TIMING_ENABLED=false turns all of this off: no hooks are registered and
+span() returns a shared no-op context manager.
+"""
+
+import contextlib
+import contextvars
+import functools
+import json
+import logging
+import os
+import time
+
+logger = logging.getLogger(__name__)
+
+TIMING_ENABLED = os.environ.get("TIMING_ENABLED", "true").lower() == "true"
+
+_current = contextvars.ContextVar("autotag_span", default=None)
+_NULL_SPAN = contextlib.nullcontext()
+
+
+class Span:
+    """One timed node of the tree."""
+
+    __slots__ = ("name", "start", "end", "children", "attrs")
+
+    def __init__(self, name, **attrs):
+        self.name = name
+        self.start = time.perf_counter()
+        self.end = None
+        self.children = []
+        self.attrs = attrs
+
+    def child(self, name, **attrs):
+        span = Span(name, **attrs)
+        # list.append is atomic, so dispatcher workers can share a parent
+        self.children.append(span)
+        return span
+
+    def finish(self):
+        if self.end is None:
+            self.end = time.perf_counter()
+
+    def to_dict(self, origin=None) -> dict:
+        """Render the subtree with times in ms relative to origin (default: this span's start)."""
+        origin = self.start if origin is None else origin
+        end = self.end if self.end is not None else time.perf_counter()
+        node = {
+            "name": self.name,
+            "start_ms": round((self.start - origin) * 1000.0, 3),
+            "duration_ms": round((end - self.start) * 1000.0, 3),
+            **self.attrs,
+        }
+        if self.children:
+            node["children"] = [c.to_dict(origin) for c in self.children]
+        return node
+
+
+class _TreeLog:
+    """Formats a span tree as JSON only when the log record is emitted."""
+
+    __slots__ = ("root",)
+
+    def __init__(self, root):
+        self.root = root
+
+    def __str__(self):
+        return json.dumps(self.root.to_dict())
+
+
+def current_span():
+    """The innermost open span in this context, or None outside a trace."""
+    return _current.get()
+
+
+@contextlib.contextmanager
+def _span(name, attrs):
+    parent = _current.get()
+    node = parent.child(name, **attrs)
+    token = _current.set(node)
+    try:
+        yield node
+    finally:
+        node.finish()
+        _current.reset(token)
+
+
+def span(name, **attrs):
+    """Context manager timing a child of the current span. No-op outside a trace or when disabled."""
+    if not TIMING_ENABLED or _current.get() is None:
+        return _NULL_SPAN
+    return _span(name, attrs)
+
+
+def trace_invocation(name="invocation"):
+    """Decorator for Lambda entry points: time the call as a root span and log the tree."""
+    def decorator(func):
+        if not TIMING_ENABLED:
+            return func
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            root = Span(name)
+            token = _current.set(root)
+            try:
+                return func(*args, **kwargs)
+            finally:
+                root.finish()
+                _current.reset(token)
+                logger.info("Timing: %s", _TreeLog(root))
+        return wrapper
+    return decorator
+
+
+def register_client_hooks(client, service):
+    """Add API-call and HTTP-attempt spans for every call made by a botocore client."""
+    if not TIMING_ENABLED:
+        return
+
+    def before_call(model, context=None, **kwargs):
+        parent = _current.get()
+        if parent is None or context is None:
+            return
+        node = parent.child(f"{service}:{model.name}")
+        context["autotag_span"] = (node, _current.set(node))
+
+    def before_send(**kwargs):
+        node = _current.get()
+        if node is not None:
+            node.child("http")
+
+    def needs_retry(response=None, request_dict=None, **kwargs):
+        entry = ((request_dict or {}).get("context") or {}).get("autotag_span")
+        if entry is None or not entry[0].children:
+            return
+        attempt = entry[0].children[-1]
+        attempt.finish()
+        # response is (http_response, parsed), or None when the send itself raised
+        status = getattr(response[0], "status_code", None) if response else None
+        if status is not None:
+            attempt.attrs["status"] = status
+
+    def close(context, error):
+        entry = (context or {}).pop("autotag_span", None)
+        if entry is None:
+            return
+        node, token = entry
+        for attempt in node.children:
+            attempt.finish()
+        if error:
+            node.attrs["error"] = error
+        node.finish()
+        _current.reset(token)
+
+    def after_call(model, parsed=None, context=None, **kwargs):
+        close(context, (parsed or {}).get("Error", {}).get("Code"))
+
+    def after_call_error(exception=None, context=None, **kwargs):
+        # The send raised (connection error, ...), so after-call is never emitted
+        close(context, type(exception).__name__ if exception is not None else "Error")
+
+    events = client.meta.events
+    events.register("before-call.*.*", before_call)
+    events.register("before-send.*.*", before_send)
+    events.register("needs-retry.*.*", needs_retry)
+    events.register("after-call.*.*", after_call)
+    events.register("after-call-error.*.*", after_call_error)
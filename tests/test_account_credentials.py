@@ -0,0 +1,138 @@
+"""Tests for cross-account AssumeRole credential caching."""
+
+import itertools
+import json
+import threading
+import time
+from datetime import datetime, timezone
+from unittest.mock import patch
+
+from hypothesis import given, settings, strategies as st
+
+from src import client_pool
+from src.account_credentials import AccountCredentials, CREDENTIAL_MIN_SECONDS
+from src.lambda_function import batch_handler
+from benchmarks.events import generate_events
+from benchmarks.fake_aws import FakeAWS
+
+HOME = "111111111111"
+
+
+class FakeSTS:
+    """assume_role returning fresh keys that expire duration seconds after clock()."""
+
+    def __init__(self, clock=time.time, delay=0.0):
+        self.clock = clock
+        self.delay = delay
+        self.calls = []
+        self._keys = itertools.count()
+        self._lock = threading.Lock()
+
+    def assume_role(self, RoleArn, RoleSessionName, DurationSeconds):
+        time.sleep(self.delay)
+        with self._lock:
+            self.calls.append(RoleArn)
+            n = next(self._keys)
+        return {"Credentials": {
+            "AccessKeyId": f"AKIA{n}", "SecretAccessKey": "secret", "SessionToken": f"token-{n}",
+            "Expiration": datetime.fromtimestamp(self.clock() + DurationSeconds, tz=timezone.utc),
+        }}
+
+
+# Feature: auto-tag-resources, Property 19: Cached credentials are reused until they near expiry
+@settings(max_examples=100)
+@given(steps=st.lists(st.tuples(st.sampled_from(["222222222222", "333333333333", HOME]),
+                                st.floats(min_value=0, max_value=2000)), max_size=40))
+def test_assume_role_only_when_cache_is_stale(steps):
+    """Property 19: Handed-out credentials always have more than CREDENTIAL_MIN_SECONDS
+    left, and AssumeRole runs once per account per credential lifetime, never for the home account."""
+    now = [1_700_000_000.0]
+    sts = FakeSTS(clock=lambda: now[0])
+    # refresh_seconds == CREDENTIAL_MIN_SECONDS leaves no background window
+    cache = AccountCredentials("AutoTagRole", HOME, duration=900, refresh_seconds=CREDENTIAL_MIN_SECONDS)
+    expiry, expected_calls = {}, 0
+    with patch("src.account_credentials.get_client", return_value=sts), \
+            patch("src.account_credentials.time.time", side_effect=lambda: now[0]):
+        for account, elapsed in steps:
+            now[0] += elapsed
+            credentials = cache.credentials_for(account)
+            if account == HOME:
+                assert credentials is None
+                continue
+            if account not in expiry or expiry[account] - now[0] <= CREDENTIAL_MIN_SECONDS:
+                expected_calls += 1
+                expiry[account] = now[0] + 900
+            cached, expires_at = cache._entries[account]
+            assert cached is credentials and abs(expires_at - expiry[account]) < 1e-3
+            assert expires_at - now[0] > CREDENTIAL_MIN_SECONDS
+    assert len(sts.calls) == expected_calls == cache.assume_calls
+    assert all(HOME not in arn for arn in sts.calls)
+
+
+def test_disabled_without_role_name():
+    cache = AccountCredentials("", None)
+    with patch("src.account_credentials.get_client") as get_client:
+        assert cache.credentials_for("222222222222") is None
+    get_client.assert_not_called()
+
+
+def test_concurrent_callers_share_one_assume_role():
+    sts = FakeSTS(delay=0.05)
+    cache = AccountCredentials("AutoTagRole", HOME)
+    results = []
+    with patch("src.account_credentials.get_client", return_value=sts):
+        threads = [threading.Thread(target=lambda: results.append(cache.credentials_for("222222222222")))
+                   for _ in range(8)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+    assert len(sts.calls) == 1
+    assert len({r["aws_access_key_id"] for r in results}) == 1
+
+
+def test_refresh_happens_in_background_and_drops_old_clients():
+    sts = FakeSTS(delay=0.05)
+    cache = AccountCredentials("AutoTagRole", HOME, duration=900, refresh_seconds=600)
+    with patch("src.account_credentials.get_client", return_value=sts), FakeAWS():
+        first = cache.credentials_for("222222222222")
+        client_pool.get_client("ec2", "us-east-1", first)
+        cache._entries["222222222222"] = (first, time.time() + 300)
+
+        started = time.perf_counter()
+        assert cache.credentials_for("222222222222") is first
+        assert time.perf_counter() - started < 0.05
+        for _ in range(100):
+            if cache.credentials_for("222222222222") is not first:
+                break
+            time.sleep(0.01)
+        assert len(sts.calls) == 2
+        assert client_pool.pool_stats()["size"] == 0
+
+
+def test_expired_credentials_are_refreshed_inline():
+    sts = FakeSTS()
+    cache = AccountCredentials("AutoTagRole", HOME)
+    with patch("src.account_credentials.get_client", return_value=sts):
+        first = cache.credentials_for("222222222222")
+        cache._entries["222222222222"] = (first, time.time() + CREDENTIAL_MIN_SECONDS / 2)
+        assert cache.credentials_for("222222222222") is not first
+    assert len(sts.calls) == 2
+
+
+def test_batch_groups_ec2_calls_per_account():
+    cache = AccountCredentials("AutoTagRole", HOME)
+    assumed = {"Credentials": {"AccessKeyId": "AKIA", "SecretAccessKey": "secret", "SessionToken": "token",
+                               "Expiration": datetime.fromtimestamp(time.time() + 3600, tz=timezone.utc)}}
+    events = list(generate_events(4, keys=[("ec2.amazonaws.com", "RunInstances")]))
+    for n, event in enumerate(events):
+        event["detail"].update(awsRegion="us-east-1", eventTime="2025-01-01T00:00:00Z",
+                               userIdentity={"type": "Root", "arn": "arn:aws:iam::1:root"},
+                               recipientAccountId=["222222222222", "333333333333"][n % 2])
+    records = [{"messageId": str(n), "body": json.dumps(e)} for n, e in enumerate(events)]
+    with FakeAWS(responses={"AssumeRole": assumed}) as aws, \
+            patch("src.account_credentials.ACCOUNT_CREDENTIALS", cache), \
+            patch("src.lambda_function.IDEMPOTENCY", None):
+        response = batch_handler({"Records": records}, None)
+    assert response["batchItemFailures"] == []
+    assert aws.calls == {"ec2:CreateTags": 2, "sts:AssumeRole": 2}
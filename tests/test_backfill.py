@@ -0,0 +1,161 @@
+"""Tests for the CloudTrail log archive backfill."""
+
+import gzip
+import io
+import json
+from unittest.mock import MagicMock, patch
+
+from botocore.exceptions import ClientError
+from hypothesis import given, settings, strategies as st
+
+from src.backfill import Backfill, Checkpoint, LocalDirectorySource, iter_records, main, tag_planned
+
+IDENTITY = {"type": "IAMUser", "userName": "alice", "arn": "arn:aws:iam::123456789012:user/alice"}
+
+
+def run_instances(*instance_ids):
+    return {
+        "eventSource": "ec2.amazonaws.com", "eventName": "RunInstances", "awsRegion": "us-east-1",
+        "eventTime": "2025-01-01T00:00:00Z", "userIdentity": IDENTITY,
+        "responseElements": {"instancesSet": {"items": [{"instanceId": i} for i in instance_ids]}},
+    }
+
+
+def write_log(path, records):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with gzip.open(path, "wt") as f:
+        json.dump({"Records": records}, f)
+
+
+# Feature: auto-tag-resources, Property 12: Streaming parse matches a full parse
+@settings(max_examples=100)
+@given(
+    records=st.lists(
+        st.dictionaries(st.text(max_size=5), st.one_of(st.integers(), st.text(max_size=20)), max_size=4),
+        max_size=10,
+    ),
+    chunk_size=st.integers(min_value=1, max_value=64),
+)
+def test_streaming_parse_matches_json_load(records, chunk_size):
+    """Property 12: Records decoded in arbitrarily small chunks equal json.loads of the file."""
+    document = json.dumps({"Records": records}, indent=1)
+    assert list(iter_records(io.StringIO(document), chunk_size=chunk_size)) == records
+
+
+def test_ec2_resources_across_files_are_coalesced(tmp_path):
+    write_log(tmp_path / "a.json.gz", [run_instances("i-1", "i-2"), {"eventName": "DescribeInstances"}])
+    write_log(tmp_path / "b.json.gz", [run_instances("i-3")])
+    ec2 = MagicMock()
+    with patch("src.backfill.get_account_client", return_value=ec2):
+        stats = Backfill(LocalDirectorySource(str(tmp_path))).run()
+    assert [c.kwargs["Resources"] for c in ec2.create_tags.call_args_list] == [["i-1", "i-2"], ["i-3"]]
+    assert stats["records"] == 3 and stats["events"] == 2 and stats["tagged"] == 3
+
+
+def test_deleted_resources_are_isolated_and_skipped(tmp_path):
+    write_log(tmp_path / "a.json.gz", [run_instances("i-1", "i-gone", "i-3", "i-4")])
+    ec2 = MagicMock()
+
+    def create_tags(Resources, Tags):
+        if "i-gone" in Resources:
+            raise ClientError({"Error": {"Code": "InvalidInstanceID.NotFound", "Message": ""}}, "CreateTags")
+
+    ec2.create_tags.side_effect = create_tags
+    with patch("src.backfill.get_account_client", return_value=ec2):
+        stats = Backfill(LocalDirectorySource(str(tmp_path))).run()
+    assert stats["tagged"] == 3 and stats["deleted"] == 1 and stats["failed"] == 0
+
+
+def test_failed_events_are_skipped(tmp_path):
+    record = {**run_instances("i-1"), "errorCode": "UnauthorizedOperation"}
+    write_log(tmp_path / "a.json.gz", [record])
+    ec2 = MagicMock()
+    with patch("src.backfill.get_account_client", return_value=ec2):
+        stats = Backfill(LocalDirectorySource(str(tmp_path))).run()
+    ec2.create_tags.assert_not_called()
+    assert stats["events"] == 0
+
+
+def test_checkpoint_resumes_after_finished_files(tmp_path):
+    logs = tmp_path / "logs"
+    write_log(logs / "2025/01/a.json.gz", [run_instances("i-1")])
+    write_log(logs / "2025/01/b.json.gz", [run_instances("i-2")])
+    checkpoint = tmp_path / "checkpoint.json"
+    Checkpoint(str(checkpoint)).mark("2025/01/a.json.gz")
+
+    ec2 = MagicMock()
+    with patch("src.backfill.get_account_client", return_value=ec2):
+        assert main(["--local-dir", str(logs), "--checkpoint", str(checkpoint)]) == 0
+    assert [c.kwargs["Resources"] for c in ec2.create_tags.call_args_list] == [["i-2"]]
+    assert json.loads(checkpoint.read_text())["completed"] == ["2025/01/a.json.gz", "2025/01/b.json.gz"]
+
+
+def test_dry_run_prints_plan_without_tagging(tmp_path, capsys):
+    write_log(tmp_path / "logs" / "a.json.gz", [run_instances("i-1", "i-2")])
+    checkpoint = tmp_path / "checkpoint.json"
+    with patch("src.backfill.get_account_client") as get_client:
+        assert main(["--local-dir", str(tmp_path / "logs"), "--checkpoint", str(checkpoint), "--dry-run"]) == 0
+    get_client.assert_not_called()
+    assert not checkpoint.exists()
+    [line] = capsys.readouterr().out.splitlines()
+    plan = json.loads(line)
+    assert plan["api"] == "ec2:CreateTags" and plan["resources"] == ["i-1", "i-2"]
+    assert plan["tags"]["Owner"] == "alice"
+
+
+def create_topic(topic_arn):
+    return {
+        "eventSource": "sns.amazonaws.com", "eventName": "CreateTopic", "awsRegion": "us-east-1",
+        "eventTime": "2025-01-01T00:00:00Z", "userIdentity": IDENTITY, "responseElements": {"topicArn": topic_arn},
+    }
+
+
+def test_deleted_non_ec2_resources_are_skipped_without_deferring(tmp_path):
+    write_log(tmp_path / "a.json.gz", [create_topic("arn:aws:sns:us-east-1:1:gone"),
+                                       create_topic("arn:aws:sns:us-east-1:1:ok")])
+    sns = MagicMock()
+
+    def tag_resource(ResourceArn, Tags):
+        if ResourceArn.endswith("gone"):
+            raise ClientError({"Error": {"Code": "NotFoundException", "Message": ""}}, "TagResource")
+
+    sns.tag_resource.side_effect = tag_resource
+    with patch("src.handlers.common.get_account_client", return_value=sns), \
+            patch("src.error_handler.defer") as defer:
+        stats = Backfill(LocalDirectorySource(str(tmp_path))).run()
+    defer.assert_not_called()
+    assert stats["tagged"] == 1 and stats["deleted"] == 1 and stats["failed"] == 0
+
+
+def test_files_with_failures_are_not_checkpointed(tmp_path):
+    logs = tmp_path / "logs"
+    write_log(logs / "a.json.gz", [create_topic("arn:aws:sns:us-east-1:1:a")])
+    write_log(logs / "b.json.gz", [run_instances("i-1")])
+    checkpoint = tmp_path / "checkpoint.json"
+    sns = MagicMock()
+    sns.tag_resource.side_effect = ClientError({"Error": {"Code": "AccessDenied", "Message": ""}}, "TagResource")
+    with patch("src.handlers.common.get_account_client", return_value=sns), \
+            patch("src.backfill.get_account_client", return_value=MagicMock()):
+        assert main(["--local-dir", str(logs), "--checkpoint", str(checkpoint)]) == 1
+    assert json.loads(checkpoint.read_text())["completed"] == ["b.json.gz"]
+
+
+def test_tag_planned_runs_the_raw_executor():
+    handler, operation = MagicMock(), MagicMock(resource_ids=("arn:aws:sns:us-east-1:1:t",))
+    assert tag_planned(handler, operation) == 0
+    handler.execute_raw.assert_called_once_with(operation)
+    handler.execute.assert_not_called()
+
+
+def test_deleted_operation_counts_each_resource():
+    handler = MagicMock()
+    handler.execute_raw.side_effect = ClientError({"Error": {"Code": "NotFoundException", "Message": ""}}, "AddTags")
+    operation = MagicMock(resource_ids=("arn:a", "arn:b"))
+    assert tag_planned(handler, operation) == 2
+
+
+def test_records_are_not_logged_one_by_one(tmp_path, caplog):
+    write_log(tmp_path / "a.json.gz", [run_instances(f"i-{n}") for n in range(5)])
+    with patch("src.backfill.get_account_client", return_value=MagicMock()), caplog.at_level("INFO"):
+        Backfill(LocalDirectorySource(str(tmp_path))).run()
+    assert not [r for r in caplog.records if r.getMessage().startswith(("Processing event", "Tags to apply"))]
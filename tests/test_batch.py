@@ -0,0 +1,125 @@
+"""Tests for batch record decoding and partial-failure reporting."""
+
+import base64
+import json
+from unittest.mock import MagicMock, patch
+
+from hypothesis import given, settings, strategies as st
+
+from src.batch import iter_batch_records, batch_response
+from src.lambda_function import batch_handler, lambda_handler
+
+
+def eventbridge_event(event_name="CreateVpc", vpc_id="vpc-1"):
+    return {
+        "id": f"eb-{vpc_id}",
+        "detail-type": "AWS API Call via CloudTrail",
+        "detail": {
+            "eventSource": "ec2.amazonaws.com",
+            "eventName": event_name,
+            "awsRegion": "us-east-1",
+            "eventTime": "2026-01-01T00:00:00Z",
+            "userIdentity": {"type": "IAMUser", "userName": "alice", "arn": "arn:aws:iam::1:user/alice"},
+            "responseElements": {"vpc": {"vpcId": vpc_id}},
+        },
+    }
+
+
+def sqs_record(message_id, body):
+    return {"messageId": message_id, "eventSource": "aws:sqs", "body": body}
+
+
+def kinesis_record(sequence_number, payload):
+    data = base64.b64encode(json.dumps(payload).encode()).decode()
+    return {"eventSource": "aws:kinesis", "kinesis": {"sequenceNumber": sequence_number, "data": data}}
+
+
+# Feature: auto-tag-resources, Property 7: Batch records round-trip to their events
+@settings(max_examples=50)
+@given(vpc_ids=st.lists(st.text(alphabet="abcdef0123456789", min_size=1, max_size=17), max_size=10))
+def test_batch_records_decode_to_original_events(vpc_ids):
+    """Property 7: Every SQS, Kinesis and Pipes record decodes to the event it carries."""
+    events = [eventbridge_event(vpc_id=v) for v in vpc_ids]
+    sqs = {"Records": [sqs_record(f"m{i}", json.dumps(e)) for i, e in enumerate(events)]}
+    kinesis = {"Records": [kinesis_record(f"s{i}", e) for i, e in enumerate(events)]}
+    pipes = [{"messageId": f"m{i}", "body": json.dumps(e)} for i, e in enumerate(events)]
+
+    assert list(iter_batch_records(sqs)) == [(f"m{i}", e) for i, e in enumerate(events)]
+    assert list(iter_batch_records(kinesis)) == [(f"s{i}", e) for i, e in enumerate(events)]
+    assert list(iter_batch_records(pipes)) == [(f"m{i}", e) for i, e in enumerate(events)]
+
+
+def test_bare_cloudtrail_record_is_wrapped():
+    """A CloudTrail record without an EventBridge envelope is wrapped as detail."""
+    detail = eventbridge_event()["detail"]
+    [(item_id, event)] = iter_batch_records({"Records": [sqs_record("m1", json.dumps(detail))]})
+    assert item_id == "m1"
+    assert event == {"detail": detail}
+
+
+def test_undecodable_record_yields_none():
+    records = {"Records": [sqs_record("m1", "not json"), sqs_record("m2", json.dumps({"foo": 1}))]}
+    assert list(iter_batch_records(records)) == [("m1", None), ("m2", None)]
+
+
+def sns_event(topic_arn):
+    return {"detail": {
+        "eventSource": "sns.amazonaws.com",
+        "eventName": "CreateTopic",
+        "userIdentity": {"type": "Root"},
+        "responseElements": {"topicArn": topic_arn},
+    }}
+
+
+def test_batch_handler_reports_only_failed_records():
+    """Failed handlers and undecodable records are redelivered; the rest are not."""
+    calls = []
+
+    def fake_handler(detail, tags):
+        calls.append(detail["responseElements"]["topicArn"])
+        return detail["responseElements"]["topicArn"] != "topic-bad"
+
+    handlers = {("sns.amazonaws.com", "CreateTopic"): fake_handler}
+    event = {"Records": [
+        sqs_record("m1", json.dumps(sns_event("topic-ok"))),
+        sqs_record("m2", json.dumps(sns_event("topic-bad"))),
+        sqs_record("m3", "{broken"),
+        sqs_record("m4", json.dumps(eventbridge_event(event_name="DescribeVpcs"))),
+    ]}
+
+    with patch("src.lambda_function.SERVICE_HANDLERS", handlers):
+        result = batch_handler(event, None)
+
+    assert calls == ["topic-ok", "topic-bad"]
+    assert result == batch_response(["m2", "m3"])
+    assert result == {"batchItemFailures": [{"itemIdentifier": "m2"}, {"itemIdentifier": "m3"}]}
+
+
+def test_batch_handler_redelivers_records_not_started_before_deadline():
+    """Records whose operations are skipped near the deadline are reported as failed."""
+    context = MagicMock()
+    context.get_remaining_time_in_millis.return_value = 100
+    handler = MagicMock(return_value=True)
+    event = {"Records": [sqs_record(f"m{n}", json.dumps(sns_event(f"topic-{n}"))) for n in range(3)]}
+
+    with patch("src.lambda_function.SERVICE_HANDLERS", {("sns.amazonaws.com", "CreateTopic"): handler}):
+        result = batch_handler(event, context)
+
+    handler.assert_not_called()
+    assert result == batch_response(["m0", "m1", "m2"])
+
+
+def test_lambda_handler_routes_pipes_list_to_batch_handler():
+    """A bare Pipes list is a batch, not a single event."""
+    handler = MagicMock(return_value=True)
+    data = base64.b64encode(json.dumps(sns_event("topic-1")).encode()).decode()
+    event = [
+        {"eventSource": "aws:kinesis", "sequenceNumber": "s1", "data": data},
+        {"eventSource": "aws:kinesis", "sequenceNumber": "s2", "data": "e30="},
+    ]
+
+    with patch("src.lambda_function.SERVICE_HANDLERS", {("sns.amazonaws.com", "CreateTopic"): handler}):
+        result = lambda_handler(event, None)
+
+    assert handler.execute.call_count == 1
+    assert result == batch_response(["s2"])
@@ -0,0 +1,41 @@
+"""Tests for the benchmark event generator, fake AWS backend and suite."""
+
+from src.config import HANDLER_PATHS
+from src.resource_extractors import EXTRACTORS, EXTRACTION_SPECS
+from src.lambda_function import lambda_handler
+from benchmarks.events import generate_events, make_detail, parse_principal_mix
+from benchmarks.fake_aws import FakeAWS
+from benchmarks.suite import compare, run_suite
+
+
+def test_generator_covers_every_handler_with_fleet_sizes():
+    events = list(generate_events(len(HANDLER_PATHS) * 2, fleet_sizes=(1, 5)))
+    keys = {(e["detail"]["eventSource"], e["detail"]["eventName"]) for e in events}
+    assert keys == set(HANDLER_PATHS)
+    for key in HANDLER_PATHS:
+        fanned_out = any("[*]" in path for path in EXTRACTION_SPECS[key].paths)
+        assert len(EXTRACTORS[key](make_detail(key, fleet_size=5))) >= (5 if fanned_out else 1)
+
+
+def test_principal_mix_is_respected():
+    assert parse_principal_mix("IAMUser=3, Root") == {"IAMUser": 3.0, "Root": 1.0}
+    events = generate_events(50, principal_mix="Root=1")
+    assert {e["detail"]["userIdentity"]["type"] for e in events} == {"Root"}
+
+
+def test_fake_backend_serves_pooled_clients():
+    event = next(generate_events(1))
+    with FakeAWS() as aws:
+        assert lambda_handler(event, None)["statusCode"] == 200
+    assert aws.calls == {"ec2:CreateTags": 1}
+
+
+def test_suite_reports_and_compares():
+    results = run_suite(events=len(HANDLER_PATHS), fleet_sizes=(2,), latency_ms=0, jitter_ms=0, import_runs=1)
+    assert results["batch"]["failed"] == 0
+    assert len(results["direct"]["handlers"]) == len(HANDLER_PATHS)
+    assert results["direct"]["events_per_sec"] > 0 and results["memory"]["tracemalloc_peak_kb"] > 0
+
+    slower = {**results, "direct": {**results["direct"], "events_per_sec": results["direct"]["events_per_sec"] / 2}}
+    regressions = {name: pct for name, _, _, pct in compare(slower, results)}
+    assert regressions["direct.events_per_sec"] == 50.0
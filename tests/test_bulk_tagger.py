@@ -0,0 +1,90 @@
+"""Tests for the Resource Groups Tagging API bulk backend."""
+
+import json
+from unittest.mock import MagicMock, patch
+
+from botocore.exceptions import ClientError
+
+from src.bulk_tagger import BulkArnTagger, BULK_TAGGABLE_EVENTS
+from src.lambda_function import batch_handler
+from src.resource_extractors import EXTRACTORS
+
+TAGS = {"Owner": "alice", "CreatedBy": "arn:a", "CreationDate": "t"}
+
+
+def test_bulk_taggable_events_are_supported_events():
+    assert BULK_TAGGABLE_EVENTS <= set(EXTRACTORS)
+
+
+def test_arns_are_chunked_by_twenty():
+    client = MagicMock()
+    client.tag_resources.return_value = {"FailedResourcesMap": {}}
+    tagger = BulkArnTagger()
+    for n in range(45):
+        tagger.add(f"e{n}", "us-east-1", [f"arn:aws:sns:us-east-1:1:t{n}"], TAGS)
+
+    with patch("src.bulk_tagger.get_account_client", return_value=client):
+        assert tagger.flush() == (set(), set())
+
+    sizes = [len(c.kwargs["ResourceARNList"]) for c in client.tag_resources.call_args_list]
+    assert sizes == [20, 20, 5]
+    assert client.tag_resources.call_args.kwargs["Tags"] == TAGS
+
+
+def test_failed_resources_map_is_mapped_per_resource():
+    """5xx entries fail their event; 4xx entries fall back to the per-service path."""
+    client = MagicMock()
+    client.tag_resources.return_value = {"FailedResourcesMap": {
+        "arn:2": {"StatusCode": 500, "ErrorCode": "InternalServiceException", "ErrorMessage": "x"},
+        "arn:3": {"StatusCode": 400, "ErrorCode": "InvalidParameterException", "ErrorMessage": "y"},
+    }}
+    tagger = BulkArnTagger()
+    tagger.add("e1", "us-east-1", ["arn:1"], TAGS)
+    tagger.add("e2", "us-east-1", ["arn:2"], TAGS)
+    tagger.add("e3", "us-east-1", ["arn:3"], TAGS)
+
+    with patch("src.bulk_tagger.get_account_client", return_value=client):
+        assert tagger.flush() == ({"e2"}, {"e3"})
+
+
+def test_access_denied_falls_back_for_whole_chunk():
+    client = MagicMock()
+    client.tag_resources.side_effect = ClientError(
+        {"Error": {"Code": "AccessDeniedException", "Message": "no tag:TagResources"}}, "TagResources",
+    )
+    tagger = BulkArnTagger()
+    tagger.add("e1", "us-east-1", ["arn:1"], TAGS)
+    tagger.add("e2", "us-east-1", ["arn:2"], TAGS)
+
+    with patch("src.bulk_tagger.get_account_client", return_value=client):
+        assert tagger.flush() == (set(), {"e1", "e2"})
+
+
+def test_batch_handler_falls_back_to_service_handler():
+    """Resources rejected by the bulk path are retried through their own handler."""
+    records = []
+    for n in range(3):
+        detail = {
+            "eventSource": "sns.amazonaws.com",
+            "eventName": "CreateTopic",
+            "awsRegion": "us-east-1",
+            "userIdentity": {"type": "Root"},
+            "responseElements": {"topicArn": f"arn:aws:sns:us-east-1:1:t{n}"},
+        }
+        records.append({"messageId": f"m{n}", "body": json.dumps({"detail": detail})})
+
+    bulk_client = MagicMock()
+    bulk_client.tag_resources.return_value = {"FailedResourcesMap": {
+        "arn:aws:sns:us-east-1:1:t1": {"StatusCode": 400, "ErrorCode": "InvalidParameterException"},
+    }}
+    sns_client = MagicMock()
+
+    with patch("src.lambda_function.BULK_TAGGING_ENABLED", True), \
+            patch("src.bulk_tagger.get_account_client", return_value=bulk_client), \
+            patch("src.handlers.common.get_account_client", return_value=sns_client):
+        result = batch_handler({"Records": records}, None)
+
+    assert result == {"batchItemFailures": []}
+    bulk_client.tag_resources.assert_called_once()
+    sns_client.tag_resource.assert_called_once()
+    assert sns_client.tag_resource.call_args.kwargs["ResourceArn"] == "arn:aws:sns:us-east-1:1:t1"
@@ -0,0 +1,91 @@
+"""Tests for the container-scoped client pool."""
+
+import threading
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from src import client_pool
+from src.client_pool import get_client, pool_stats, clear_clients
+
+
+@pytest.fixture(autouse=True)
+def fake_session():
+    """Replace the boto3 session with one that hands out fresh mocks."""
+    session = MagicMock()
+    session.client.side_effect = lambda *args, **kwargs: MagicMock()
+    clear_clients()
+    with patch.object(client_pool, "_session", session):
+        yield session
+    clear_clients()
+
+
+def test_warm_calls_reuse_client(fake_session):
+    """Repeated lookups for the same key build the client only once."""
+    first = get_client("ec2", "us-east-1")
+    for _ in range(5):
+        assert get_client("ec2", "us-east-1") is first
+    assert fake_session.client.call_count == 1
+    assert pool_stats() == {"hits": 5, "misses": 1, "size": 1}
+
+
+def test_clients_keyed_by_service_region_and_credentials(fake_session):
+    """Each distinct (service, region, credentials) gets its own client."""
+    creds_a = {"aws_access_key_id": "A", "aws_secret_access_key": "s", "aws_session_token": "t1"}
+    creds_b = {"aws_access_key_id": "A", "aws_secret_access_key": "s", "aws_session_token": "t2"}
+    clients = {
+        id(get_client("ec2", "us-east-1")),
+        id(get_client("ec2", "eu-west-1")),
+        id(get_client("rds", "us-east-1")),
+        id(get_client("ec2", "us-east-1", creds_a)),
+        id(get_client("ec2", "us-east-1", creds_b)),
+    }
+    assert len(clients) == 5
+    assert pool_stats()["misses"] == 5
+
+
+def test_concurrent_lookups_build_one_client(fake_session):
+    """Threads racing on a cold key share a single client."""
+    results = []
+    barrier = threading.Barrier(8)
+
+    def worker():
+        barrier.wait()
+        results.append(get_client("sns", "us-east-1"))
+
+    threads = [threading.Thread(target=worker) for _ in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert len({id(c) for c in results}) == 1
+    assert fake_session.client.call_count == 1
+    assert pool_stats() == {"hits": 7, "misses": 1, "size": 1}
+
+
+def test_cold_build_does_not_block_other_keys(fake_session):
+    """A slow client build for one key does not hold up another key's lookup."""
+    building, release = threading.Event(), threading.Event()
+
+    def client(service, **kwargs):
+        if service == "ec2":
+            building.set()
+            release.wait(5)
+        return MagicMock()
+
+    fake_session.client.side_effect = client
+    slow = threading.Thread(target=get_client, args=("ec2", "us-east-1"))
+    slow.start()
+    building.wait(5)
+    other = []
+    fast = threading.Thread(target=lambda: other.append(get_client("sns", "eu-west-1")))
+    fast.start()
+    fast.join(1)
+    built_while_blocked = len(other) == 1
+    release.set()
+    slow.join(5)
+    fast.join(5)
+
+    assert built_while_blocked
+    assert pool_stats() == {"hits": 0, "misses": 2, "size": 2}
@@ -0,0 +1,96 @@
+"""Tests for cross-event CreateTags coalescing."""
+
+import json
+from unittest.mock import MagicMock, patch
+
+from botocore.exceptions import ClientError
+from hypothesis import given, settings, strategies as st
+
+from src.coalescer import CreateTagsCoalescer
+from src.lambda_function import batch_handler
+
+TAGS_A = {"Owner": "alice", "CreatedBy": "arn:a", "CreationDate": "t"}
+TAGS_B = {"Owner": "bob", "CreatedBy": "arn:b", "CreationDate": "t"}
+
+
+# Feature: auto-tag-resources, Property 8: Coalescing preserves every resource exactly once
+@settings(max_examples=100)
+@given(
+    events=st.lists(
+        st.tuples(
+            st.sampled_from(["us-east-1", "eu-west-1"]),
+            st.sampled_from([TAGS_A, TAGS_B]),
+            st.lists(st.integers(min_value=0, max_value=3000), min_size=1, max_size=30),
+        ),
+        max_size=20,
+    ),
+    max_per_call=st.integers(min_value=1, max_value=1000),
+)
+def test_coalescing_covers_every_resource(events, max_per_call):
+    """Property 8: Every queued (region, tags, resource) is sent exactly once,
+    in chunks no larger than the CreateTags limit, with the fewest calls per group."""
+    coalescer = CreateTagsCoalescer(max_per_call=max_per_call)
+    expected = {}
+    for token, (region, tags, ids) in enumerate(events):
+        resource_ids = [f"i-{n}" for n in ids]
+        coalescer.add(token, region, resource_ids, tags)
+        expected.setdefault((region, tags["Owner"]), set()).update(resource_ids)
+
+    sent = {}
+    calls = {}
+    for region, _, chunk, tags, _ in coalescer.chunks():
+        assert 0 < len(chunk) <= max_per_call
+        group = (region, tags["Owner"])
+        assert not sent.setdefault(group, set()) & set(chunk)
+        sent[group].update(chunk)
+        calls[group] = calls.get(group, 0) + 1
+
+    assert sent == expected
+    for group, ids in expected.items():
+        assert calls[group] == -(-len(ids) // max_per_call)
+
+
+def test_failed_chunk_only_fails_its_own_tokens():
+    """A failed CreateTags call marks only the events whose resources it carried."""
+    ec2 = MagicMock()
+
+    def create_tags(Resources, Tags):
+        if "i-bad" in Resources:
+            raise ClientError({"Error": {"Code": "InvalidInstanceID.Malformed", "Message": "bad"}}, "CreateTags")
+
+    ec2.create_tags.side_effect = create_tags
+    coalescer = CreateTagsCoalescer(max_per_call=2)
+    coalescer.add("e1", "us-east-1", ["i-1", "i-2"], TAGS_A)
+    coalescer.add("e2", "us-east-1", ["i-bad"], TAGS_A)
+    coalescer.add("e3", "us-east-1", ["i-3"], TAGS_B)
+
+    with patch("src.coalescer.get_account_client", return_value=ec2):
+        failed = coalescer.flush()
+
+    assert failed == {"e2"}
+    assert ec2.create_tags.call_count == 3
+    assert len(coalescer) == 0
+
+
+def test_batch_handler_coalesces_ec2_events():
+    """EC2 events in one batch share a single CreateTags call per region and tag set."""
+    identity = {"type": "IAMUser", "userName": "alice", "arn": "arn:aws:iam::1:user/alice"}
+    records = []
+    for n in range(5):
+        detail = {
+            "eventSource": "ec2.amazonaws.com",
+            "eventName": "CreateVolume" if n % 2 else "CreateVpc",
+            "awsRegion": "us-east-1",
+            "eventTime": "2026-01-01T00:00:00Z",
+            "userIdentity": identity,
+            "responseElements": {"volumeId": f"vol-{n}"} if n % 2 else {"vpc": {"vpcId": f"vpc-{n}"}},
+        }
+        records.append({"messageId": f"m{n}", "body": json.dumps({"detail": detail})})
+
+    ec2 = MagicMock()
+    with patch("src.coalescer.get_account_client", return_value=ec2):
+        result = batch_handler({"Records": records}, None)
+
+    assert result == {"batchItemFailures": []}
+    ec2.create_tags.assert_called_once()
+    assert ec2.create_tags.call_args.kwargs["Resources"] == ["vpc-0", "vol-1", "vpc-2", "vol-3", "vpc-4"]
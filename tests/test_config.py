@@ -0,0 +1,40 @@
+"""Tests for the lazy service handler registry."""
+
+import subprocess
+import sys
+
+from src.config import SERVICE_HANDLERS, HANDLER_PATHS
+from src.resource_extractors import EXTRACTORS
+
+
+def test_registry_covers_every_extractor_key():
+    """Every supported event has both a handler path and an extractor."""
+    assert set(SERVICE_HANDLERS) == set(EXTRACTORS)
+    assert len(SERVICE_HANDLERS) == len(HANDLER_PATHS) == 25
+
+
+def test_registry_resolves_handlers_on_lookup():
+    """Each registered path resolves to the decorated handler function."""
+    for key in SERVICE_HANDLERS:
+        handler = SERVICE_HANDLERS[key]
+        assert callable(handler)
+        assert handler.__name__ == HANDLER_PATHS[key].rsplit(":", 1)[-1]
+        assert SERVICE_HANDLERS[key] is handler
+
+
+def test_unknown_event_returns_none():
+    """Unsupported events miss cleanly through Mapping.get."""
+    assert SERVICE_HANDLERS.get(("ec2.amazonaws.com", "DescribeInstances")) is None
+    assert ("ec2.amazonaws.com", "DescribeInstances") not in SERVICE_HANDLERS
+
+
+def test_cold_import_does_not_load_boto3_or_handlers():
+    """Importing the entry point must not pull in boto3, sqlite3 or any handler module."""
+    code = (
+        "import sys\n"
+        "import src.lambda_function\n"
+        "loaded = [m for m in sys.modules if m.startswith(('boto3', 'sqlite3', 'src.handlers.'))]\n"
+        "print(','.join(loaded))\n"
+    )
+    out = subprocess.run([sys.executable, "-c", code], check=True, capture_output=True, text=True).stdout
+    assert out.strip() == ""
@@ -0,0 +1,141 @@
+"""Tests for the long-running queue consumer."""
+
+import asyncio
+import json
+import os
+import signal
+import time
+from unittest.mock import MagicMock, patch
+
+import pytest
+from hypothesis import given, settings, strategies as st
+
+from src.consumer import Consumer, InMemoryQueue, MessageQueue, SqsQueue
+from benchmarks.events import generate_events
+from benchmarks.fake_aws import FakeAWS
+
+
+def stub_handler(fail=(), delay=0.0):
+    """A batch_handler stand-in that fails the records whose body is in fail."""
+    def handler(event, context):
+        time.sleep(delay)
+        return {"batchItemFailures": [{"itemIdentifier": r["messageId"]}
+                                      for r in event["Records"] if r["body"] in fail]}
+    return handler
+
+
+async def run_until_drained(consumer, queue, keep=0, timeout=5.0):
+    """Run the consumer until every message was received once and at most keep are left."""
+    total = len(queue)
+
+    async def watch():
+        deadline = time.monotonic() + timeout
+        while (consumer.stats["received"] < total or len(queue) > keep) and time.monotonic() < deadline:
+            await asyncio.sleep(0.01)
+        consumer.stop()
+    watcher = asyncio.ensure_future(watch())
+    stats = await consumer.run(install_signal_handlers=False)
+    await watcher
+    return stats
+
+
+# Feature: auto-tag-resources, Property 20: The consumer deletes exactly the messages that were tagged
+@settings(max_examples=25, deadline=None)
+@given(outcomes=st.lists(st.booleans(), min_size=1, max_size=25), workers=st.integers(min_value=1, max_value=4))
+def test_only_successful_messages_are_deleted(outcomes, workers):
+    """Property 20: After one pass, each tagged message was deleted once and every
+    failed message is still queued for redelivery."""
+    queue = InMemoryQueue()
+    ids = {queue.send(f"body-{n}"): ok for n, ok in enumerate(outcomes)}
+    failing = {f"body-{n}" for n, ok in enumerate(outcomes) if not ok}
+    consumer = Consumer(queue, workers=workers, wait_seconds=0.01, visibility_timeout=60,
+                        handler=stub_handler(failing))
+
+    stats = asyncio.run(run_until_drained(consumer, queue, keep=len(failing)))
+
+    assert sorted(queue.deleted) == sorted(mid for mid, ok in ids.items() if ok)
+    assert len(queue) == len(failing)
+    assert stats["deleted"] == len(queue.deleted) and stats["failed"] == len(failing)
+
+
+def test_events_run_through_the_batch_pipeline():
+    queue = InMemoryQueue()
+    keys = [("ec2.amazonaws.com", "RunInstances"), ("sns.amazonaws.com", "CreateTopic")]
+    for event in generate_events(12, keys=keys):
+        event["detail"].update(awsRegion="us-east-1", eventTime="2025-01-01T00:00:00Z",
+                               userIdentity={"type": "Root", "arn": "arn:aws:iam::1:root"})
+        queue.send(json.dumps(event))
+    with FakeAWS() as aws, patch("src.lambda_function.IDEMPOTENCY", None):
+        stats = asyncio.run(run_until_drained(Consumer(queue, workers=2, wait_seconds=0.01), queue))
+    assert len(queue) == 0 and stats["deleted"] == 12
+    assert aws.calls["sns:TagResource"] == 6
+    # EC2 events in one received batch (up to 10 messages) share a CreateTags call
+    assert aws.calls["ec2:CreateTags"] <= 2
+
+
+def test_slow_batch_visibility_is_extended():
+    queue = InMemoryQueue()
+    message_id = queue.send("slow")
+    consumer = Consumer(queue, workers=2, wait_seconds=0.01, visibility_timeout=0.1,
+                        handler=stub_handler(delay=0.35))
+    stats = asyncio.run(run_until_drained(consumer, queue))
+    assert stats["extended"] >= 2
+    assert queue.deleted == [message_id]
+    assert stats["received"] == 1
+
+
+def test_sigterm_finishes_in_flight_batch():
+    queue = InMemoryQueue()
+    queue.send("in-flight")
+    consumer = Consumer(queue, workers=1, wait_seconds=0.01, visibility_timeout=60,
+                        handler=stub_handler(delay=0.2))
+
+    async def main():
+        loop = asyncio.get_running_loop()
+        loop.call_later(0.1, os.kill, os.getpid(), signal.SIGTERM)
+        return await asyncio.wait_for(consumer.run(), 5)
+
+    stats = asyncio.run(main())
+    assert stats["deleted"] == 1 and len(queue) == 0
+
+
+def test_handler_crash_leaves_messages_for_redelivery():
+    queue = InMemoryQueue()
+    queue.send("a")
+
+    def boom(event, context):
+        raise RuntimeError("boom")
+
+    consumer = Consumer(queue, workers=1, wait_seconds=0.01, visibility_timeout=60, handler=boom)
+    stats = asyncio.run(run_until_drained(consumer, queue, timeout=0.2))
+    assert stats["failed"] == 1 and len(queue) == 1
+
+
+def test_sqs_queue_batches_deletes_and_extensions():
+    client = MagicMock()
+    client.delete_message_batch.return_value = {"Failed": []}
+    with patch("src.consumer.get_client", return_value=client):
+        queue = SqsQueue("https://sqs.us-east-1.amazonaws.com/1/q", "us-east-1")
+    handles = [f"h{n}" for n in range(23)]
+    queue.delete(handles)
+    queue.change_visibility(handles, 120)
+    assert client.delete_message_batch.call_count == 3
+    assert client.change_message_visibility_batch.call_count == 3
+    sent = [e["ReceiptHandle"] for c in client.delete_message_batch.call_args_list for e in c.kwargs["Entries"]]
+    assert sent == handles
+
+
+def test_sqs_queue_send_clamps_delay():
+    client = MagicMock()
+    with patch("src.consumer.get_client", return_value=client):
+        queue = SqsQueue("https://sqs.us-east-1.amazonaws.com/1/q", "us-east-1")
+    queue.send("body", delay_seconds=4.6)
+    queue.send("body", delay_seconds=3600)
+    delays = [c.kwargs["DelaySeconds"] for c in client.send_message.call_args_list]
+    assert delays == [5, 900]
+    assert client.send_message.call_args.kwargs["QueueUrl"] == "https://sqs.us-east-1.amazonaws.com/1/q"
+
+
+def test_queue_interface_is_abstract():
+    with pytest.raises(TypeError):
+        MessageQueue()
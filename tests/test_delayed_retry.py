@@ -0,0 +1,156 @@
+"""Tests for delayed NotFound retries: the timer wheel and the durable delay queue."""
+
+import json
+from unittest.mock import patch
+
+from botocore.exceptions import ClientError
+import pytest
+from hypothesis import given, settings, strategies as st
+
+from src import delayed_retry
+from src.consumer import InMemoryQueue
+from src.delayed_retry import DelayedRetries, DelayQueue, TimerWheel, RETRY_ATTEMPT_KEY
+from src.lambda_function import lambda_handler, batch_handler
+from src.idempotency import IdempotencyCache
+from benchmarks.events import generate_events
+from benchmarks.fake_aws import FakeAWS
+
+
+class NotFoundAWS(FakeAWS):
+    """FakeAWS whose first `misses` CreateTags calls fail with InvalidInstanceID.NotFound."""
+
+    def __init__(self, misses, **kwargs):
+        super().__init__(**kwargs)
+        self.misses = misses
+
+    def handle(self, service, operation, params):
+        response = super().handle(service, operation, params)
+        if operation == "CreateTags" and self.misses:
+            self.misses -= 1
+            raise ClientError({"Error": {"Code": "InvalidInstanceID.NotFound", "Message": ""}}, operation)
+        return response
+
+
+class Context:
+    def __init__(self, remaining_ms):
+        self.remaining_ms = remaining_ms
+
+    def get_remaining_time_in_millis(self):
+        return self.remaining_ms
+
+
+def run_instances_events(count=1):
+    events = list(generate_events(count, keys=[("ec2.amazonaws.com", "RunInstances")]))
+    for event in events:
+        event["detail"].update(awsRegion="us-east-1", eventTime="2025-01-01T00:00:00Z",
+                               userIdentity={"type": "Root", "arn": "arn:aws:iam::1:root"})
+    return events
+
+
+def fast_retries(schedule=(0.05, 0.05, 0.05)):
+    return patch("src.lambda_function.begin_delayed_retries",
+                 lambda: delayed_retry.begin(schedule=schedule))
+
+
+# Feature: auto-tag-resources, Property 21: Timer wheel items fire once, on time
+@settings(max_examples=100)
+@given(delays=st.lists(st.floats(min_value=0, max_value=30), min_size=1, max_size=40),
+       steps=st.lists(st.floats(min_value=0, max_value=5), min_size=1, max_size=40),
+       slots=st.integers(min_value=1, max_value=16))
+def test_wheel_pops_each_item_once_after_its_delay(delays, steps, slots):
+    """Property 21: For any delays and clock advances, including delays longer than
+    one revolution, every item is popped exactly once, never before its delay and
+    by the first pop at least one tick after it."""
+    now = [100.0]
+    wheel = TimerWheel(tick=0.25, slots=slots, clock=lambda: now[0])
+    due = {n: wheel.schedule(delay, n) for n, delay in enumerate(delays)}
+    assert all(due[n] >= 100.0 + delay for n, delay in enumerate(delays))
+    popped = {}
+    for step in steps + [31.0]:
+        now[0] += step
+        for item in wheel.pop_due():
+            assert item not in popped
+            popped[item] = now[0]
+        assert len(wheel) == len(delays) - len(popped)
+    assert set(popped) == set(due)
+    for item, at in popped.items():
+        assert at >= due[item]
+
+
+def test_short_delay_stays_inline_and_long_delay_is_queued():
+    queue = InMemoryQueue()
+    retries = DelayedRetries(queue, schedule=(0.1, 60), inline_seconds=5)
+    detail = {"eventID": "e1", "eventName": "RunInstances"}
+
+    assert retries.defer(detail)
+    assert len(retries.wheel) == 1 and len(queue) == 0
+
+    assert retries.defer({**detail, RETRY_ATTEMPT_KEY: 1})
+    assert len(queue) == 1
+    assert queue.receive(1, wait_seconds=0, visibility_timeout=60) == []
+
+    # Out of retries
+    assert not retries.defer({**detail, RETRY_ATTEMPT_KEY: 2})
+
+
+def test_without_queue_only_inline_delays_are_accepted():
+    retries = DelayedRetries(None, schedule=(0.1, 60), inline_seconds=5)
+    assert retries.defer({"eventID": "e1"})
+    assert not retries.defer({"eventID": "e1", RETRY_ATTEMPT_KEY: 1})
+
+
+def test_not_found_is_retried_inline_without_sleeping():
+    with NotFoundAWS(misses=2) as aws, fast_retries(), patch("src.lambda_function.IDEMPOTENCY", None), \
+            patch("src.retry.time.sleep") as sleep:
+        response = lambda_handler(run_instances_events()[0], None)
+    assert response["statusCode"] == 200
+    assert aws.calls["ec2:CreateTags"] == 3 and aws.misses == 0
+    sleep.assert_not_called()
+
+
+def test_retry_past_the_deadline_goes_to_the_delay_queue_and_comes_back():
+    queue = InMemoryQueue()
+    delayed_retry.set_delay_queue(queue)
+    cache = IdempotencyCache()
+    event = run_instances_events()[0]
+    try:
+        with NotFoundAWS(misses=1) as aws, fast_retries(schedule=(0.5,)), \
+                patch("src.lambda_function.IDEMPOTENCY", cache):
+            lambda_handler(event, Context(remaining_ms=2000))
+            assert aws.calls["ec2:CreateTags"] == 1 and len(queue) == 1
+
+            message = queue.receive(1, wait_seconds=2, visibility_timeout=60)[0]
+            body = json.loads(message["Body"])
+            assert body["detail"][RETRY_ATTEMPT_KEY] == 1
+            # Direct mode receives the queued retry as an SQS batch
+            response = lambda_handler({"Records": [{"messageId": "1", "body": message["Body"]}]}, None)
+    finally:
+        delayed_retry.set_delay_queue(None)
+    assert response["batchItemFailures"] == []
+    assert aws.calls["ec2:CreateTags"] == 2
+    event_id = event["detail"]["eventID"]
+    assert cache.seen(event_id) and cache.seen(f"{event_id}#retry1")
+
+
+def test_exhausted_retries_are_reported_as_failures():
+    with NotFoundAWS(misses=10) as aws, fast_retries(schedule=(0.01,)), \
+            patch("src.lambda_function.IDEMPOTENCY", None), \
+            patch("src.lambda_function.log_event_failure") as log_failure:
+        lambda_handler(run_instances_events()[0], None)
+    assert aws.calls["ec2:CreateTags"] == 2
+    log_failure.assert_called_once()
+
+
+def test_coalesced_not_found_falls_back_and_is_deferred():
+    events = run_instances_events(3)
+    records = [{"messageId": str(n), "body": json.dumps(e)} for n, e in enumerate(events)]
+    with NotFoundAWS(misses=2) as aws, fast_retries(), patch("src.lambda_function.IDEMPOTENCY", None):
+        response = batch_handler({"Records": records}, None)
+    assert response["batchItemFailures"] == []
+    # One coalesced call, three per-event fallbacks (one NotFound), one delayed retry
+    assert aws.calls["ec2:CreateTags"] == 5 and aws.misses == 0
+
+
+def test_delay_queue_interface_is_abstract():
+    with pytest.raises(TypeError):
+        DelayQueue()
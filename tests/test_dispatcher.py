@@ -0,0 +1,156 @@
+"""Tests for the bounded tagging dispatcher."""
+
+import threading
+import time
+from unittest.mock import MagicMock
+
+from hypothesis import given, settings, strategies as st
+
+from src.dispatcher import Dispatcher, Task, interleave_by_region, parse_region_limits
+
+
+def tracked_task(service, region, active, peaks, lock, delay=0.02, value="ok"):
+    """A task that records how many tasks share its service while it runs."""
+    def run():
+        with lock:
+            active[service] = active.get(service, 0) + 1
+            peaks[service] = max(peaks.get(service, 0), active[service])
+        time.sleep(delay)
+        with lock:
+            active[service] -= 1
+        return value
+    return Task(service, region, run)
+
+
+def test_tasks_run_concurrently_and_report_parallelism():
+    active, peaks, lock = {}, {}, threading.Lock()
+    tasks = [tracked_task("ec2", f"r{n % 4}", active, peaks, lock) for n in range(8)]
+
+    results, stats = Dispatcher(max_workers=8, per_service_limit=8, per_region_limit=8).run(tasks)
+
+    assert results == ["ok"] * 8
+    assert stats["completed"] == 8
+    assert stats["peak_concurrency"] > 1
+    assert stats["parallelism"] > 1.5
+
+
+def test_per_service_cap_is_respected():
+    active, peaks, lock = {}, {}, threading.Lock()
+    tasks = [tracked_task("ec2", "us-east-1", active, peaks, lock) for _ in range(6)]
+    tasks += [tracked_task("sns", "eu-west-1", active, peaks, lock) for _ in range(6)]
+
+    Dispatcher(max_workers=12, per_service_limit=2, per_region_limit=12).run(tasks)
+
+    assert peaks["ec2"] <= 2
+    assert peaks["sns"] <= 2
+
+
+def test_no_new_work_near_deadline():
+    context = MagicMock()
+    context.get_remaining_time_in_millis.return_value = 1000
+    fn = MagicMock(return_value="ok")
+
+    results, stats = Dispatcher(deadline_margin_ms=5000).run([Task("ec2", "us-east-1", fn)] * 3, context)
+
+    assert results == [None, None, None]
+    assert stats["skipped"] == 3
+    fn.assert_not_called()
+
+
+def test_task_queued_past_deadline_is_skipped():
+    """A task whose deadline margin runs out while it waits for a slot does not start."""
+    context = MagicMock()
+    context.get_remaining_time_in_millis.side_effect = [10000, 1000]
+    fn = MagicMock(return_value="ok")
+
+    results, stats = Dispatcher(deadline_margin_ms=5000).run([Task("ec2", "us-east-1", fn)], context)
+
+    assert results == [None]
+    assert stats["skipped"] == 1
+    fn.assert_not_called()
+
+
+def test_crashing_task_yields_none():
+    def boom():
+        raise RuntimeError("boom")
+
+    results, stats = Dispatcher(max_workers=4).run([Task("ec2", None, boom), Task("ec2", None, lambda: 1)])
+
+    assert results == [None, 1]
+    assert stats["errors"] == 1
+    assert stats["completed"] == 1
+
+
+# Feature: auto-tag-resources, Property 18: Tasks start round-robin across regions
+@settings(max_examples=100)
+@given(regions=st.lists(st.sampled_from(["us-east-1", "eu-west-1", "ap-southeast-2", None]), max_size=40))
+def test_interleave_is_fair_per_region(regions):
+    """Property 18: The start order is a permutation that keeps each region's own
+    order, and no region gets a second turn before every region with work left had one."""
+    tasks = [Task("ec2", region, None) for region in regions]
+    order = interleave_by_region(tasks)
+
+    assert sorted(order) == list(range(len(tasks)))
+    for region in set(regions):
+        indices = [i for i in order if regions[i] == region]
+        assert indices == sorted(indices)
+    started = {}
+    for i in order:
+        started[regions[i]] = started.get(regions[i], 0) + 1
+        for region in set(regions):
+            if started.get(region, 0) < regions.count(region):
+                assert started[regions[i]] - started.get(region, 0) <= 1
+
+
+def test_noisy_region_does_not_starve_others():
+    finished = {}
+
+    def work(region, n):
+        def run():
+            time.sleep(0.01)
+            finished[(region, n)] = time.perf_counter()
+            return n
+        return Task("ec2", region, run)
+
+    tasks = [work("us-east-1", n) for n in range(20)] + [work("eu-west-1", 0)]
+    results, _ = Dispatcher(max_workers=4, per_region_limit=8, region_limits={"us-east-1": 2}).run(tasks)
+
+    assert results == list(range(20)) + [0]
+    noisy = sorted(t for (region, _), t in finished.items() if region == "us-east-1")
+    assert finished[("eu-west-1", 0)] < noisy[2]
+
+
+def test_saturated_region_does_not_hold_service_slots():
+    """Tasks queued on a full region do not take the service slots another region needs."""
+    dispatcher = Dispatcher(max_workers=6, per_service_limit=2, region_limits={"us-east-1": 1})
+    started, release = threading.Event(), threading.Event()
+
+    def blocked():
+        started.set()
+        release.wait(5)
+
+    busy = threading.Thread(target=dispatcher.run, args=([Task("ec2", "us-east-1", blocked)] * 6,))
+    busy.start()
+    started.wait(5)
+    time.sleep(0.05)
+    quiet = []
+    other = threading.Thread(target=lambda: quiet.extend(dispatcher.run([Task("ec2", "eu-west-1", lambda: 1)])[0]))
+    other.start()
+    other.join(1)
+    ran_while_busy = quiet == [1]
+    release.set()
+    busy.join(5)
+    other.join(5)
+
+    assert ran_while_busy
+
+
+def test_region_limit_override_is_respected():
+    active, peaks, lock = {}, {}, threading.Lock()
+    tasks = [tracked_task(region, region, active, peaks, lock) for region in ["ap-southeast-1", "us-east-1"] * 6]
+
+    Dispatcher(max_workers=12, per_service_limit=12, per_region_limit=6,
+               region_limits=parse_region_limits("ap-southeast-1=1")).run(tasks)
+
+    assert peaks["ap-southeast-1"] == 1
+    assert peaks["us-east-1"] > 1
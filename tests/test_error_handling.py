@@ -85,3 +85,102 @@ def test_retry_with_backoff_raises_non_throttle():
     except ClientError as e:
         assert e.response["Error"]["Code"] == "AccessDenied"
     assert func.call_count == 1
+
+
+def test_handle_tagging_errors_reports_outcome():
+    """Wrapped handlers return True on success and False when an error is caught."""
+    from src.error_handler import handle_tagging_errors
+
+    @handle_tagging_errors("CreateTags")
+    def ok(detail, tags):
+        pass
+
+    @handle_tagging_errors("CreateTags")
+    def denied(detail, tags):
+        raise ClientError({"Error": {"Code": "AccessDenied", "Message": "No access"}}, "CreateTags")
+
+    @handle_tagging_errors("CreateTags")
+    def broken(detail, tags):
+        raise RuntimeError("boom")
+
+    assert ok({}, {}) is True
+    assert denied({}, {}) is False
+    assert broken({}, {}) is False
+
+
+def client_error(code, status=400):
+    return ClientError(
+        {"Error": {"Code": code, "Message": code}, "ResponseMetadata": {"HTTPStatusCode": status}},
+        "CreateTags",
+    )
+
+
+def test_classify_error():
+    from src.retry import classify_error, THROTTLE, TRANSIENT, NOT_FOUND, FATAL
+    from botocore.exceptions import EndpointConnectionError
+
+    assert classify_error(client_error("RequestLimitExceeded")) == THROTTLE
+    assert classify_error(client_error("InternalError", 500)) == TRANSIENT
+    assert classify_error(client_error("SomethingNew", 503)) == TRANSIENT
+    assert classify_error(client_error("InvalidInstanceID.NotFound")) == NOT_FOUND
+    assert classify_error(client_error("DBInstanceNotFound", 404)) == NOT_FOUND
+    assert classify_error(client_error("AccessDenied", 403)) == FATAL
+    assert classify_error(EndpointConnectionError(endpoint_url="https://ec2")) == TRANSIENT
+    assert classify_error(ValueError("bad")) == FATAL
+
+
+# Feature: auto-tag-resources, Property 10: Jittered backoff stays within bounds
+@settings(max_examples=100)
+@given(
+    jitter=st.sampled_from(["full", "decorrelated"]),
+    base=st.floats(min_value=0.01, max_value=2.0),
+    cap=st.floats(min_value=2.0, max_value=30.0),
+    attempts=st.integers(min_value=1, max_value=10),
+)
+def test_backoff_within_bounds(jitter, base, cap, attempts):
+    """Property 10: Every backoff is non-negative and never exceeds the cap;
+    full jitter never exceeds base * 2^attempt."""
+    from src.retry import RetryPolicy
+
+    policy = RetryPolicy(base_delay=base, max_delay=cap, jitter=jitter)
+    previous = base
+    for attempt in range(attempts):
+        delay = policy.backoff(attempt, previous)
+        assert 0 <= delay <= cap
+        if jitter == "full":
+            assert delay <= base * (2 ** attempt)
+        previous = delay
+
+
+@patch("src.retry.time.sleep")
+def test_retry_stops_when_deadline_is_near(mock_sleep):
+    """No retry is attempted if its sleep would run past the invocation deadline."""
+    from src.retry import RetryPolicy
+
+    func = MagicMock(side_effect=client_error("Throttling"))
+    with patch("src.retry.remaining_seconds", return_value=0.5):
+        try:
+            RetryPolicy(max_attempts=5, base_delay=0.1, deadline_margin=1.0).call(func)
+            assert False, "Should have raised"
+        except ClientError:
+            pass
+    assert func.call_count == 1
+    mock_sleep.assert_not_called()
+
+
+@patch("src.retry.time.sleep")
+def test_handlers_retry_automatically(mock_sleep):
+    """handle_tagging_errors runs every handler through the retry engine."""
+    from src.error_handler import handle_tagging_errors
+
+    calls = []
+
+    @handle_tagging_errors("CreateTags")
+    def flaky(detail, tags):
+        calls.append(1)
+        if len(calls) < 3:
+            raise client_error("RequestLimitExceeded")
+
+    assert flaky({}, {}) is True
+    assert len(calls) == 3
+    assert mock_sleep.call_count == 2
@@ -0,0 +1,70 @@
+"""Tests for compact, lazily formatted event logging."""
+
+import json
+import logging
+from unittest.mock import patch
+
+from hypothesis import given, settings, strategies as st
+
+from src.event_log import CappedPayload, log_event, summarize_event
+from src.lambda_function import lambda_handler
+from benchmarks.event_logging import run_instances_event
+
+
+# Feature: auto-tag-resources, Property 13: Capped payloads never exceed the byte cap
+@settings(max_examples=100)
+@given(
+    payload=st.recursive(
+        st.one_of(st.none(), st.integers(), st.text(max_size=30)),
+        lambda inner: st.lists(inner, max_size=5) | st.dictionaries(st.text(max_size=5), inner, max_size=5),
+        max_leaves=30,
+    ),
+    max_bytes=st.integers(min_value=1, max_value=200),
+)
+def test_capped_payload_respects_cap(payload, max_bytes):
+    """Property 13: A payload that fits is logged verbatim; a larger one keeps at
+    most max_bytes of its JSON, as a prefix, followed by a truncation marker."""
+    full = json.dumps(payload)
+    text = str(CappedPayload(payload, max_bytes=max_bytes))
+    if len(full.encode("utf-8")) <= max_bytes:
+        assert text == full
+    else:
+        head, marker = text.rsplit("...[truncated", 1)
+        assert len(head.encode("utf-8")) <= max_bytes
+        assert full.startswith(head)
+
+
+def test_summary_fields():
+    summary = summarize_event(run_instances_event(3))
+    assert summary == {
+        "source": "ec2.amazonaws.com",
+        "name": "RunInstances",
+        "eventID": "00000000-0000-0000-0000-000000000000",
+        "principal": "arn:aws:iam::123456789012:user/bench",
+        "resources": 6,
+    }
+
+
+def test_nothing_is_serialized_when_logging_is_off(caplog):
+    with caplog.at_level(logging.WARNING), patch("src.event_log.json") as json_mock:
+        log_event(run_instances_event(3))
+    json_mock.dumps.assert_not_called()
+    json_mock.JSONEncoder.assert_not_called()
+
+
+def test_handler_logs_summary_not_payload(caplog):
+    event = run_instances_event(200)
+    with caplog.at_level(logging.INFO), patch("src.lambda_function.IDEMPOTENCY", None), \
+            patch("src.handlers.common.get_account_client"):
+        lambda_handler(event, None)
+    assert "networkInterfaceSet" not in caplog.text
+    assert '"resources": 400' in caplog.text
+
+
+def test_failed_event_payload_is_logged_capped(caplog):
+    event = run_instances_event(200)
+    with caplog.at_level(logging.INFO), patch("src.lambda_function.IDEMPOTENCY", None), \
+            patch("src.lambda_function.prepare_event", side_effect=RuntimeError("boom")):
+        lambda_handler(event, None)
+    failure = [r for r in caplog.records if r.getMessage().startswith("Event failed (RuntimeError)")]
+    assert len(failure) == 1 and "truncated" in failure[0].getMessage()
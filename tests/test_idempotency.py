@@ -0,0 +1,88 @@
+"""Tests for the eventID idempotency cache."""
+
+import json
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from src.idempotency import IdempotencyCache, IdempotencyStore, LocalLRUStore, SqliteStore
+from src.lambda_function import lambda_handler, batch_handler
+
+
+def sns_event(event_id, topic="arn:aws:sns:us-east-1:1:t"):
+    return {"detail": {
+        "eventID": event_id,
+        "eventSource": "sns.amazonaws.com",
+        "eventName": "CreateTopic",
+        "userIdentity": {"type": "Root"},
+        "responseElements": {"topicArn": topic},
+    }}
+
+
+def test_lru_evicts_oldest_and_expires():
+    store = LocalLRUStore(maxsize=2)
+    store.add("a", 60)
+    store.add("b", 60)
+    assert store.contains("a")
+    store.add("c", 60)
+    assert not store.contains("b")
+    assert store.contains("a") and store.contains("c")
+
+    store.add("d", -1)
+    assert not store.contains("d")
+
+
+def test_persistent_store_survives_new_container(tmp_path):
+    path = str(tmp_path / "idempotency.db")
+    IdempotencyCache(persistent=SqliteStore(path), ttl=60).mark("evt-1")
+
+    fresh = IdempotencyCache(persistent=SqliteStore(path), ttl=60)
+    assert fresh.seen("evt-1")
+    assert fresh.local.contains("evt-1")
+    assert not fresh.seen("evt-2")
+
+
+def test_sqlite_store_expires_rows(tmp_path):
+    store = SqliteStore(str(tmp_path / "idempotency.db"))
+    store.add("old", -1)
+    store.add("new", 60)
+    assert not store.contains("old")
+    assert store.purge_expired() == 1
+    assert store.contains("new")
+
+
+def test_lambda_handler_skips_replayed_event():
+    handler = MagicMock(return_value=True)
+    with patch("src.lambda_function.IDEMPOTENCY", IdempotencyCache()), \
+            patch("src.lambda_function.SERVICE_HANDLERS", {("sns.amazonaws.com", "CreateTopic"): handler}):
+        assert lambda_handler(sns_event("evt-1"), None)["body"] == "Event processed"
+        assert lambda_handler(sns_event("evt-1"), None)["body"] == "Duplicate event"
+    handler.assert_called_once()
+
+
+def test_failed_events_are_not_recorded():
+    handler = MagicMock(return_value=False)
+    with patch("src.lambda_function.IDEMPOTENCY", IdempotencyCache()), \
+            patch("src.lambda_function.SERVICE_HANDLERS", {("sns.amazonaws.com", "CreateTopic"): handler}):
+        lambda_handler(sns_event("evt-1"), None)
+        lambda_handler(sns_event("evt-1"), None)
+    assert handler.call_count == 2
+
+
+def test_batch_skips_duplicates_within_and_across_batches():
+    handler = MagicMock()
+    # Batches hand each planned operation to the handler's executor
+    handler.execute.return_value = True
+    records = [{"messageId": f"m{n}", "body": json.dumps(sns_event(f"evt-{n % 2}"))} for n in range(4)]
+    with patch("src.lambda_function.IDEMPOTENCY", IdempotencyCache()), \
+            patch("src.lambda_function.SERVICE_HANDLERS", {("sns.amazonaws.com", "CreateTopic"): handler}):
+        assert batch_handler({"Records": records}, None) == {"batchItemFailures": []}
+        assert handler.execute.call_count == 2
+        batch_handler({"Records": records}, None)
+    assert handler.execute.call_count == 2
+    handler.assert_not_called()
+
+
+def test_store_interface_is_abstract():
+    with pytest.raises(TypeError):
+        IdempotencyStore()
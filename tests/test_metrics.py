@@ -0,0 +1,88 @@
+"""Tests for EMF metrics buffering and instrumentation."""
+
+import io
+import json
+from unittest.mock import patch
+
+from hypothesis import given, settings, strategies as st
+
+from src.metrics import MetricsBuffer, MAX_VALUES_PER_METRIC, MILLISECONDS
+from src.lambda_function import lambda_handler
+from benchmarks.events import generate_events
+from benchmarks.fake_aws import FakeAWS
+
+
+def emitted(stream):
+    return [json.loads(line) for line in stream.getvalue().splitlines()]
+
+
+def metric_values(docs, name, **dimensions):
+    """Collect every value of a metric across documents with matching dimensions."""
+    values = []
+    for doc in docs:
+        if name in doc and all(doc.get(k) == v for k, v in dimensions.items()):
+            values.extend(doc[name] if isinstance(doc[name], list) else [doc[name]])
+    return values
+
+
+# Feature: auto-tag-resources, Property 15: EMF flush preserves every recorded value
+@settings(max_examples=100)
+@given(
+    samples=st.lists(
+        st.tuples(st.sampled_from(["ApiCalls", "ApiLatency"]), st.sampled_from(["ec2", "rds"]),
+                  st.integers(min_value=0, max_value=1000)),
+        max_size=300,
+    ),
+)
+def test_flush_preserves_values(samples):
+    """Property 15: Counts flush as their sum, timings as every value, no metric
+    exceeds the EMF per-metric value limit, and each document declares its metrics."""
+    stream = io.StringIO()
+    buffer = MetricsBuffer("Test", stream=stream)
+    for name, service, value in samples:
+        buffer.add(name, value, "Count" if name == "ApiCalls" else MILLISECONDS, Service=service)
+    buffer.flush()
+    docs = emitted(stream)
+
+    for doc in docs:
+        definition = doc["_aws"]["CloudWatchMetrics"][0]
+        assert definition["Dimensions"] == [["Service"]]
+        for metric in definition["Metrics"]:
+            value = doc[metric["Name"]]
+            assert not isinstance(value, list) or len(value) <= MAX_VALUES_PER_METRIC
+    for service in ("ec2", "rds"):
+        counts = [v for n, s, v in samples if n == "ApiCalls" and s == service]
+        timings = [v for n, s, v in samples if n == "ApiLatency" and s == service]
+        assert sum(metric_values(docs, "ApiCalls", Service=service)) == sum(counts)
+        assert sorted(metric_values(docs, "ApiLatency", Service=service)) == sorted(timings)
+
+
+def test_disabled_buffer_writes_nothing():
+    stream = io.StringIO()
+    buffer = MetricsBuffer("Test", enabled=False, stream=stream)
+    buffer.add("ApiCalls", 1, Service="ec2")
+    assert buffer.flush() == 0 and stream.getvalue() == ""
+
+
+def test_invocation_flushes_handler_and_api_metrics():
+    stream = io.StringIO()
+    event = next(generate_events(1, fleet_sizes=(3,)))
+    with FakeAWS(), patch("src.metrics.METRICS.stream", stream), patch("src.lambda_function.IDEMPOTENCY", None):
+        lambda_handler(event, None)
+    docs = emitted(stream)
+    assert metric_values(docs, "ApiCalls", Service="ec2", Operation="CreateTags") == [1]
+    assert len(metric_values(docs, "ApiLatency", Service="ec2", Operation="CreateTags")) == 1
+    assert metric_values(docs, "ResourcesTagged", EventName="RunInstances") == [6]
+    assert len(metric_values(docs, "HandlerLatency", EventName="RunInstances")) == 1
+
+
+def test_throttles_retries_and_errors_are_counted():
+    stream = io.StringIO()
+    event = next(generate_events(1))
+    with FakeAWS(throttle_rate=1.0), patch("src.metrics.METRICS.stream", stream), \
+            patch("src.lambda_function.IDEMPOTENCY", None), patch("src.retry.time.sleep"):
+        lambda_handler(event, None)
+    docs = emitted(stream)
+    assert metric_values(docs, "Throttles", Service="ec2", Operation="CreateTags") == [4]
+    assert metric_values(docs, "Retries", ErrorKind="throttle") == [3]
+    assert metric_values(docs, "TaggingErrors", EventName="RunInstances", ErrorCode="Throttling") == [1]
@@ -0,0 +1,108 @@
+"""Tests for the TaggingOperation planner."""
+
+import json
+from unittest.mock import patch
+
+from hypothesis import given, settings, strategies as st
+
+from src.config import HANDLER_PATHS, SERVICE_HANDLERS
+from src.coalescer import CreateTagsCoalescer
+from src.tag_grouper import owner_tokens
+from src.idempotency import IdempotencyCache
+from src.lambda_function import batch_handler
+from src.operations import TAG_APIS, plan_operation
+from src.resource_extractors import EXTRACTORS
+from src.tag_cache import TAG_CACHE
+from benchmarks.events import generate_events, make_detail
+from benchmarks.fake_aws import FakeAWS
+
+
+def tags_for(detail):
+    return TAG_CACHE.tags_for(detail["userIdentity"], detail["eventTime"], "Development", "CostTracking")
+
+
+# Feature: auto-tag-resources, Property 25: The plan names the call the handler makes
+@settings(max_examples=50, deadline=None)
+@given(key=st.sampled_from(sorted(HANDLER_PATHS)), fleet_size=st.integers(min_value=1, max_value=5))
+def test_plan_matches_executed_calls(key, fleet_size):
+    """Property 25: For any supported event, executing its handler ends in exactly
+    the planned service:API, in the planned region, covering every planned resource."""
+    detail = make_detail(key, fleet_size=fleet_size)
+    tags = tags_for(detail)
+    operation = plan_operation(key, detail, tags)
+    assert operation.resource_ids == tuple(EXTRACTORS[key](detail))
+    assert operation.tags is tags
+
+    with FakeAWS() as aws:
+        aws.trace = []
+        assert SERVICE_HANDLERS[key].execute(operation)
+    writes = [call for call in aws.trace if call["api"] == f"{operation.service}:{operation.api}"]
+    assert writes and writes == aws.trace[-len(writes):]
+    assert all(call["region"] == operation.region for call in writes)
+    params = " ".join(str(call["params"]) for call in writes)
+    assert all(resource_id in params for resource_id in operation.resource_ids)
+
+
+def test_every_handler_has_a_tagging_api():
+    assert set(TAG_APIS) == set(HANDLER_PATHS)
+
+
+def test_event_without_resources_plans_nothing():
+    detail = make_detail(("sns.amazonaws.com", "CreateTopic"))
+    detail["responseElements"] = None
+    assert plan_operation(("sns.amazonaws.com", "CreateTopic"), detail, tags_for(detail)) is None
+
+
+def test_describe_is_json_safe():
+    key = ("elasticloadbalancing.amazonaws.com", "CreateLoadBalancer")
+    detail = make_detail(key, fleet_size=2)
+    plan = plan_operation(key, detail, tags_for(detail), "evt-1").describe()
+    assert plan["eventID"] == "evt-1" and plan["api"] == "elbv2:AddTags"
+    assert isinstance(plan["resources"], list) and len(plan["resources"]) == 2
+    assert isinstance(plan["tags"], dict)
+
+
+def test_coalescer_groups_by_tag_set_reference():
+    key = ("ec2.amazonaws.com", "CreateVolume")
+    detail = make_detail(key)
+    tags = tags_for(detail)
+    coalescer = CreateTagsCoalescer()
+    for n in range(3):
+        coalescer.add(n, "us-east-1", [f"vol-{n}"], tags)
+    coalescer.add(3, "us-east-1", ["vol-3"], dict(tags))
+    [(_, _, resource_ids, _, owners)] = list(coalescer.chunks())
+    assert resource_ids == ["vol-0", "vol-1", "vol-2", "vol-3"] and owner_tokens(owners) == {0, 1, 2, 3}
+
+
+def test_batch_events_are_planned_once():
+    keys = [key for key in HANDLER_PATHS if key[0] != "ec2.amazonaws.com"]
+    events = list(generate_events(len(keys), keys=keys))
+    records = [{"messageId": f"m{n}", "body": json.dumps(event)} for n, event in enumerate(events)]
+    extractions = []
+
+    def counting(key):
+        def extract(detail):
+            extractions.append(key)
+            return EXTRACTORS[key](detail)
+        return extract
+
+    with FakeAWS() as aws, patch("src.lambda_function.IDEMPOTENCY", IdempotencyCache()), \
+            patch("src.operations.EXTRACTORS", {key: counting(key) for key in EXTRACTORS}):
+        assert batch_handler({"Records": records}, None) == {"batchItemFailures": []}
+    assert sorted(extractions) == sorted(keys)
+    assert sum(aws.calls.values()) >= len(keys)
+
+
+def test_dry_run_logs_plans_without_tagging(caplog):
+    events = list(generate_events(len(HANDLER_PATHS), keys=sorted(HANDLER_PATHS)))
+    records = [{"messageId": f"m{n}", "body": json.dumps(event)} for n, event in enumerate(events)]
+    cache = IdempotencyCache()
+
+    with FakeAWS() as aws, patch("src.lambda_function.IDEMPOTENCY", cache), \
+            patch("src.lambda_function.DRY_RUN", True), caplog.at_level("INFO"):
+        assert batch_handler({"Records": records}, None) == {"batchItemFailures": []}
+    plans = [json.loads(r.getMessage().split(": ", 1)[1]) for r in caplog.records
+             if r.getMessage().startswith("Dry run, planned operation")]
+    assert sorted(plan["eventID"] for plan in plans) == sorted(e["detail"]["eventID"] for e in events)
+    assert aws.calls == {}
+    assert not any(cache.seen(e["detail"]["eventID"]) for e in events)
@@ -0,0 +1,90 @@
+"""Tests for the token-bucket rate limiter."""
+
+import threading
+from unittest.mock import patch
+
+from botocore.stub import Stubber
+from hypothesis import given, settings, strategies as st
+
+from src import client_pool
+from src.rate_limiter import RateLimiter, TokenBucket, parse_rate_limits, DEFAULT_RATES, FALLBACK_RATE
+
+
+def test_parse_rate_limits():
+    assert parse_rate_limits("ec2:CreateTags=10/50, tag:TagResources=2,sns:*=3.5") == {
+        ("ec2", "CreateTags"): (10.0, 50.0),
+        ("resourcegroupstaggingapi", "TagResources"): (2.0, 2.0),
+        ("sns", "*"): (3.5, 3.5),
+    }
+    assert parse_rate_limits("") == {}
+
+
+def test_rates_fall_back_from_operation_to_service_to_default():
+    limiter = RateLimiter({("sns", "*"): (3.0, 3.0)})
+    assert limiter.bucket("ec2", "us-east-1", "CreateTags").rate == DEFAULT_RATES[("ec2", "CreateTags")][0]
+    assert limiter.bucket("sns", "us-east-1", "TagResource").rate == 3.0
+    assert limiter.bucket("ecs", "us-east-1", "TagResource").rate == FALLBACK_RATE[0]
+    assert limiter.bucket("ec2", "us-east-1", "CreateTags") is not limiter.bucket("ec2", "eu-west-1", "CreateTags")
+
+
+def test_configured_wildcards_override_built_in_defaults():
+    limiter = RateLimiter(parse_rate_limits("rds:*=1,ec2:*=2,ec2:CreateTags=3"))
+    assert limiter.bucket("rds", "us-east-1", "AddTagsToResource").rate == 1.0
+    assert limiter.bucket("ec2", "us-east-1", "CreateTags").rate == 3.0
+    assert limiter.bucket("ec2", "us-east-1", "CreateVolume").rate == 2.0
+    assert limiter.bucket("elbv2", "us-east-1", "AddTags").rate == DEFAULT_RATES[("elbv2", "AddTags")][0]
+
+
+def test_cloudtrail_lookups_follow_documented_limit():
+    bucket = RateLimiter().bucket("cloudtrail", "us-east-1", "LookupEvents")
+    assert (bucket.rate, bucket.burst) == (2.0, 2)
+
+
+# Feature: auto-tag-resources, Property 9: Token bucket never exceeds its rate
+@settings(max_examples=50)
+@given(
+    rate=st.floats(min_value=0.5, max_value=100),
+    burst=st.integers(min_value=1, max_value=20),
+    calls=st.integers(min_value=1, max_value=60),
+)
+def test_bucket_waits_match_rate(rate, burst, calls):
+    """Property 9: A burst of calls is spread so that calls beyond the burst
+    are admitted no faster than the refill rate."""
+    clock = [0.0]
+    with patch("src.rate_limiter.time.monotonic", lambda: clock[0]), \
+            patch("src.rate_limiter.time.sleep", lambda s: None):
+        bucket = TokenBucket(rate, burst)
+        waits = [bucket.acquire() for _ in range(calls)]
+
+    assert waits[:burst] == [0.0] * min(burst, calls)
+    for n, wait in enumerate(waits[burst:], start=1):
+        assert abs(wait - n / rate) < 1e-6
+    assert bucket.stats()["waited"] == max(0, calls - burst)
+    assert bucket.stats()["queue_depth"] == 0
+
+
+def test_queue_depth_tracks_waiting_threads():
+    bucket = TokenBucket(rate=1000.0, burst=1)
+    threads = [threading.Thread(target=bucket.acquire) for _ in range(5)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    stats = bucket.stats()
+    assert stats["acquired"] == 5
+    assert stats["queue_depth"] == 0
+    assert 1 <= stats["max_queue_depth"] <= 4
+
+
+def test_pooled_clients_pass_every_call_through_limiter():
+    client_pool.clear_clients()
+    limiter = RateLimiter()
+    with patch.object(client_pool, "RATE_LIMITER", limiter):
+        ec2 = client_pool.get_client("ec2", "us-east-1")
+        with Stubber(ec2) as stub:
+            for _ in range(3):
+                stub.add_response("create_tags", {}, {"Resources": ["i-1"], "Tags": []})
+                ec2.create_tags(Resources=["i-1"], Tags=[])
+    client_pool.clear_clients()
+
+    assert limiter.stats()["ec2:CreateTags@us-east-1"]["acquired"] == 3
@@ -0,0 +1,141 @@
+"""Tests for the tag drift reconciler."""
+
+import json
+from unittest.mock import patch
+
+from botocore.exceptions import ClientError
+from hypothesis import given, settings, strategies as st
+
+from src import client_pool
+from src.rate_limiter import RateLimiter
+from src.identity import extract_owner, identity_from_arn
+from src.reconciler import Reconciler, iter_resources, expected_tags, missing_tags, STANDARD_KEYS
+from benchmarks.fake_aws import FakeAWS
+
+PRINCIPALS = [
+    "arn:aws:iam::1:user/alice",
+    "arn:aws:sts::1:assumed-role/ci/deploy-42",
+    "arn:aws:iam::1:root",
+    "arn:aws:sts::1:federated-user/bob",
+]
+
+
+def standard(principal, date="2025-01-01T00:00:00Z"):
+    return {"Owner": extract_owner(identity_from_arn(principal)), "CreatedBy": principal, "CreationDate": date}
+
+
+# The real TagResources budget (5/s) would make every example wait
+UNTHROTTLED = RateLimiter({("resourcegroupstaggingapi", op): (1e6, 1e6) for op in ("GetResources", "TagResources")})
+
+
+def instance_arn(region, n):
+    return f"arn:aws:ec2:{region}:1:instance/i-{n:08x}"
+
+
+class FakeLookup:
+    """CloudTrailLookup stand-in returning one creation event per ARN."""
+
+    def __init__(self, details):
+        self.details = details
+        self.calls = []
+
+    def creation_detail(self, region, arn, account=None):
+        self.calls.append(arn)
+        return self.details.get(arn)
+
+
+# Feature: auto-tag-resources, Property 23: Reconciliation restores exactly the missing standard keys
+@settings(max_examples=50, deadline=None)
+@given(resources=st.lists(st.tuples(st.sampled_from(PRINCIPALS),
+                                    st.sets(st.sampled_from(STANDARD_KEYS)),
+                                    st.booleans()), max_size=60),
+       page_size=st.integers(min_value=1, max_value=25),
+       max_pending=st.integers(min_value=1, max_value=50))
+def test_reconcile_restores_only_missing_keys(resources, page_size, max_pending):
+    """Property 23: After a run, every resource whose remaining tags (or creation
+    event) resolve its standard set has all three keys with the expected values,
+    keys that were present are unchanged, and other tags are untouched."""
+    inventory, details, truth = {"us-east-1": {}, "eu-west-1": {}}, {}, {}
+    for n, (principal, removed, traceable) in enumerate(resources):
+        region = ["us-east-1", "eu-west-1"][n % 2]
+        arn = instance_arn(region, n)
+        truth[arn] = standard(principal)
+        tags = {k: v for k, v in truth[arn].items() if k not in removed}
+        tags["Team"] = "x"
+        inventory[region][arn] = tags
+        if traceable:
+            details[arn] = {"userIdentity": identity_from_arn(principal), "eventTime": truth[arn]["CreationDate"]}
+    before = json.loads(json.dumps(inventory))
+
+    with FakeAWS(resources=inventory) as aws, patch.object(client_pool, "RATE_LIMITER", UNTHROTTLED):
+        stats = Reconciler(["us-east-1", "eu-west-1"], lookup=FakeLookup(details),
+                           max_pending=max_pending, page_size=page_size).run()
+
+    for region, arns in inventory.items():
+        for arn, tags in arns.items():
+            original = before[region][arn]
+            assert all(tags[k] == v for k, v in original.items())
+            resolvable = arn in details or ("CreatedBy" in original and "CreationDate" in original)
+            if resolvable:
+                assert {k: tags[k] for k in STANDARD_KEYS} == truth[arn]
+            else:
+                assert set(tags) - set(original) <= {"Owner"}
+    assert sum(s["scanned"] for s in stats.values()) == len(resources)
+    assert all(s["complete"] and not s["failed"] for s in stats.values())
+    assert aws.calls.get("resourcegroupstaggingapi:TagResources", 0) <= sum(s["drifted"] for s in stats.values())
+
+
+def test_resources_are_streamed_page_by_page():
+    inventory = {"us-east-1": {instance_arn("us-east-1", n): {} for n in range(250)}}
+    with FakeAWS(resources=inventory) as aws:
+        client = client_pool.get_client("resourcegroupstaggingapi", "us-east-1")
+        resources = iter_resources(client, page_size=100)
+        next(resources)
+        assert aws.calls["resourcegroupstaggingapi:GetResources"] == 1
+        assert sum(1 for _ in resources) == 249
+        assert aws.calls["resourcegroupstaggingapi:GetResources"] == 3
+
+
+def test_failed_page_resumes_from_its_token():
+    inventory = {"us-east-1": {instance_arn("us-east-1", n): {} for n in range(30)}}
+
+    class FlakyAWS(FakeAWS):
+        def handle(self, service, operation, params):
+            response = super().handle(service, operation, params)
+            if operation == "GetResources" and self.calls["resourcegroupstaggingapi:GetResources"] == 2:
+                raise ClientError({"Error": {"Code": "ThrottlingException", "Message": ""}}, operation)
+            return response
+
+    with FlakyAWS(resources=inventory) as aws, patch("src.retry.time.sleep"):
+        client = client_pool.get_client("resourcegroupstaggingapi", "us-east-1")
+        arns = [arn for arn, _ in iter_resources(client, page_size=10)]
+    assert arns == sorted(inventory["us-east-1"])
+    assert aws.calls["resourcegroupstaggingapi:GetResources"] == 4
+
+
+def test_same_missing_tags_share_tag_resources_calls():
+    principal = PRINCIPALS[0]
+    tags = {k: v for k, v in standard(principal).items() if k != "Owner"}
+    inventory = {"us-east-1": {instance_arn("us-east-1", n): dict(tags) for n in range(45)}}
+    with FakeAWS(resources=inventory) as aws:
+        stats = Reconciler(["us-east-1"]).run()
+    assert stats["us-east-1"]["tagged"] == 45
+    # 45 resources needing the same Owner value -> ceil(45 / 20) calls
+    assert aws.calls["resourcegroupstaggingapi:TagResources"] == 3
+    assert all(t["Owner"] == "alice" for t in inventory["us-east-1"].values())
+
+
+def test_complete_resources_are_not_written():
+    inventory = {"us-east-1": {instance_arn("us-east-1", 1): standard(PRINCIPALS[1])}}
+    lookup = FakeLookup({})
+    with FakeAWS(resources=inventory) as aws:
+        stats = Reconciler(["us-east-1"], lookup=lookup).run()
+    assert stats["us-east-1"]["drifted"] == 0
+    assert "resourcegroupstaggingapi:TagResources" not in aws.calls
+    assert lookup.calls == []
+
+
+def test_owner_is_derived_from_created_by_without_lookup():
+    assert expected_tags({"CreatedBy": PRINCIPALS[1]}) == {"Owner": "deploy-42"}
+    assert missing_tags({"CreatedBy": PRINCIPALS[1]}, {"Owner": "deploy-42"}) == {"Owner": "deploy-42"}
+    assert expected_tags({}) == {}
@@ -0,0 +1,66 @@
+"""Tests for the offline EventBridge replay harness."""
+
+import json
+from unittest.mock import patch
+
+from hypothesis import given, settings, strategies as st
+
+from src.config import HANDLER_PATHS
+from benchmarks.events import generate_events
+from benchmarks.replay import replay, diff_traces, read_capture, write_capture, main
+
+
+# Feature: auto-tag-resources, Property 24: Replaying a capture is deterministic
+@settings(max_examples=15, deadline=None)
+@given(count=st.integers(min_value=1, max_value=20), seed=st.integers(min_value=0, max_value=1000),
+       repeats=st.lists(st.integers(min_value=0, max_value=19), max_size=3))
+def test_replay_trace_is_deterministic(count, seed, repeats):
+    """Property 24: Replaying the same capture twice records the same API calls for
+    every event, so the diff of the two traces is empty."""
+    events = list(generate_events(count, fleet_sizes=(1, 3), seed=seed))
+    events += [events[n % count] for n in repeats]
+    first, second = replay(events), replay(events)
+    assert first["events"] == len(events)
+    assert diff_traces(first["trace"], second["trace"]) == []
+
+
+def test_capture_round_trips_through_gzip(tmp_path):
+    events = list(generate_events(5))
+    path = str(tmp_path / "capture.ndjson.gz")
+    write_capture(events, path)
+    assert list(read_capture(path)) == events
+
+
+def test_report_attributes_calls_to_events():
+    events = list(generate_events(len(HANDLER_PATHS), fleet_sizes=(2,)))
+    report = replay(events)
+    assert report["statuses"] == {"200": len(events)}
+    assert len(report["handlers"]) == len(HANDLER_PATHS)
+    traced = sum(len(entry["calls"]) for entry in report["trace"])
+    assert traced == sum(report["api_calls"].values())
+    first = report["trace"][0]
+    assert first["event"] == events[0]["detail"]["eventID"]
+    assert first["calls"][0]["api"] == "ec2:CreateTags" and first["calls"][0]["region"]
+
+
+def test_changed_handler_shows_up_in_diff():
+    events = list(generate_events(3))
+    baseline = replay(events)
+    with patch("src.lambda_function.ENVIRONMENT", "Staging"):
+        current = replay(events[1:])
+    changes = {c["event"]: c for c in diff_traces(baseline["trace"], current["trace"])}
+    assert changes[events[0]["detail"]["eventID"]]["change"] == "removed"
+    changed = changes[events[1]["detail"]["eventID"]]
+    assert changed["change"] == "changed"
+    assert any(line.startswith("+") and "Staging" in line for line in changed["diff"])
+
+
+def test_cli_fails_on_diff_against_baseline(tmp_path, capsys):
+    capture, baseline = str(tmp_path / "capture.ndjson"), str(tmp_path / "run.json")
+    write_capture(generate_events(4), capture)
+    assert main([capture, "--output", baseline]) == 0
+    assert json.loads(open(baseline).read())["events"] == 4
+    assert main([capture, "--baseline", baseline, "--fail-on-diff"]) == 0
+    write_capture(generate_events(5), capture)
+    assert main([capture, "--baseline", baseline, "--fail-on-diff"]) == 1
+    assert "added:" in capsys.readouterr().out
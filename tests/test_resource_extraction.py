@@ -1,7 +1,11 @@
-"""Property test for resource ID extraction completeness."""
+"""Tests for declarative resource ID extraction."""
+
+from unittest.mock import MagicMock, patch
 
 from hypothesis import given, settings, strategies as st, assume
-from src.resource_extractors import EXTRACTORS
+from src.resource_extractors import EXTRACTORS, ID_KINDS, ARN, ExtractionSpec, compile_spec, parse_path
+from src.bulk_tagger import BULK_TAGGABLE_EVENTS
+from src.handlers.other_services import handle_elb_create_target_group
 
 # A non-empty resource ID string
 resource_id = st.text(
@@ -95,3 +99,63 @@ def test_resource_id_extraction_completeness(event_index, rid):
             assert item, f"Extractor for {event_source}/{event_name} returned empty item in list"
     else:
         assert result, f"Extractor for {event_source}/{event_name} returned empty/None"
+
+
+def _walk(value, steps):
+    """Reference interpreter for spec paths: the generic walk the compiled code replaces."""
+    if not steps:
+        return [value] if value else []
+    (key, fan_out), rest = steps[0], steps[1:]
+    if not isinstance(value, dict):
+        return []
+    value = value.get(key)
+    if not fan_out:
+        return _walk(value, rest)
+    if not isinstance(value, list):
+        return []
+    return [leaf for item in value for leaf in _walk(item, rest)]
+
+
+json_tree = st.recursive(
+    st.one_of(st.none(), st.sampled_from(["", "id-1", "id-2"]), st.integers(0, 2)),
+    lambda inner: st.lists(inner, max_size=3) | st.dictionaries(st.sampled_from("abc"), inner, max_size=3),
+    max_leaves=20,
+)
+spec_path = st.lists(
+    st.tuples(st.sampled_from("abc"), st.booleans()), min_size=1, max_size=4,
+).map(lambda steps: ".".join(f"{k}[*]" if fan_out else k for k, fan_out in steps))
+
+
+# Feature: auto-tag-resources, Property 14: Compiled extractors match the generic path walk
+@settings(max_examples=200)
+@given(paths=st.lists(spec_path, min_size=1, max_size=3), detail=json_tree)
+def test_compiled_extractor_matches_path_walk(paths, detail):
+    """Property 14: For any spec and any JSON-like detail, the compiled extractor
+    returns exactly the non-empty leaves a generic walk of each path finds, in order."""
+    extractor = compile_spec(ExtractionSpec(tuple(paths), ARN))
+    expected = [leaf for path in paths for leaf in _walk(detail, parse_path(path))]
+    assert extractor(detail) == expected
+
+
+def test_elb_events_yield_every_resource():
+    detail = {"responseElements": {"loadBalancers": [
+        {"loadBalancerArn": "arn:lb/1"}, "malformed", {"loadBalancerArn": "arn:lb/2"},
+    ]}}
+    assert EXTRACTORS[("elasticloadbalancing.amazonaws.com", "CreateLoadBalancer")](detail) == [
+        "arn:lb/1", "arn:lb/2",
+    ]
+
+
+def test_elb_handler_tags_all_target_groups_in_one_call():
+    client = MagicMock()
+    detail = {"responseElements": {"targetGroups": [{"targetGroupArn": "arn:tg/1"}, {"targetGroupArn": "arn:tg/2"}]}}
+    with patch("src.handlers.common.get_account_client", return_value=client):
+        assert handle_elb_create_target_group(detail, {"Owner": "alice"}) is True
+    client.add_tags.assert_called_once_with(
+        ResourceArns=["arn:tg/1", "arn:tg/2"], Tags=[{"Key": "Owner", "Value": "alice"}],
+    )
+
+
+def test_arn_kinds_drive_bulk_tagging():
+    assert BULK_TAGGABLE_EVENTS == {key for key, kind in ID_KINDS.items() if kind == ARN}
+    assert ("s3.amazonaws.com", "CreateBucket") not in BULK_TAGGABLE_EVENTS
@@ -4,7 +4,7 @@ from hypothesis import given, settings, strategies as st
 
 from src.tag_builder import build_tags
 
-EXPECTED_KEYS = {"Owner", "CreatedBy", "CreationDate"}
+EXPECTED_KEYS = {"Owner", "CreatedBy", "CreationDate", "Environment", "Project", "AutoTagged"}
 
 tag_value = st.text(
     alphabet=st.characters(whitelist_categories=("L", "N"), whitelist_characters="-_:/.@ "),
@@ -25,7 +25,7 @@ def test_tag_builder_completeness_and_correctness(owner, arn, event_time, enviro
     """Property 2: Tag builder completeness and correctness.
 
     For any combination of inputs, build_tags returns a dict containing exactly
-    the three standard keys with the correct values.
+    the six standard keys with the correct values.
     **Validates: Requirements 12.1, 12.2, 12.3**
     """
     tags = build_tags(owner, arn, event_time, environment, project)
@@ -34,3 +34,15 @@ def test_tag_builder_completeness_and_correctness(owner, arn, event_time, enviro
     assert tags["Owner"] == owner
     assert tags["CreatedBy"] == arn
     assert tags["CreationDate"] == event_time
+    assert tags["Environment"] == environment
+    assert tags["Project"] == project
+    assert tags["AutoTagged"] == "true"
+
+
+def test_rule_tags_extend_and_override_but_not_reserved_keys():
+    extra = (("CostCenter", "CC-1"), ("Environment", "Prod"), ("Owner", "mallory"))
+    tags = build_tags("alice", "arn:a", "t", "Dev", "Billing", extra)
+    assert tags["CostCenter"] == "CC-1"
+    assert tags["Environment"] == "Prod"
+    assert tags["Owner"] == "alice"
+    assert list(tags)[-1] == "CreationDate"
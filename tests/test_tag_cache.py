@@ -0,0 +1,77 @@
+"""Tests for the principal tag-set cache and its pre-serialized payloads."""
+
+from hypothesis import given, settings, strategies as st
+
+from src.identity import extract_owner
+from src.tag_builder import build_tags
+from src.tag_cache import TagSetCache
+from src.tag_serializer import serialize_ec2_tags, serialize_arn_tags, serialize_tag_map
+
+names = st.text(alphabet="abcdefghij-", min_size=1, max_size=8)
+identities = st.one_of(
+    st.builds(lambda n: {"type": "IAMUser", "userName": n, "arn": f"arn:aws:iam::1:user/{n}"}, names),
+    st.builds(lambda n: {"type": "AssumedRole", "arn": f"arn:aws:sts::1:assumed-role/ci/{n}"}, names),
+    st.just({"type": "Root", "arn": "arn:aws:iam::1:root"}),
+    st.just({}),
+)
+times = st.sampled_from(["2025-01-01T00:00:00Z", "2025-01-01T00:00:01Z", ""])
+
+
+# Feature: auto-tag-resources, Property 17: Cached tag sets match freshly built ones
+@settings(max_examples=100)
+@given(events=st.lists(st.tuples(identities, times), min_size=1, max_size=30),
+       maxsize=st.integers(min_value=1, max_value=4))
+def test_cached_tag_sets_match_fresh(events, maxsize):
+    """Property 17: For any sequence of events, including LRU evictions, the cached
+    tag set equals build_tags for that event and its payloads equal the plain serializers'."""
+    cache = TagSetCache(maxsize)
+    for identity, event_time in events:
+        tags = cache.tags_for(identity, event_time, "Prod", "Billing")
+        expected = build_tags(extract_owner(identity), identity.get("arn", "Unknown") if identity else "Unknown",
+                              event_time, "Prod", "Billing")
+        assert dict(tags) == expected and list(tags) == list(expected)
+        assert serialize_ec2_tags(tags) == serialize_ec2_tags(expected)
+        assert serialize_arn_tags(tags) == serialize_arn_tags(expected)
+        assert serialize_tag_map(tags) == expected
+    assert len(cache) <= maxsize
+
+
+def test_payloads_are_built_once_and_shared():
+    cache = TagSetCache()
+    identity = {"type": "IAMUser", "userName": "ci", "arn": "arn:aws:iam::1:user/ci"}
+    first = cache.tags_for(identity, "2025-01-01T00:00:00Z", "Prod", "Billing")
+    second = cache.tags_for(identity, "2025-01-01T00:00:00Z", "Prod", "Billing")
+    assert second is first
+    assert serialize_ec2_tags(second) is serialize_ec2_tags(first)
+    assert serialize_tag_map(second) is serialize_tag_map(first)
+    assert (cache.hits, cache.misses) == (1, 1)
+
+
+def test_new_creation_date_reuses_principal_entries():
+    cache = TagSetCache()
+    identity = {"type": "Root", "arn": "arn:aws:iam::1:root"}
+    first = cache.tags_for(identity, "2025-01-01T00:00:00Z", "Prod", "Billing")
+    later = cache.tags_for(identity, "2025-01-01T00:05:00Z", "Prod", "Billing")
+    assert later.base is first.base and later["CreationDate"] == "2025-01-01T00:05:00Z"
+    assert all(a is b for a, b in zip(first.wire_list[:-1], later.wire_list[:-1]))
+
+
+def test_static_config_is_part_of_the_key():
+    cache = TagSetCache()
+    identity = {"type": "Root", "arn": "arn:aws:iam::1:root"}
+    cache.tags_for(identity, "t", "Prod", "Billing")
+    cache.tags_for(identity, "t", "Dev", "Billing")
+    assert len(cache) == 2 and cache.misses == 2
+
+
+def test_least_recently_used_principal_is_evicted():
+    cache = TagSetCache(maxsize=2)
+    a, b, c = ({"type": "IAMUser", "userName": n, "arn": f"arn:aws:iam::1:user/{n}"} for n in "abc")
+    cache.tags_for(a, "t", "P", "Q")
+    cache.tags_for(b, "t", "P", "Q")
+    cache.tags_for(a, "t", "P", "Q")
+    cache.tags_for(c, "t", "P", "Q")
+    cache.tags_for(a, "t", "P", "Q")
+    assert cache.misses == 3
+    cache.tags_for(b, "t", "P", "Q")
+    assert cache.misses == 4
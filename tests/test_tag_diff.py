@@ -0,0 +1,87 @@
+"""Tests for the tag-diff engine and the S3 read-modify-write handler."""
+
+from unittest.mock import MagicMock, patch
+
+import pytest
+from botocore.exceptions import ClientError
+from hypothesis import given, settings, strategies as st
+
+from src.handlers.s3 import handle_s3_create_bucket
+from src.tag_diff import diff_tags, merge_tags, TagLimitExceeded, S3_MAX_TAGS
+from src.tag_serializer import serialize_s3_tags
+
+tag_key = st.text(alphabet="abcdefghij", min_size=1, max_size=4)
+tag_value = st.text(alphabet="xyz", max_size=3)
+tag_payload = st.dictionaries(tag_key, tag_value, max_size=10)
+
+TAGS = {"Owner": "alice", "CreatedBy": "arn:a", "CreationDate": "t"}
+DETAIL = {"requestParameters": {"bucketName": "my-bucket"}}
+
+
+# Feature: auto-tag-resources, Property 11: Diff-merge converges in one write
+@settings(max_examples=100)
+@given(existing=tag_payload, desired=tag_payload)
+def test_diff_then_merge_converges(existing, desired):
+    """Property 11: Merging the diff yields every desired tag, keeps unrelated
+    existing tags, and a second diff is empty."""
+    changes = diff_tags(existing, desired)
+    merged = merge_tags(existing, changes)
+
+    assert all(merged[k] == v for k, v in desired.items())
+    assert all(merged[k] == v for k, v in existing.items() if k not in desired)
+    assert diff_tags(merged, desired) == {}
+    assert (changes == {}) == all(existing.get(k) == v for k, v in desired.items())
+
+
+def test_merge_enforces_limit():
+    existing = {f"k{n}": "v" for n in range(S3_MAX_TAGS - 1)}
+    with pytest.raises(TagLimitExceeded):
+        merge_tags(existing, {"a": "1", "b": "2"}, limit=S3_MAX_TAGS)
+
+
+def s3_client(tag_set=None, get_error=None):
+    s3 = MagicMock()
+    if get_error:
+        s3.get_bucket_tagging.side_effect = ClientError(
+            {"Error": {"Code": get_error, "Message": ""}}, "GetBucketTagging")
+    else:
+        s3.get_bucket_tagging.return_value = {"TagSet": tag_set or []}
+    return s3
+
+
+def test_bucket_without_tags_is_written():
+    s3 = s3_client(get_error="NoSuchTagSet")
+    with patch("src.handlers.s3.get_account_client", return_value=s3):
+        assert handle_s3_create_bucket(DETAIL, TAGS) is True
+    s3.put_bucket_tagging.assert_called_once_with(
+        Bucket="my-bucket", Tagging={"TagSet": serialize_s3_tags(TAGS)},
+    )
+
+
+def test_already_tagged_bucket_skips_put():
+    s3 = s3_client(tag_set=serialize_s3_tags({**TAGS, "Team": "x"}))
+    with patch("src.handlers.s3.get_account_client", return_value=s3):
+        assert handle_s3_create_bucket(DETAIL, TAGS) is True
+    s3.put_bucket_tagging.assert_not_called()
+
+
+def test_partial_tags_are_merged():
+    s3 = s3_client(tag_set=serialize_s3_tags({"Owner": "old", "Team": "x"}))
+    with patch("src.handlers.s3.get_account_client", return_value=s3):
+        handle_s3_create_bucket(DETAIL, TAGS)
+    written = s3.put_bucket_tagging.call_args.kwargs["Tagging"]["TagSet"]
+    assert {t["Key"]: t["Value"] for t in written} == {**TAGS, "Team": "x"}
+
+
+def test_other_get_errors_are_surfaced():
+    s3 = s3_client(get_error="AccessDenied")
+    with patch("src.handlers.s3.get_account_client", return_value=s3):
+        assert handle_s3_create_bucket(DETAIL, TAGS) is False
+    s3.put_bucket_tagging.assert_not_called()
+
+
+def test_tag_limit_blocks_write():
+    s3 = s3_client(tag_set=serialize_s3_tags({f"k{n}": "v" for n in range(S3_MAX_TAGS)}))
+    with patch("src.handlers.s3.get_account_client", return_value=s3):
+        assert handle_s3_create_bucket(DETAIL, TAGS) is False
+    s3.put_bucket_tagging.assert_not_called()
@@ -0,0 +1,123 @@
+"""Tests for the compiled tag rule engine."""
+
+import json
+from unittest.mock import patch
+
+import pytest
+from hypothesis import given, settings, strategies as st
+
+from src import tag_rules
+from src.tag_rules import TagRules, resource_name, _event_fields
+from src.lambda_function import prepare_event
+
+short = st.text(alphabet="ab-", max_size=4)
+pattern = st.builds(lambda v, star: v + "*" if star else v, short, st.booleans())
+condition_values = {
+    "account": st.sampled_from(["111", "222", "333"]),
+    "region": st.sampled_from(["us-east-1", "eu-west-1"]),
+    "eventName": st.sampled_from(["RunInstances", "CreateBucket"]),
+    "principal": pattern,
+    "name": pattern,
+}
+rules_strategy = st.lists(
+    st.fixed_dictionaries(
+        {"tags": st.dictionaries(st.sampled_from(["CostCenter", "Team", "Environment"]), short, min_size=1)},
+        optional={field: st.one_of(values, st.lists(values, min_size=1, max_size=3))
+                  for field, values in condition_values.items()},
+    ),
+    max_size=30,
+)
+details = st.builds(
+    lambda account, region, event_name, principal, name: {
+        "recipientAccountId": account, "awsRegion": region, "eventName": event_name,
+        "eventSource": "ec2.amazonaws.com", "userIdentity": {"arn": principal},
+        "requestParameters": {"bucketName": name},
+    },
+    condition_values["account"], condition_values["region"], condition_values["eventName"], short, short,
+)
+
+
+def reference_evaluate(rules, detail):
+    """Linear scan over every rule, as the compiled indexes must behave."""
+    fields = _event_fields(detail)
+    merged = {}
+    for rule in rules:
+        ok = True
+        for field, wanted in rule.items():
+            if field == "tags":
+                continue
+            alternatives = wanted if isinstance(wanted, list) else [wanted]
+            value = fields[field]
+            ok = ok and any(value.startswith(alt[:-1]) if alt.endswith("*") else value == alt
+                            for alt in alternatives)
+        if ok:
+            merged.update(rule["tags"])
+    return tuple(merged.items())
+
+
+# Feature: auto-tag-resources, Property 22: Compiled rules match a linear scan
+@settings(max_examples=200)
+@given(rules=rules_strategy, detail=details)
+def test_compiled_rules_match_linear_scan(rules, detail):
+    """Property 22: For any rule set and event, the indexed evaluation returns the
+    same tags, in the same order, as checking every rule in file order."""
+    assert TagRules(rules).evaluate(detail) == reference_evaluate(rules, detail)
+
+
+def test_only_rules_sharing_a_value_are_counted():
+    rules = [{"account": str(n), "tags": {"CostCenter": f"CC-{n}"}} for n in range(1000)]
+    rules.append({"name": "billing-*", "region": "us-east-1", "tags": {"Team": "billing"}})
+    compiled = TagRules(rules)
+    detail = {"recipientAccountId": "42", "awsRegion": "us-east-1", "requestParameters": {"bucketName": "billing-logs"}}
+    assert compiled.matching_rules(detail) == [42, 1000]
+    assert compiled.evaluate(detail) == (("CostCenter", "CC-42"), ("Team", "billing"))
+
+
+def test_rule_without_conditions_applies_to_every_event():
+    compiled = TagRules([{"tags": {"Team": "platform"}}, {"region": "eu-west-1", "tags": {"Team": "eu"}}])
+    assert compiled.evaluate({"awsRegion": "us-east-1"}) == (("Team", "platform"),)
+    assert compiled.evaluate({"awsRegion": "eu-west-1"}) == (("Team", "eu"),)
+
+
+@pytest.mark.parametrize("rule", [
+    {"tags": {"Owner": "x"}},
+    {"account": "1", "tags": {}},
+    {"acount": "1", "tags": {"Team": "x"}},
+    {"region": "us-*", "tags": {"Team": "x"}},
+    {"name": "a*b", "tags": {"Team": "x"}},
+])
+def test_invalid_rules_are_rejected_at_compile_time(rule):
+    with pytest.raises(ValueError):
+        TagRules([rule])
+
+
+def test_resource_name_reads_ec2_name_tag():
+    detail = {"requestParameters": {"tagSpecificationSet": {"items": [
+        {"resourceType": "instance", "tags": [{"key": "Team", "value": "x"}, {"key": "Name", "value": "web-1"}]},
+    ]}}}
+    assert resource_name(detail) == "web-1"
+    assert resource_name({"requestParameters": {"functionName": "billing-api"}}) == "billing-api"
+    assert resource_name({"requestParameters": None}) == ""
+
+
+def test_rules_load_from_file_then_inline(tmp_path):
+    path = tmp_path / "rules.json"
+    path.write_text(json.dumps([{"tags": {"Team": "file"}}]))
+    with patch.object(tag_rules, "TAG_RULES_FILE", str(path)), \
+            patch.object(tag_rules, "TAG_RULES", json.dumps([{"region": "us-east-1", "tags": {"Team": "inline"}}])):
+        compiled = TagRules.from_env()
+    assert len(compiled) == 2
+    assert compiled.evaluate({"awsRegion": "us-east-1"}) == (("Team", "inline"),)
+
+
+def test_prepared_events_carry_environment_project_and_rule_tags():
+    event = {"detail": {
+        "eventSource": "s3.amazonaws.com", "eventName": "CreateBucket", "awsRegion": "us-east-1",
+        "eventTime": "2025-01-01T00:00:00Z", "userIdentity": {"type": "Root", "arn": "arn:aws:iam::1:root"},
+        "requestParameters": {"bucketName": "billing-logs"},
+    }}
+    rules = TagRules([{"name": "billing-*", "tags": {"CostCenter": "CC-7"}}])
+    with patch("src.lambda_function.TAG_RULES", rules), patch("src.lambda_function.ENVIRONMENT", "Production"):
+        _, _, _, tags = prepare_event(event)
+    assert tags["Environment"] == "Production" and tags["AutoTagged"] == "true"
+    assert tags["CostCenter"] == "CC-7"
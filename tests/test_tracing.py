@@ -0,0 +1,143 @@
+"""Tests for per-invocation timing trees."""
+
+import json
+import logging
+from unittest.mock import patch
+
+from hypothesis import given, settings, strategies as st
+
+from src import tracing
+from src.tracing import Span, span, trace_invocation
+from src.lambda_function import lambda_handler, batch_handler
+from benchmarks.events import generate_events
+from benchmarks.fake_aws import FakeAWS
+
+
+def logged_tree(caplog):
+    lines = [r.getMessage() for r in caplog.records if r.getMessage().startswith("Timing: ")]
+    assert len(lines) == 1
+    return json.loads(lines[0][len("Timing: "):])
+
+
+def walk(node):
+    yield node
+    for child in node.get("children", []):
+        yield from walk(child)
+
+
+def nested(depths):
+    """Build a span tree from a list of child counts per level under the current span."""
+    if not depths:
+        return
+    for _ in range(depths[0]):
+        with span("node"):
+            nested(depths[1:])
+
+
+# Feature: auto-tag-resources, Property 16: Timing tree children nest inside their parents
+@settings(max_examples=100)
+@given(depths=st.lists(st.integers(min_value=0, max_value=3), max_size=4))
+def test_children_nest_inside_parents(depths):
+    """Property 16: Every span starts no earlier and ends no later than its parent,
+    and the tree has one node per span opened."""
+    traced = trace_invocation("root")(lambda: nested(depths))
+    with patch.object(tracing.logger, "info") as info:
+        traced()
+    tree = info.call_args[0][1].root.to_dict()
+
+    expected, width = 1, 1
+    for count in depths:
+        width *= count
+        expected += width
+    assert sum(1 for _ in walk(tree)) == expected
+
+    def check(node):
+        for child in node.get("children", []):
+            assert child["start_ms"] >= node["start_ms"]
+            assert child["start_ms"] + child["duration_ms"] <= node["start_ms"] + node["duration_ms"] + 1e-3
+            check(child)
+    check(tree)
+
+
+def test_span_outside_invocation_is_noop():
+    assert span("orphan") is tracing._NULL_SPAN
+
+
+def test_unfinished_span_reports_elapsed_time():
+    node = Span("open")
+    assert node.to_dict()["duration_ms"] >= 0 and "children" not in node.to_dict()
+
+
+def test_direct_invocation_tree(caplog):
+    event = next(generate_events(1, fleet_sizes=(3,)))
+    with FakeAWS(), patch("src.lambda_function.IDEMPOTENCY", None), caplog.at_level(logging.INFO, "src.tracing"):
+        lambda_handler(event, None)
+    tree = logged_tree(caplog)
+    assert tree["name"] == "lambda_handler"
+    handler = tree["children"][0]
+    assert handler["name"] == "handler:RunInstances"
+    client, api = handler["children"]
+    assert client["name"] == f"client:ec2@{event['detail']['awsRegion']}" and api["name"] == "ec2:CreateTags"
+    assert [c["name"] for c in api["children"]] == ["http"]
+    assert api["children"][0]["status"] == 200
+
+
+def test_retries_appear_as_sibling_api_spans(caplog):
+    event = next(generate_events(1))
+    with FakeAWS(throttle_rate=1.0), patch("src.lambda_function.IDEMPOTENCY", None), \
+            patch("src.retry.time.sleep"), caplog.at_level(logging.INFO, "src.tracing"):
+        lambda_handler(event, None)
+    handler = logged_tree(caplog)["children"][0]
+    attempts = [c for c in handler["children"] if c["name"] == "ec2:CreateTags"]
+    assert len(attempts) == 4
+    assert all(a["error"] == "Throttling" and a["children"][0]["status"] == 400 for a in attempts)
+
+
+def test_batch_tree_includes_dispatcher_work(caplog):
+    events = list(generate_events(3, keys=[("ec2.amazonaws.com", "RunInstances")]))
+    records = [{"messageId": str(n), "body": json.dumps(e)} for n, e in enumerate(events)]
+    with FakeAWS(), patch("src.lambda_function.IDEMPOTENCY", None), caplog.at_level(logging.INFO, "src.tracing"):
+        batch_handler({"Records": records}, None)
+    tree = logged_tree(caplog)
+    names = [n["name"] for n in walk(tree)]
+    assert "coalesced:CreateTags" in names and "ec2:CreateTags" in names
+
+
+def test_disabled_registers_nothing(caplog):
+    event = next(generate_events(1))
+    with patch.object(tracing, "TIMING_ENABLED", False), FakeAWS() as aws, \
+            patch("src.lambda_function.IDEMPOTENCY", None), caplog.at_level(logging.INFO, "src.tracing"):
+        traced = trace_invocation()(lambda: None)
+        from src.client_pool import get_client
+        client = get_client("ec2", "us-east-1")
+        lambda_handler(event, None)
+    assert traced.__name__ == "<lambda>"
+    assert len(client.meta.events._handlers) == 3
+    assert aws.calls == {"ec2:CreateTags": 1}
+
+
+def test_failed_send_closes_api_span():
+    import botocore.session
+    from botocore.exceptions import EndpointConnectionError
+
+    client = botocore.session.get_session().create_client(
+        "sns", region_name="us-east-1", aws_access_key_id="x", aws_secret_access_key="x")
+    tracing.register_client_hooks(client, "sns")
+    root = Span("invocation")
+    token = tracing._current.set(root)
+    try:
+        with patch.object(client._endpoint, "make_request",
+                          side_effect=EndpointConnectionError(endpoint_url="https://sns")):
+            try:
+                client.list_topics()
+            except EndpointConnectionError:
+                pass
+        assert tracing.current_span() is root
+        with span("after"):
+            pass
+    finally:
+        tracing._current.reset(token)
+    api, after = root.children
+    assert api.name == "sns:ListTopics" and api.end is not None
+    assert api.attrs["error"] == "EndpointConnectionError"
+    assert after.name == "after" and not api.children